@@ -2,10 +2,11 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse, Http404
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from .models import Attendance, Incapacity
 from .serializers import AttendanceSerializer, IncapacitySerializer
+from ds2_back.downloads import file_download_response
 
 User = get_user_model()
 
@@ -58,10 +59,6 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             raise Http404("El archivo no está disponible")
         
         try:
-            # Leer el archivo
-            with attendance.file.open('rb') as f:
-                file_content = f.read()
-            
             # Determinar content type según la extensión
             file_extension = attendance.file.name.split('.')[-1].lower()
             if file_extension == 'pdf':
@@ -73,12 +70,8 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             else:
                 content_type = 'application/octet-stream'
             
-            # Crear respuesta HTTP
-            response = HttpResponse(file_content, content_type=content_type)
-            response['Content-Disposition'] = f'attachment; filename="{attendance.title}.{file_extension}"'
-            response['Content-Length'] = len(file_content)
-            
-            return response
+            # Enviar el archivo sin cargarlo en memoria (Range, ETag/If-None-Match)
+            return file_download_response(request, attendance.file, f"{attendance.title}.{file_extension}", content_type)
             
         except Exception as e:
             return Response(
@@ -146,10 +139,6 @@ class IncapacityViewSet(viewsets.ModelViewSet):
             raise Http404("El documento no está disponible")
         
         try:
-            # Leer el archivo
-            with incapacity.document.open('rb') as f:
-                file_content = f.read()
-            
             # Determinar content type según la extensión
             file_extension = incapacity.document.name.split('.')[-1].lower()
             if file_extension == 'pdf':
@@ -161,12 +150,8 @@ class IncapacityViewSet(viewsets.ModelViewSet):
             else:
                 content_type = 'application/octet-stream'
             
-            # Crear respuesta HTTP
-            response = HttpResponse(file_content, content_type=content_type)
-            response['Content-Disposition'] = f'attachment; filename="incapacidad_{incapacity.user.username}_{incapacity.start_date}.{file_extension}"'
-            response['Content-Length'] = len(file_content)
-            
-            return response
+            # Enviar el archivo sin cargarlo en memoria (Range, ETag/If-None-Match)
+            return file_download_response(request, incapacity.document, f"incapacidad_{incapacity.user.username}_{incapacity.start_date}.{file_extension}", content_type)
             
         except Exception as e:
             return Response(
@@ -15,6 +15,9 @@ python manage.py collectstatic --clear --no-input
 # Ejecutar migraciones
 python manage.py migrate
 
+# Reconstruir el resumen diario de uso de salas
+python manage.py rebuild_daily_usage
+
 # Crear superusuario si no existe (opcional)
 if [[ $CREATE_SUPERUSER ]]; then
     python manage.py shell -c "
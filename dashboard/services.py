@@ -529,16 +529,32 @@ class DashboardService:
 
 
 from django.utils import timezone
-from django.db.models import Count, Sum
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, Q, Sum
+from django.db.models.functions import TruncDate, TruncHour, TruncWeek
 from datetime import timedelta
 from users.models import User
-from rooms.models import Room, RoomEntry
+from rooms.models import Room, RoomEntry, RoomDailyUsage
+from rooms.filters import local_day_start
+from rooms.occupancy import annotate_occupancy
 from notifications.models import Notification
 from notifications.services import ExcessiveHoursChecker
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Granularidades soportadas por DashboardService.get_usage_series
+USAGE_GRANULARITIES = ('hour', 'day', 'week')
+
+# Duración de una entrada calculada en la base de datos
+ENTRY_DURATION = ExpressionWrapper(F('exit_time') - F('entry_time'), output_field=DurationField())
+
+
+def _to_hours(duration):
+    """Convierte un agregado de duración (timedelta o None) a horas"""
+    if not duration:
+        return 0
+    return duration.total_seconds() / 3600
+
 
 class DashboardService:
     """
@@ -551,55 +567,52 @@ class DashboardService:
         Generar datos del dashboard para administradores
         """
         try:
-            # Estadísticas básicas
-            total_users = User.objects.count()
-            total_monitors = User.objects.filter(role='monitor').count()
-            verified_monitors = User.objects.filter(role='monitor', is_verified=True).count()
-            pending_verifications = User.objects.filter(role='monitor', is_verified=False).count()
+            # Estadísticas básicas (una consulta con conteos condicionales)
+            user_stats = User.objects.aggregate(
+                total_users=Count('id'),
+                total_monitors=Count('id', filter=Q(role='monitor')),
+                verified_monitors=Count('id', filter=Q(role='monitor', is_verified=True)),
+                pending_verifications=Count('id', filter=Q(role='monitor', is_verified=False))
+            )
+            total_users = user_stats['total_users']
+            total_monitors = user_stats['total_monitors']
+            verified_monitors = user_stats['verified_monitors']
+            pending_verifications = user_stats['pending_verifications']
             
-            # Estadísticas de salas
+            # Estadísticas de salas y de tiempo (hoy), calculadas en la base de datos
             total_rooms = Room.objects.filter(is_active=True).count()
-            active_entries = RoomEntry.objects.filter(exit_time__isnull=True).count()
-            occupied_rooms = RoomEntry.objects.filter(exit_time__isnull=True).values('room').distinct().count()
-            available_rooms = total_rooms - occupied_rooms
-            
-            # Estadísticas de notificaciones
-            unread_notifications = Notification.objects.filter(user=user, read=False).count()
-            
-            # Estadísticas de tiempo (hoy)
             today = timezone.now().date()
-            today_entries = RoomEntry.objects.filter(
-                entry_time__date=today,
-                exit_time__isnull=False
+            entry_stats = RoomEntry.objects.aggregate(
+                active_entries=Count('id', filter=Q(exit_time__isnull=True)),
+                occupied_rooms=Count('room', filter=Q(exit_time__isnull=True), distinct=True),
+                total_duration_today=Sum(ENTRY_DURATION, filter=Q(entry_time__date=today, exit_time__isnull=False)),
+                average_duration=Avg(ENTRY_DURATION, filter=Q(exit_time__isnull=False))
             )
+            active_entries = entry_stats['active_entries']
+            occupied_rooms = entry_stats['occupied_rooms']
+            available_rooms = total_rooms - occupied_rooms
             
-            total_hours_today = 0
-            if today_entries.exists():
-                for entry in today_entries:
-                    duration = entry.exit_time - entry.entry_time
-                    total_hours_today += duration.total_seconds() / 3600
+            total_hours_today = _to_hours(entry_stats['total_duration_today'])
             
             # Duración promedio de sesiones
-            completed_entries = RoomEntry.objects.filter(exit_time__isnull=False)
-            if completed_entries.exists():
-                total_duration = 0
-                for entry in completed_entries:
-                    duration = entry.exit_time - entry.entry_time
-                    total_duration += duration.total_seconds() / 3600
-                average_session_duration = total_duration / completed_entries.count()
-            else:
-                average_session_duration = 0
-            
-            # Alertas
-            excessive_hours_alerts = Notification.objects.filter(
-                notification_type='excessive_hours',
-                created_at__gte=timezone.now() - timedelta(days=7)
-            ).count()
-            
-            critical_alerts = Notification.objects.filter(
-                notification_type='excessive_hours',
-                created_at__gte=timezone.now() - timedelta(hours=24)
-            ).count()
+            average_session_duration = _to_hours(entry_stats['average_duration'])
+            
+            # Notificaciones sin leer y alertas
+            now = timezone.now()
+            notification_stats = Notification.objects.aggregate(
+                unread_notifications=Count('id', filter=Q(user=user, read=False)),
+                excessive_hours_alerts=Count('id', filter=Q(
+                    notification_type='excessive_hours',
+                    created_at__gte=now - timedelta(days=7)
+                )),
+                critical_alerts=Count('id', filter=Q(
+                    notification_type='excessive_hours',
+                    created_at__gte=now - timedelta(hours=24)
+                ))
+            )
+            unread_notifications = notification_stats['unread_notifications']
+            excessive_hours_alerts = notification_stats['excessive_hours_alerts']
+            critical_alerts = notification_stats['critical_alerts']
             
             # Mini cards
             mini_cards = [
@@ -896,33 +909,86 @@ class DashboardService:
             logger.error(f"Error obteniendo alertas del usuario: {e}")
             return []
     
+    @staticmethod
+    def get_usage_series(start_day, end_day, granularity='day', user=None):
+        """
+        Horas y sesiones (entradas cerradas) por intervalo entre los días locales
+        start_day y end_day (inclusivos), con una única consulta agrupada.
+        
+        - 'day' / 'week': desde el resumen diario materializado (RoomDailyUsage)
+        - 'hour': desde RoomEntry agrupando con TruncHour
+        
+        Retorna una serie continua en orden ascendente:
+        [{'bucket': ISO, 'hours': float, 'sessions': int}, ...]
+        """
+        if granularity not in USAGE_GRANULARITIES:
+            raise ValueError(f"Granularidad inválida: {granularity}. Opciones: {', '.join(USAGE_GRANULARITIES)}")
+        
+        if granularity == 'hour':
+            queryset = RoomEntry.objects.filter(
+                exit_time__isnull=False,
+                entry_time__gte=local_day_start(start_day),
+                entry_time__lt=local_day_start(end_day + timedelta(days=1))
+            )
+            if user is not None:
+                queryset = queryset.filter(user=user)
+            rows = queryset.annotate(bucket=TruncHour('entry_time')).values('bucket').annotate(
+                duration=Sum(ENTRY_DURATION),
+                sessions=Count('id')
+            ).order_by()
+            usage = {row['bucket']: (_to_hours(row['duration']), row['sessions']) for row in rows}
+            
+            bucket = timezone.localtime(local_day_start(start_day))
+            last_bucket = timezone.localtime(local_day_start(end_day + timedelta(days=1)))
+            step = timedelta(hours=1)
+        else:
+            queryset = RoomDailyUsage.objects.filter(date__gte=start_day, date__lte=end_day)
+            if user is not None:
+                queryset = queryset.filter(user=user)
+            bucket_expression = TruncWeek('date') if granularity == 'week' else F('date')
+            rows = queryset.annotate(bucket=bucket_expression).values('bucket').annotate(
+                worked_seconds=Sum('worked_seconds'),
+                sessions=Sum('session_count')
+            ).order_by()
+            usage = {row['bucket']: ((row['worked_seconds'] or 0) / 3600, row['sessions'] or 0) for row in rows}
+            
+            if granularity == 'week':
+                bucket = start_day - timedelta(days=start_day.weekday())
+                step = timedelta(days=7)
+            else:
+                bucket = start_day
+                step = timedelta(days=1)
+            last_bucket = end_day + timedelta(days=1)
+        
+        series = []
+        while bucket < last_bucket:
+            hours, sessions = usage.get(bucket, (0, 0))
+            series.append({
+                'bucket': bucket.isoformat(),
+                'hours': round(hours, 2),
+                'sessions': sessions
+            })
+            bucket += step
+        
+        return series
+    
     @staticmethod
     def _get_charts_data():
         """
         Obtener datos para gráficos
         """
         try:
-            # Datos de uso por día (últimos 7 días)
-            timezone.now() - timedelta(days=7)
-            daily_usage = []
-            
-            for i in range(7):
-                date = (timezone.now() - timedelta(days=i)).date()
-                entries = RoomEntry.objects.filter(
-                    entry_time__date=date,
-                    exit_time__isnull=False
-                )
-                
-                total_hours = 0
-                for entry in entries:
-                    duration = entry.exit_time - entry.entry_time
-                    total_hours += duration.total_seconds() / 3600
-                
-                daily_usage.append({
-                    'date': date.isoformat(),
-                    'hours': round(total_hours, 1),
-                    'sessions': entries.count()
-                })
+            # Datos de uso por día (últimos 7 días, hoy primero)
+            today = timezone.localdate()
+            series = DashboardService.get_usage_series(today - timedelta(days=6), today)
+            daily_usage = [
+                {
+                    'date': point['bucket'],
+                    'hours': round(point['hours'], 1),
+                    'sessions': point['sessions']
+                }
+                for point in reversed(series)
+            ]
             
             return {
                 'daily_usage': daily_usage,
@@ -933,38 +999,55 @@ class DashboardService:
             logger.error(f"Error obteniendo datos de gráficos: {e}")
             return {'daily_usage': [], 'room_occupancy': []}
     
+    @staticmethod
+    def _get_user_usage_rows(user, days=30):
+        """
+        Uso del usuario agrupado por (sala, día local) en los últimos `days` días,
+        en una sola consulta. Cada fila trae sesiones, sesiones cerradas y
+        duración total (solo entradas cerradas).
+        """
+        return list(RoomEntry.objects.filter(
+            user=user,
+            entry_time__gte=timezone.now() - timedelta(days=days)
+        ).annotate(
+            day=TruncDate('entry_time')
+        ).values('room__name', 'day').annotate(
+            total_sessions=Count('id'),
+            closed_sessions=Count('id', filter=Q(exit_time__isnull=False)),
+            total_duration=Sum(ENTRY_DURATION, filter=Q(exit_time__isnull=False))
+        ).order_by())
+    
     @staticmethod
     def _get_user_charts_data(user):
         """
         Obtener datos de gráficos para el usuario
         """
         try:
+            # Una única consulta agrupada alimenta ambos gráficos
+            usage_rows = DashboardService._get_user_usage_rows(user)
+            
             # Datos de uso del usuario por día (últimos 7 días)
-            timezone.now() - timedelta(days=7)
+            usage_by_day = {}
+            for row in usage_rows:
+                day_usage = usage_by_day.setdefault(row['day'], {'hours': 0, 'sessions': 0})
+                day_usage['hours'] += _to_hours(row['total_duration'])
+                day_usage['sessions'] += row['closed_sessions']
+            
+            today = timezone.localdate()
             daily_usage = []
             
             for i in range(7):
-                date = (timezone.now() - timedelta(days=i)).date()
-                entries = RoomEntry.objects.filter(
-                    user=user,
-                    entry_time__date=date,
-                    exit_time__isnull=False
-                )
-                
-                total_hours = 0
-                for entry in entries:
-                    duration = entry.exit_time - entry.entry_time
-                    total_hours += duration.total_seconds() / 3600
-                
+                date = today - timedelta(days=i)
+                day_usage = usage_by_day.get(date, {'hours': 0, 'sessions': 0})
                 daily_usage.append({
                     'date': date.isoformat(),
-                    'hours': round(total_hours, 1),
-                    'sessions': entries.count()
+                    'hours': round(day_usage['hours'], 1),
+                    'sessions': day_usage['sessions']
                 })
             
             return {
                 'daily_usage': daily_usage,
-                'room_usage': DashboardService._get_user_room_usage_data(user)
+                'room_usage': DashboardService._get_user_room_usage_data(user, usage_rows)
             }
             
         except Exception as e:
@@ -977,11 +1060,11 @@ class DashboardService:
         Obtener datos de ocupación de salas
         """
         try:
-            rooms = Room.objects.filter(is_active=True)
+            rooms = annotate_occupancy(Room.objects.filter(is_active=True))
             occupancy_data = []
             
             for room in rooms:
-                active_count = RoomEntry.objects.filter(room=room, exit_time__isnull=True).count()
+                active_count = room.active_occupants
                 occupancy_data.append({
                     'room_name': room.name,
                     'active_users': active_count,
@@ -996,31 +1079,29 @@ class DashboardService:
             return []
     
     @staticmethod
-    def _get_user_room_usage_data(user):
+    def _get_user_room_usage_data(user, usage_rows=None):
         """
-        Obtener datos de uso de salas del usuario
+        Obtener datos de uso de salas del usuario (últimos 30 días)
         """
         try:
-            # Entradas del usuario por sala (últimos 30 días)
-            thirty_days_ago = timezone.now() - timedelta(days=30)
-            room_usage = []
+            if usage_rows is None:
+                usage_rows = DashboardService._get_user_usage_rows(user)
             
-            entries_by_room = RoomEntry.objects.filter(
-                user=user,
-                entry_time__gte=thirty_days_ago
-            ).values('room__name').annotate(
-                total_sessions=Count('id'),
-                total_hours=Sum('exit_time' - 'entry_time')
-            )
+            # Entradas del usuario por sala
+            usage_by_room = {}
+            for row in usage_rows:
+                room_usage = usage_by_room.setdefault(row['room__name'], {'sessions': 0, 'hours': 0})
+                room_usage['sessions'] += row['total_sessions']
+                room_usage['hours'] += _to_hours(row['total_duration'])
             
-            for room_data in entries_by_room:
-                room_usage.append({
-                    'room_name': room_data['room__name'],
-                    'sessions': room_data['total_sessions'],
-                    'hours': round(room_data['total_hours'].total_seconds() / 3600, 1) if room_data['total_hours'] else 0
-                })
-            
-            return room_usage
+            return [
+                {
+                    'room_name': room_name,
+                    'sessions': room_usage['sessions'],
+                    'hours': round(room_usage['hours'], 1)
+                }
+                for room_name, room_usage in usage_by_room.items()
+            ]
             
         except Exception as e:
             logger.error(f"Error obteniendo datos de uso de salas: {e}")
@@ -0,0 +1,217 @@
+"""
+Tests para los agregados del DashboardService
+"""
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from dashboard.services import DashboardService
+from notifications.models import Notification
+from rooms.daily_usage import rebuild_daily_usage
+from rooms.filters import local_day_start
+from rooms.models import Room, RoomEntry
+
+User = get_user_model()
+
+
+class DashboardBaseTestCase(TestCase):
+    """Datos comunes: un admin, un monitor verificado, uno pendiente y dos salas"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin_dashboard',
+            identification='910000001',
+            email='admin_dashboard@test.com',
+            password='admin123',
+            role='admin',
+            is_verified=True
+        )
+        self.monitor = User.objects.create_user(
+            username='monitor_dashboard',
+            identification='910000002',
+            email='monitor_dashboard@test.com',
+            password='test123',
+            role='monitor',
+            is_verified=True
+        )
+        self.pending = User.objects.create_user(
+            username='monitor_pending',
+            identification='910000003',
+            email='monitor_pending@test.com',
+            password='test123',
+            role='monitor',
+            is_verified=False
+        )
+        self.room = Room.objects.create(name='Sala Dashboard', code='SD001', capacity=10)
+        self.other_room = Room.objects.create(name='Sala Dashboard 2', code='SD002', capacity=10)
+        Notification.objects.all().delete()
+
+    def create_entry(self, user, room, entry_time, minutes=None):
+        return RoomEntry.objects.create(
+            user=user,
+            room=room,
+            entry_time=entry_time,
+            exit_time=entry_time + timedelta(minutes=minutes) if minutes is not None else None
+        )
+
+
+class AdminDashboardStatsTest(DashboardBaseTestCase):
+    """Estadísticas del dashboard de administrador calculadas en la base de datos"""
+
+    def test_admin_stats_aggregates(self):
+        now = timezone.now()
+        self.create_entry(self.monitor, self.room, now - timedelta(days=3), 120)
+        self.create_entry(self.monitor, self.room, now - timedelta(days=4), 60)
+        self.create_entry(self.pending, self.other_room, now - timedelta(minutes=5))
+        Notification.objects.create(
+            user=self.admin,
+            notification_type='excessive_hours',
+            title='Exceso',
+            message='Exceso de horas'
+        )
+
+        stats = DashboardService.get_admin_dashboard_data(self.admin)['stats']
+
+        self.assertEqual(stats['total_users'], 3)
+        self.assertEqual(stats['total_monitors'], 2)
+        self.assertEqual(stats['verified_monitors'], 1)
+        self.assertEqual(stats['pending_verifications'], 1)
+        self.assertEqual(stats['total_rooms'], 2)
+        self.assertEqual(stats['active_entries'], 1)
+        self.assertEqual(stats['occupied_rooms'], 1)
+        self.assertEqual(stats['available_rooms'], 1)
+        self.assertAlmostEqual(stats['average_session_duration'], 1.5)
+        self.assertEqual(stats['unread_notifications'], 1)
+        self.assertEqual(stats['excessive_hours_alerts'], 1)
+        self.assertEqual(stats['critical_alerts'], 1)
+
+    def test_admin_stats_total_hours_today(self):
+        # Mediodía UTC: el día local coincide con el día UTC
+        midday = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        self.create_entry(self.monitor, self.room, midday, 90)
+        self.create_entry(self.monitor, self.room, midday - timedelta(days=1), 60)
+
+        stats = DashboardService.get_admin_dashboard_data(self.admin)['stats']
+
+        self.assertAlmostEqual(stats['total_hours_today'], 1.5)
+
+    def test_admin_stats_without_entries(self):
+        stats = DashboardService.get_admin_dashboard_data(self.admin)['stats']
+
+        self.assertEqual(stats['total_hours_today'], 0)
+        self.assertEqual(stats['average_session_duration'], 0)
+        self.assertEqual(stats['active_entries'], 0)
+
+
+class MonitorChartsTest(DashboardBaseTestCase):
+    """Gráficos del dashboard de monitor a partir de una consulta agrupada"""
+
+    def test_user_charts_group_by_room_and_day(self):
+        now = timezone.now()
+        self.create_entry(self.monitor, self.room, now - timedelta(days=1), 90)
+        self.create_entry(self.monitor, self.room, now - timedelta(days=1, hours=3), 30)
+        self.create_entry(self.monitor, self.other_room, now - timedelta(days=2), 60)
+        self.create_entry(self.monitor, self.other_room, now - timedelta(minutes=10))
+        self.create_entry(self.monitor, self.room, now - timedelta(days=20), 120)
+        self.create_entry(self.pending, self.room, now - timedelta(days=1), 60)
+
+        charts = DashboardService._get_user_charts_data(self.monitor)
+
+        room_usage = {row['room_name']: row for row in charts['room_usage']}
+        self.assertEqual(room_usage[self.room.name], {'room_name': self.room.name, 'sessions': 3, 'hours': 4.0})
+        self.assertEqual(room_usage[self.other_room.name], {'room_name': self.other_room.name, 'sessions': 2, 'hours': 1.0})
+
+        daily_usage = charts['daily_usage']
+        self.assertEqual(len(daily_usage), 7)
+        self.assertEqual(daily_usage[0]['date'], timezone.localdate().isoformat())
+        self.assertEqual(sum(day['sessions'] for day in daily_usage), 3)
+        self.assertAlmostEqual(sum(day['hours'] for day in daily_usage), 3.0)
+
+    def test_user_room_usage_without_entries(self):
+        self.assertEqual(DashboardService._get_user_room_usage_data(self.monitor), [])
+
+
+class UsageSeriesTest(DashboardBaseTestCase):
+    """Serie de uso agrupada por hora, día o semana"""
+
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.localdate()
+        # 10:00 locales de ayer
+        self.yesterday_10 = local_day_start(self.today - timedelta(days=1)) + timedelta(hours=10)
+        self.create_entry(self.monitor, self.room, self.yesterday_10, 90)
+        self.create_entry(self.monitor, self.room, self.yesterday_10 + timedelta(minutes=30), 30)
+        self.create_entry(self.pending, self.other_room, self.yesterday_10 - timedelta(days=2), 60)
+        self.create_entry(self.monitor, self.room, timezone.now())
+        rebuild_daily_usage()
+
+    def test_daily_series_is_dense_and_ascending(self):
+        series = DashboardService.get_usage_series(self.today - timedelta(days=6), self.today)
+
+        self.assertEqual(len(series), 7)
+        self.assertEqual(series[-1]['bucket'], self.today.isoformat())
+        by_bucket = {point['bucket']: point for point in series}
+        yesterday = by_bucket[(self.today - timedelta(days=1)).isoformat()]
+        self.assertEqual(yesterday['hours'], 2.0)
+        self.assertEqual(yesterday['sessions'], 2)
+        self.assertEqual(by_bucket[(self.today - timedelta(days=3)).isoformat()]['sessions'], 1)
+
+    def test_hourly_series_for_user(self):
+        day = self.today - timedelta(days=1)
+        series = DashboardService.get_usage_series(day, day, 'hour', user=self.monitor)
+
+        self.assertEqual(len(series), 24)
+        self.assertEqual(series[10]['hours'], 2.0)
+        self.assertEqual(series[10]['sessions'], 2)
+        self.assertEqual(sum(point['sessions'] for point in series), 2)
+
+    def test_weekly_series(self):
+        series = DashboardService.get_usage_series(self.today - timedelta(days=27), self.today, 'week')
+
+        self.assertEqual(sum(point['sessions'] for point in series), 3)
+        self.assertAlmostEqual(sum(point['hours'] for point in series), 3.0)
+
+    def test_invalid_granularity(self):
+        with self.assertRaises(ValueError):
+            DashboardService.get_usage_series(self.today, self.today, 'month')
+
+    def test_charts_daily_usage_starts_today(self):
+        daily_usage = DashboardService._get_charts_data()['daily_usage']
+
+        self.assertEqual(daily_usage[0]['date'], self.today.isoformat())
+        self.assertEqual(daily_usage[1]['hours'], 2.0)
+
+    def test_usage_series_view(self):
+        client = APIClient()
+        token = Token.objects.create(user=self.monitor)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        response = client.get(reverse('usage_series'), {'days': 30, 'user_id': self.pending.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['series']), 30)
+        # Un monitor solo ve su propio uso
+        self.assertEqual(sum(point['sessions'] for point in response.data['series']), 2)
+
+        response = client.get(reverse('usage_series'), {'granularity': 'month'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = client.get(reverse('usage_series'), {'days': 1000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_usage_series_view_invalid_user_id(self):
+        client = APIClient()
+        token = Token.objects.create(user=self.admin)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        response = client.get(reverse('usage_series'), {'user_id': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = client.get(reverse('usage_series'), {'user_id': self.monitor.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
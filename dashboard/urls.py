@@ -10,6 +10,7 @@ urlpatterns = [
     path('stats/', views.stats_view, name='stats'),
     path('alerts/', views.alerts_view, name='alerts'),
     path('charts/', views.charts_data_view, name='charts_data'),
+    path('charts/usage/', views.usage_series_view, name='usage_series'),
     
     # Vista administrativa
     path('admin/overview/', views.admin_overview_view, name='admin_overview'),
@@ -28,6 +29,7 @@ urlpatterns = [
     path('stats/', views.stats_view, name='stats'),
     path('alerts/', views.alerts_view, name='alerts'),
     path('charts/', views.charts_data_view, name='charts_data'),
+    path('charts/usage/', views.usage_series_view, name='usage_series'),
     
     # Vista administrativa
     path('admin/overview/', views.admin_overview_view, name='admin_overview'),
@@ -3,12 +3,18 @@ from rest_framework.decorators import api_view, permission_classes, authenticati
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.response import Response
 from users.permissions import IsVerifiedUser, IsAdminUser
-from .services import DashboardService
+from django.utils import timezone
+from datetime import timedelta
+from users.models import User
+from .services import DashboardService, USAGE_GRANULARITIES
 from .serializers import DashboardDataSerializer
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rango máximo (en días) de la serie de uso
+MAX_USAGE_SERIES_DAYS = 366
+
 
 @api_view(['GET'])
 @authentication_classes([TokenAuthentication])
@@ -400,3 +406,74 @@ def admin_overview_view(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+
+
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsVerifiedUser])
+def usage_series_view(request):
+    """
+    Serie de uso (horas y sesiones) por hora, día o semana para gráficos.
+    
+    Parámetros:
+    - granularity: hour | day | week (por defecto day)
+    - days: número de días hasta hoy (por defecto 7, máximo 366)
+    - user_id: solo administradores; los monitores ven únicamente su uso
+    """
+    try:
+        granularity = request.GET.get('granularity', 'day')
+        if granularity not in USAGE_GRANULARITIES:
+            return Response({
+                'success': False,
+                'error': f"Granularidad inválida. Opciones: {', '.join(USAGE_GRANULARITIES)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            days = int(request.GET.get('days', 7))
+        except ValueError:
+            days = 0
+        if not 1 <= days <= MAX_USAGE_SERIES_DAYS:
+            return Response({
+                'success': False,
+                'error': f'El parámetro days debe estar entre 1 y {MAX_USAGE_SERIES_DAYS}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        user = request.user
+        target_user = user
+        if user.is_admin:
+            target_user = None
+            user_id = request.GET.get('user_id')
+            if user_id:
+                try:
+                    user_id = int(user_id)
+                except ValueError:
+                    return Response({
+                        'success': False,
+                        'error': 'El parámetro user_id debe ser numérico'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                target_user = User.objects.filter(id=user_id).first()
+                if target_user is None:
+                    return Response({
+                        'success': False,
+                        'error': 'Usuario no encontrado'
+                    }, status=status.HTTP_404_NOT_FOUND)
+        
+        end_day = timezone.localdate()
+        start_day = end_day - timedelta(days=days - 1)
+        series = DashboardService.get_usage_series(start_day, end_day, granularity, target_user)
+        
+        return Response({
+            'success': True,
+            'granularity': granularity,
+            'from': start_day.isoformat(),
+            'to': end_day.isoformat(),
+            'series': series
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Error obteniendo serie de uso: {e}")
+        return Response({
+            'success': False,
+            'error': 'Error interno del servidor',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,106 @@
+"""
+Descarga de archivos guardados en el storage
+
+`file_download_response` no carga el archivo en memoria: lo entrega con
+FileResponse (que el servidor WSGI puede enviar con sendfile) o, para una
+petición Range, en bloques desde el byte pedido. Incluye ETag, de modo que
+una descarga repetida con If-None-Match recibe 304 sin cuerpo.
+"""
+import hashlib
+import re
+
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import parse_etags, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(field_file):
+    """ETag a partir del nombre, tamaño y fecha de modificación del archivo"""
+    storage = field_file.storage
+    parts = [field_file.name, str(storage.size(field_file.name))]
+    try:
+        parts.append(storage.get_modified_time(field_file.name).isoformat())
+    except NotImplementedError:
+        pass
+    return quote_etag(hashlib.md5(':'.join(parts).encode()).hexdigest())
+
+
+def parse_range(header, size):
+    """
+    (inicio, fin) inclusivos de un encabezado Range de un solo rango.
+    Retorna None si no hay rango utilizable (se envía el archivo completo)
+    y lanza ValueError si el rango no es satisfacible.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Sufijo: los últimos N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Rango vacío')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Rango fuera del archivo')
+    return start, end
+
+
+def _read_range(file, start, length, block_size=FileResponse.block_size):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(block_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def file_download_response(request, field_file, filename, content_type):
+    """
+    Respuesta de descarga para `field_file` (FieldFile) con soporte de
+    If-None-Match (304), Range/If-Range (206 o 416) y Content-Disposition.
+    """
+    storage = field_file.storage
+    size = storage.size(field_file.name)
+    etag = file_etag(field_file)
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            response['ETag'] = etag
+            return response
+
+    file = storage.open(field_file.name, 'rb')
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(file, start, end - start + 1), status=206, content_type=content_type
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    else:
+        response = FileResponse(file, as_attachment=True, filename=filename, content_type=content_type)
+        response['Content-Length'] = size
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
@@ -125,3 +125,19 @@ REST_FRAMEWORK = {
 # Media files configuration
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Bandeja de salida de notificaciones y correos (notifications.outbox).
+# En False los mensajes los entrega `python manage.py process_outbox`;
+# en True se entregan al encolarlos, dentro de la misma petición.
+OUTBOX_EAGER = env.bool('OUTBOX_EAGER', default=False)
+
+# Trabajos de exportación (export.runner). En False los genera
+# `python manage.py process_exports`; en True se generan al encolarlos.
+EXPORT_EAGER = env.bool('EXPORT_EAGER', default=False)
+# El worker y el servicio web ven el mismo almacenamiento de archivos (en
+# local, el mismo MEDIA_ROOT). Producción lo exige con un bucket S3.
+EXPORT_SHARED_STORAGE = True
+# Archivos de exportación reutilizables (export.cache): días sin uso y
+# tamaño total máximo antes de que `prune_exports` los borre.
+EXPORT_CACHE_TTL_DAYS = env.int('EXPORT_CACHE_TTL_DAYS', default=7)
+EXPORT_CACHE_MAX_MB = env.int('EXPORT_CACHE_MAX_MB', default=1024)
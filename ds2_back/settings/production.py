@@ -53,6 +53,25 @@ BREVO_API_KEY = env('BREVO_API_KEY', default='')
 PUBLIC_BASE_URL = env('PUBLIC_BASE_URL')
 FRONTEND_BASE_URL = env('FRONTEND_BASE_URL')
 
+# Archivos subidos y exportaciones en S3 (django-storages), compartidos entre
+# el servicio web y ds2-export-worker. Las credenciales se leen de
+# AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY.
+AWS_STORAGE_BUCKET_NAME = env('AWS_STORAGE_BUCKET_NAME', default='')
+if AWS_STORAGE_BUCKET_NAME:
+    AWS_S3_REGION_NAME = env('AWS_S3_REGION_NAME', default=None)
+    AWS_S3_ENDPOINT_URL = env('AWS_S3_ENDPOINT_URL', default=None)
+    AWS_DEFAULT_ACL = None
+    AWS_S3_FILE_OVERWRITE = False
+    STORAGES = {
+        'default': {'BACKEND': 'storages.backends.s3.S3Storage'},
+        'staticfiles': {'BACKEND': STATICFILES_STORAGE},
+    }
+    del STATICFILES_STORAGE
+
+# ds2-export-worker no comparte disco con el servicio web: sin bucket no puede
+# entregarle los archivos y `process_exports` se niega a arrancar.
+EXPORT_SHARED_STORAGE = bool(AWS_STORAGE_BUCKET_NAME)
+
 # Logging para producción
 LOGGING = {
     'version': 1,
@@ -24,6 +24,12 @@ EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 DEFAULT_FROM_EMAIL = 'Soporte DS2 <test@example.com>'
 BREVO_API_KEY = 'test-key'
 
+# Entregar la bandeja de salida al encolar (sin worker en los tests)
+OUTBOX_EAGER = True
+
+# Generar las exportaciones al encolarlas (sin worker en los tests)
+EXPORT_EAGER = True
+
 # URLs para tests
 PUBLIC_BASE_URL = "http://testserver"
 FRONTEND_BASE_URL = "http://testserver"
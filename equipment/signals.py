@@ -1,12 +1,9 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.conf import settings
-from django.core.mail import send_mail
 from .models import EquipmentReport
-from notifications.services import NotificationService
 from notifications.models import Notification
-from users.models import User
-from users.email_utils import send_email_unified
+from notifications.outbox import enqueue_email, enqueue_notification
+from notifications.recipients import AdminRecipientCache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,9 +18,9 @@ def notify_admins_on_equipment_report(sender, instance, created, **kwargs):
     if created:  # Solo cuando se crea un nuevo reporte
         try:
             # Obtener todos los administradores activos
-            admins = User.objects.filter(role='admin', is_active=True)
+            admins = AdminRecipientCache.get_admins()
             
-            if not admins.exists():
+            if not admins:
                 logger.warning("No hay administradores para notificar sobre reporte de equipo")
                 return
             
@@ -32,32 +29,26 @@ def notify_admins_on_equipment_report(sender, instance, created, **kwargs):
             reporter = instance.reported_by
             issue_description = instance.issue_description
             
-            # Crear notificaciones para cada administrador
-            for admin in admins:
-                # Crear notificación en el sistema
-                title = f"Reporte de Falla - {equipment.name}"
-                message = (
-                    f"El monitor {reporter.get_full_name()} reportó una falla en el equipo {equipment.name}.\n\n"
-                    f"🏢 Sala: {equipment.room.name}\n"
-                    f"🔧 Equipo: {equipment.name} ({equipment.serial_number})\n"
-                    f"👤 Reportado por: {reporter.get_full_name()}\n"
-                    f"📝 Descripción: {issue_description}\n"
-                    f"📅 Fecha: {instance.reported_date.strftime('%d/%m/%Y %H:%M')}"
-                )
-                
-                # Crear notificación
-                NotificationService.create_notification(
-                    user=admin,
-                    notification_type=Notification.EQUIPMENT_REPORT,
-                    title=title,
-                    message=message,
-                    related_object_id=instance.id
-                )
-                
-                # Enviar email de notificación
-                send_equipment_report_email(admin, instance)
+            title = f"Reporte de Falla - {equipment.name}"
+            message = (
+                f"El monitor {reporter.get_full_name()} reportó una falla en el equipo {equipment.name}.\n\n"
+                f"🏢 Sala: {equipment.room.name}\n"
+                f"🔧 Equipo: {equipment.name} ({equipment.serial_number})\n"
+                f"👤 Reportado por: {reporter.get_full_name()}\n"
+                f"📝 Descripción: {issue_description}\n"
+                f"📅 Fecha: {instance.reported_date.strftime('%d/%m/%Y %H:%M')}"
+            )
             
-            logger.info(f"Notificaciones de reporte de equipo enviadas para {equipment.name}")
+            # Encolar la notificación y el email para todos los administradores
+            enqueue_notification(
+                notification_type=Notification.EQUIPMENT_REPORT,
+                title=title,
+                message=message,
+                related_object_id=instance.id
+            )
+            enqueue_email(*build_equipment_report_email(instance))
+            
+            logger.info(f"Notificaciones de reporte de equipo encoladas para {equipment.name}")
             
         except Exception as e:
             logger.error(f"Error notificando reporte de equipo: {e}")
@@ -65,36 +56,46 @@ def notify_admins_on_equipment_report(sender, instance, created, **kwargs):
 
 def send_equipment_report_email(admin, equipment_report):
     """
-    Enviar email de notificación de reporte de equipo a administradores
+    Encolar email de notificación de reporte de equipo para un administrador
     """
     try:
-        equipment = equipment_report.equipment
-        reporter = equipment_report.reported_by
-        
-        subject = f'[DS2] Reporte de Falla - {equipment.name}'
-        
-        # Texto plano
-        text_message = (
-            f"REPORTE DE FALLA DE EQUIPO\n\n"
-            f"Se ha reportado una falla en el equipo {equipment.name}.\n\n"
-            f"DATOS DEL EQUIPO:\n"
-            f"• Equipo: {equipment.name}\n"
-            f"• Número de Serie: {equipment.serial_number}\n"
-            f"• Sala: {equipment.room.name}\n"
-            f"• Estado Actual: {equipment.get_status_display()}\n\n"
-            f"DATOS DEL REPORTE:\n"
-            f"• Reportado por: {reporter.get_full_name()}\n"
-            f"• Username: {reporter.username}\n"
-            f"• Email: {reporter.email}\n"
-            f"• Teléfono: {reporter.phone}\n"
-            f"• Fecha del reporte: {equipment_report.reported_date.strftime('%d/%m/%Y %H:%M')}\n\n"
-            f"DESCRIPCIÓN DEL PROBLEMA:\n"
-            f"{equipment_report.issue_description}\n\n"
-            f"Por favor, revise el reporte en el sistema DS2."
-        )
-        
-        # HTML con card profesional
-        html_message = f"""
+        enqueue_email(*build_equipment_report_email(equipment_report), to=admin.email)
+        logger.info(f"Email de reporte de equipo encolado para {admin.email}")
+    except Exception as e:
+        logger.error(f"Error encolando email de reporte de equipo: {e}")
+
+
+def build_equipment_report_email(equipment_report):
+    """
+    Asunto, texto plano y HTML del email de reporte de equipo
+    """
+    equipment = equipment_report.equipment
+    reporter = equipment_report.reported_by
+    
+    subject = f'[DS2] Reporte de Falla - {equipment.name}'
+    
+    # Texto plano
+    text_message = (
+        f"REPORTE DE FALLA DE EQUIPO\n\n"
+        f"Se ha reportado una falla en el equipo {equipment.name}.\n\n"
+        f"DATOS DEL EQUIPO:\n"
+        f"• Equipo: {equipment.name}\n"
+        f"• Número de Serie: {equipment.serial_number}\n"
+        f"• Sala: {equipment.room.name}\n"
+        f"• Estado Actual: {equipment.get_status_display()}\n\n"
+        f"DATOS DEL REPORTE:\n"
+        f"• Reportado por: {reporter.get_full_name()}\n"
+        f"• Username: {reporter.username}\n"
+        f"• Email: {reporter.email}\n"
+        f"• Teléfono: {reporter.phone}\n"
+        f"• Fecha del reporte: {equipment_report.reported_date.strftime('%d/%m/%Y %H:%M')}\n\n"
+        f"DESCRIPCIÓN DEL PROBLEMA:\n"
+        f"{equipment_report.issue_description}\n\n"
+        f"Por favor, revise el reporte en el sistema DS2."
+    )
+    
+    # HTML con card profesional
+    html_message = f"""
 <!doctype html>
 <html>
   <body style="font-family:Segoe UI,Arial,sans-serif;background:#f6f7f9;padding:24px;">
@@ -170,15 +171,4 @@ def send_equipment_report_email(admin, equipment_report):
   </body>
 </html>
 """
-        
-        send_email_unified(
-            to=admin.email,
-            subject=subject,
-            text_content=text_message,
-            html_content=html_message
-        )
-        
-        logger.info(f"Email de reporte de equipo enviado a {admin.email}")
-        
-    except Exception as e:
-        logger.error(f"Error enviando email de reporte de equipo: {e}")
+    return subject, text_message, html_message
@@ -0,0 +1,115 @@
+"""
+Reutilización de exportaciones ya generadas
+
+Cada ExportJob guarda una `content_key` de dos mitades:
+- parámetros de la exportación (tipo, formato, monitores, fechas y, en PDF,
+  el título que se imprime en el archivo);
+- versión de los datos involucrados (máximo updated_at y número de filas de
+  monitores, entradas, turnos e incapacidades).
+
+La vista guarda solo la primera mitad al crear el trabajo; el worker completa
+la segunda al generarlo (los datos que realmente se leyeron). Una solicitud
+nueva busca primero trabajos completados con los mismos parámetros (una
+consulta por índice) y solo si existe alguno calcula la versión de los datos.
+Si coincide y el archivo sigue en el almacenamiento, el nuevo trabajo apunta
+a ese archivo en lugar de generarlo otra vez.
+
+`python manage.py prune_exports` borra los archivos de exports/ no usados
+en EXPORT_CACHE_TTL_DAYS o que excedan EXPORT_CACHE_MAX_MB (los menos
+recientemente usados primero).
+"""
+import hashlib
+import json
+
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .loader import MonitorExportLoader
+from .models import ExportJob
+
+# Longitud de cada mitad de content_key (hex)
+KEY_PART_LENGTH = 32
+
+
+def _digest(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:KEY_PART_LENGTH]
+
+
+def data_version(monitor_ids=None, start_date=None, end_date=None):
+    """
+    Versión de los datos de una exportación: por cada conjunto, la última
+    modificación y el número de filas (este detecta también los borrados).
+    """
+    loader = MonitorExportLoader(monitor_ids, start_date, end_date)
+    version = []
+    for queryset in (
+        loader.get_monitors_queryset(),
+        loader.get_room_entries_queryset(),
+        loader.get_schedules_queryset(),
+        loader.get_incapacities_queryset(),
+    ):
+        stamp = queryset.order_by().aggregate(updated=Max('updated_at'), rows=Count('id'))
+        version.append([stamp['updated'].isoformat() if stamp['updated'] else None, stamp['rows']])
+    return version
+
+
+def export_params_key(export_type, format_type, title, monitor_ids=None, start_date=None, end_date=None):
+    """Primera mitad de la clave: parámetros que determinan el archivo"""
+    return _digest({
+        'export_type': export_type,
+        'format': format_type,
+        # El PDF imprime el título; el Excel no
+        'title': title if format_type == ExportJob.PDF else None,
+        'monitor_ids': sorted(int(monitor_id) for monitor_id in monitor_ids) if monitor_ids else None,
+        'start_date': start_date.isoformat() if start_date else None,
+        'end_date': end_date.isoformat() if end_date else None,
+    })
+
+
+def export_content_key(params_key, monitor_ids=None, start_date=None, end_date=None):
+    """Clave completa: parámetros + versión actual de los datos"""
+    return params_key + _digest(data_version(monitor_ids, start_date, end_date))
+
+
+def stamp_content_key(export_job):
+    """Completa la clave del trabajo con la versión de los datos que va a leer"""
+    export_job.content_key = export_content_key(
+        export_job.content_key[:KEY_PART_LENGTH], export_job.monitor_ids, export_job.start_date, export_job.end_date
+    )
+    ExportJob.objects.filter(id=export_job.id).update(content_key=export_job.content_key)
+
+
+def find_cached_export(params_key, monitor_ids=None, start_date=None, end_date=None):
+    """
+    Último trabajo completado con los mismos parámetros y datos cuyo archivo
+    sigue existiendo. Sin candidatos no se calcula la versión de los datos.
+    """
+    candidates = list(ExportJob.objects.filter(
+        content_key__startswith=params_key, status=ExportJob.COMPLETED
+    ).exclude(file='').order_by('-completed_at')[:5])
+    if not candidates:
+        return None
+
+    content_key = export_content_key(params_key, monitor_ids, start_date, end_date)
+    for export_job in candidates:
+        if export_job.content_key == content_key and export_job.file.storage.exists(export_job.file.name):
+            return export_job
+    return None
+
+
+def reuse_export(export_job, cached_job):
+    """Completa `export_job` con el archivo de `cached_job`, sin regenerarlo"""
+    now = timezone.now()
+    export_job.content_key = cached_job.content_key
+    export_job.file = cached_job.file.name
+    export_job.file_size = cached_job.file_size
+    export_job.status = ExportJob.COMPLETED
+    export_job.progress = 100
+    export_job.started_at = now
+    export_job.completed_at = now
+    export_job.last_accessed_at = now
+    export_job.save(update_fields=[
+        'content_key', 'file', 'file_size', 'status', 'progress', 'started_at', 'completed_at', 'last_accessed_at'
+    ])
+    ExportJob.objects.filter(id=cached_job.id).update(last_accessed_at=now)
+    return export_job
@@ -0,0 +1,172 @@
+"""
+Carga de datos para las exportaciones de monitores
+
+MonitorExportLoader trae cada conjunto de datos (monitores, entradas a salas,
+turnos e incapacidades) con una sola consulta para todos los monitores, con
+sus salas en el mismo SELECT, y calcula las estadísticas en la base de datos
+(subconsultas agregadas sobre la consulta de monitores). Lo usan las
+exportaciones PDF/Excel (MonitorDataExporter) y el endpoint JSON de monitores.
+"""
+from collections import defaultdict
+
+from django.db.models import Count, DurationField, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from attendance.models import Incapacity
+from rooms.models import RoomDailyUsage, RoomEntry
+from schedule.models import Schedule
+from users.models import User
+
+
+def _per_user(queryset, aggregate, output_field=None):
+    """Subconsulta con el agregado del monitor externo (OuterRef('pk'))"""
+    value = queryset.filter(user=OuterRef('pk')).order_by().values('user').annotate(value=aggregate).values('value')
+    return Subquery(value, output_field=output_field)
+
+
+class MonitorExportLoader:
+    """
+    Datos de los monitores a exportar, agrupados por monitor.
+    Los filtros de fecha son los mismos de la exportación original.
+    """
+
+    def __init__(self, monitor_ids=None, start_date=None, end_date=None):
+        self.monitor_ids = monitor_ids
+        self.start_date = start_date
+        self.end_date = end_date
+        self._monitors_data = None
+
+    @classmethod
+    def for_job(cls, export_job):
+        return cls(export_job.monitor_ids, export_job.start_date, export_job.end_date)
+
+    def get_monitors_queryset(self):
+        """Obtiene el queryset de monitores según los filtros"""
+        queryset = User.objects.filter(role=User.MONITOR, is_verified=True)
+
+        # Filtrar por IDs específicos si se proporcionan
+        if self.monitor_ids:
+            queryset = queryset.filter(id__in=self.monitor_ids)
+
+        return queryset.order_by('first_name', 'last_name')
+
+    def _entries_filter(self):
+        date_filter = Q()
+        if self.start_date:
+            date_filter &= Q(entry_time__date__gte=self.start_date)
+        if self.end_date:
+            date_filter &= Q(entry_time__date__lte=self.end_date)
+        return date_filter
+
+    def _schedules_filter(self):
+        schedule_filter = Q()
+        if self.start_date:
+            schedule_filter &= Q(start_datetime__date__gte=self.start_date)
+        if self.end_date:
+            schedule_filter &= Q(start_datetime__date__lte=self.end_date)
+        return schedule_filter
+
+    def _incapacities_filter(self):
+        incapacity_filter = Q()
+        if self.start_date:
+            incapacity_filter &= Q(start_date__gte=self.start_date)
+        if self.end_date:
+            incapacity_filter &= Q(end_date__lte=self.end_date)
+        return incapacity_filter
+
+    def _monitor_order(self):
+        # Mismo orden que los monitores, para agrupar o recorrer en una pasada
+        return ['user__first_name', 'user__last_name', 'user_id']
+
+    def get_room_entries_queryset(self):
+        """Entradas de todos los monitores, con monitor y sala en el mismo SELECT"""
+        return RoomEntry.objects.filter(
+            self._entries_filter(), user__in=self.get_monitors_queryset().order_by()
+        ).select_related('user', 'room').order_by(*self._monitor_order(), '-entry_time')
+
+    def get_schedules_queryset(self):
+        """Turnos de todos los monitores, con monitor y sala en el mismo SELECT"""
+        return Schedule.objects.filter(
+            self._schedules_filter(), user__in=self.get_monitors_queryset().order_by()
+        ).select_related('user', 'room').order_by(*self._monitor_order(), '-start_datetime')
+
+    def get_incapacities_queryset(self):
+        """Incapacidades de todos los monitores"""
+        return Incapacity.objects.filter(
+            self._incapacities_filter(), user__in=self.get_monitors_queryset().order_by()
+        ).select_related('user').order_by(*self._monitor_order(), '-start_date')
+
+    def get_monitors_with_stats(self):
+        """
+        Monitores anotados con las estadísticas del período (una consulta):
+        export_total_entries, export_worked (duración de las entradas cerradas),
+        export_total_schedules y export_total_incapacities.
+        """
+        worked = ExpressionWrapper(F('exit_time') - F('entry_time'), output_field=DurationField())
+        return self.get_monitors_queryset().annotate(
+            export_total_entries=Coalesce(_per_user(RoomEntry.objects.filter(self._entries_filter()), Count('id')), 0),
+            export_worked=_per_user(
+                RoomEntry.objects.filter(self._entries_filter(), exit_time__isnull=False),
+                Sum(worked),
+                output_field=DurationField()
+            ),
+            export_total_schedules=Coalesce(_per_user(Schedule.objects.filter(self._schedules_filter()), Count('id')), 0),
+            export_total_incapacities=Coalesce(
+                _per_user(Incapacity.objects.filter(self._incapacities_filter()), Count('id')), 0
+            ),
+        )
+
+    @staticmethod
+    def get_stats(monitor):
+        """Estadísticas de un monitor de get_monitors_with_stats()"""
+        worked = monitor.export_worked
+        return {
+            'total_hours': round(worked.total_seconds() / 3600, 2) if worked else 0,
+            'total_entries': monitor.export_total_entries,
+            'total_schedules': monitor.export_total_schedules,
+            'total_incapacities': monitor.export_total_incapacities,
+        }
+
+    def load(self):
+        """
+        Lista con los datos de cada monitor, en el orden de los monitores:
+        {'monitor', 'room_entries', 'schedules', 'incapacities', 'stats'}.
+        Cuatro consultas en total, sin importar cuántos monitores haya.
+        """
+        if self._monitors_data is None:
+            grouped = {}
+            for name, queryset in (
+                ('room_entries', self.get_room_entries_queryset()),
+                ('schedules', self.get_schedules_queryset()),
+                ('incapacities', self.get_incapacities_queryset()),
+            ):
+                rows = defaultdict(list)
+                for row in queryset:
+                    rows[row.user_id].append(row)
+                grouped[name] = rows
+
+            self._monitors_data = [
+                {
+                    'monitor': monitor,
+                    'room_entries': grouped['room_entries'][monitor.id],
+                    'schedules': grouped['schedules'][monitor.id],
+                    'incapacities': grouped['incapacities'][monitor.id],
+                    'stats': self.get_stats(monitor),
+                }
+                for monitor in self.get_monitors_with_stats()
+            ]
+        return self._monitors_data
+
+    def get_summary_queryset(self):
+        """
+        Monitores para el endpoint JSON, con los totales históricos que
+        muestra MonitorExportSerializer calculados en la misma consulta.
+        """
+        return self.get_monitors_queryset().annotate(
+            export_total_entries=Coalesce(_per_user(RoomEntry.objects.all(), Count('id')), 0),
+            export_worked_seconds=Coalesce(
+                _per_user(RoomDailyUsage.objects.all(), Sum('worked_seconds'), output_field=IntegerField()), 0
+            ),
+            export_total_schedules=Coalesce(_per_user(Schedule.objects.all(), Count('id')), 0),
+            export_total_incapacities=Coalesce(_per_user(Incapacity.objects.all(), Count('id')), 0),
+        )
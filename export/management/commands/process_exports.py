@@ -0,0 +1,114 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+from export import pool
+from export.runner import WORKERS, claim_jobs, mark_job_failed, run_export_job
+
+
+class Command(BaseCommand):
+    help = 'Generar los trabajos de exportación pendientes en un pool de procesos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=WORKERS,
+            help=f'Procesos que generan exportaciones en paralelo (por defecto {WORKERS}; 1 = en este proceso)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Segundos de espera cuando no hay trabajos pendientes',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Generar los trabajos pendientes y terminar',
+        )
+
+    def create_executor(self, workers):
+        if workers <= 1:
+            return None
+        # Los procesos abren sus propias conexiones a la base de datos
+        connections.close_all()
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=pool.init_worker_process,
+        )
+
+    def submit(self, executor, job_id):
+        if executor is not None:
+            return executor.submit(pool.run_export_job, job_id)
+        future = Future()
+        try:
+            future.set_result(run_export_job(job_id))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def handle(self, *args, **options):
+        if not settings.EXPORT_SHARED_STORAGE:
+            # El servicio web no vería los archivos generados en el disco de este worker
+            raise CommandError(
+                'Sin almacenamiento compartido con el servicio web: configure AWS_STORAGE_BUCKET_NAME'
+            )
+
+        workers = max(options['workers'], 1)
+        totals = {'completed': 0, 'failed': 0}
+        executor = self.create_executor(workers)
+        running = {}
+        broken = False
+
+        try:
+            while True:
+                close_old_connections()
+                if broken and not running:
+                    # Pool roto: se reemplaza cuando terminaron todos sus trabajos
+                    executor.shutdown(wait=False)
+                    executor = self.create_executor(workers)
+                    broken = False
+
+                if not broken and len(running) < workers:
+                    for job_id in claim_jobs(workers - len(running)):
+                        running[self.submit(executor, job_id)] = job_id
+
+                if running:
+                    done, _ = wait(running, timeout=options['interval'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job_id = running.pop(future)
+                        try:
+                            _, success = future.result()
+                        except BrokenProcessPool:
+                            # Un proceso murió (p. ej. sin memoria): el trabajo no se reintenta
+                            broken = True
+                            mark_job_failed(job_id, 'El proceso de exportación terminó inesperadamente')
+                            success = False
+                        except Exception as e:
+                            # Error fuera de la generación (base de datos, trabajo borrado):
+                            # se marca fallido y el worker sigue con los demás
+                            mark_job_failed(job_id, str(e))
+                            success = False
+                        totals['completed' if success else 'failed'] += 1
+                        self.stdout.write(f"Exportación {job_id}: {'completada' if success else 'fallida'}")
+                    continue
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Exportaciones procesadas. Completadas: {totals['completed']} - Fallidas: {totals['failed']}"
+        ))
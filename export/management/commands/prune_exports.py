@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from export.models import ExportJob
+
+EXPORTS_DIR = 'exports'
+
+
+class Command(BaseCommand):
+    help = 'Borrar archivos de exportación sin uso reciente o que excedan el tamaño máximo (LRU)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ttl-days',
+            type=float,
+            default=settings.EXPORT_CACHE_TTL_DAYS,
+            help=f'Días sin uso tras los cuales se borra un archivo (por defecto {settings.EXPORT_CACHE_TTL_DAYS})',
+        )
+        parser.add_argument(
+            '--max-mb',
+            type=float,
+            default=settings.EXPORT_CACHE_MAX_MB,
+            help=f'Tamaño total máximo de exports/ en MB (por defecto {settings.EXPORT_CACHE_MAX_MB})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar qué se borraría sin borrar nada',
+        )
+
+    def list_files(self):
+        """{nombre: (tamaño, fecha de modificación)} de los archivos en exports/"""
+        try:
+            _, names = default_storage.listdir(EXPORTS_DIR)
+        except FileNotFoundError:
+            return {}
+        files = {}
+        for file_name in names:
+            name = f'{EXPORTS_DIR}/{file_name}'
+            files[name] = (default_storage.size(name), default_storage.get_modified_time(name))
+        return files
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        files = self.list_files()
+
+        # Último uso de cada archivo según los trabajos que lo referencian
+        last_used = dict(
+            ExportJob.objects.filter(file__in=list(files)).order_by().values('file').annotate(
+                used=Max(Coalesce('last_accessed_at', 'completed_at', 'created_at'))
+            ).values_list('file', 'used')
+        )
+
+        cutoff = now - timedelta(days=options['ttl_days'])
+        evict = []
+        kept = []
+        for name, (size, modified) in files.items():
+            used = last_used.get(name) or modified
+            if used < cutoff:
+                evict.append(name)
+            else:
+                kept.append((used, name, size))
+
+        # Por tamaño: se borran primero los menos recientemente usados
+        max_bytes = options['max_mb'] * 1024 * 1024
+        total = sum(size for _, _, size in kept)
+        for _, name, size in sorted(kept):
+            if total <= max_bytes:
+                break
+            evict.append(name)
+            total -= size
+
+        freed = sum(files[name][0] for name in evict)
+        if not options['dry_run']:
+            for name in evict:
+                default_storage.delete(name)
+            ExportJob.objects.filter(file__in=evict).update(file='', file_size=None)
+
+        verb = 'Se borrarían' if options['dry_run'] else 'Borrados'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(evict)} archivos ({freed / (1024 * 1024):.2f} MB). "
+            f"Quedan {len(files) - len(evict)} archivos"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('export', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='format',
+            field=models.CharField(choices=[('pdf', 'PDF'), ('excel', 'Excel'), ('csv', 'CSV'), ('ndjson', 'NDJSON (JSON por línea)')], help_text='Formato de archivo de exportación', max_length=10, verbose_name='Formato'),
+        ),
+    ]
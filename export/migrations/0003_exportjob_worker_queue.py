@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('export', '0002_add_stream_formats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Porcentaje de avance de la generación del archivo', verbose_name='Progreso'),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, help_text='Fecha y hora en que un worker tomó el trabajo', null=True, verbose_name='Iniciado en'),
+        ),
+        migrations.AddIndex(
+            model_name='exportjob',
+            index=models.Index(fields=['status', 'created_at'], name='exportjob_status_created_idx'),
+        ),
+    ]
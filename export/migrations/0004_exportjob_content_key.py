@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('export', '0003_exportjob_worker_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='content_key',
+            field=models.CharField(blank=True, db_index=True, help_text='Hash de los parámetros y de la versión de los datos (ver export.cache)', max_length=64, verbose_name='Clave de contenido'),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='last_accessed_at',
+            field=models.DateTimeField(blank=True, help_text='Última descarga o reutilización del archivo', null=True, verbose_name='Último uso'),
+        ),
+    ]
@@ -23,12 +23,23 @@ class ExportJob(models.Model):
     # Formatos de exportación
     PDF = 'pdf'
     EXCEL = 'excel'
+    CSV = 'csv'
+    NDJSON = 'ndjson'
     
     FORMAT_CHOICES = [
         (PDF, 'PDF'),
         (EXCEL, 'Excel'),
+        (CSV, 'CSV'),
+        (NDJSON, 'NDJSON (JSON por línea)'),
     ]
     
+    CONTENT_TYPES = {
+        PDF: 'application/pdf',
+        EXCEL: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        CSV: 'text/csv; charset=utf-8',
+        NDJSON: 'application/x-ndjson; charset=utf-8',
+    }
+    
     # Estados del trabajo
     PENDING = 'pending'
     PROCESSING = 'processing'
@@ -108,12 +119,36 @@ class ExportJob(models.Model):
     # Campos de auditoría
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Iniciado en",
+        help_text='Fecha y hora en que un worker tomó el trabajo'
+    )
     completed_at = models.DateTimeField(
         null=True,
         blank=True,
         verbose_name="Completado en",
         help_text='Fecha y hora de finalización del trabajo'
     )
+    content_key = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        verbose_name="Clave de contenido",
+        help_text='Hash de los parámetros y de la versión de los datos (ver export.cache)'
+    )
+    last_accessed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Último uso",
+        help_text='Última descarga o reutilización del archivo'
+    )
+    progress = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Progreso",
+        help_text='Porcentaje de avance de la generación del archivo'
+    )
     
     # Información adicional
     error_message = models.TextField(
@@ -133,6 +168,10 @@ class ExportJob(models.Model):
         verbose_name_plural = 'Trabajos de Exportación'
         ordering = ['-created_at']
         db_table = "export_exportjob"
+        indexes = [
+            # Cola de trabajos del worker (process_exports)
+            models.Index(fields=['status', 'created_at'], name='exportjob_status_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
@@ -140,17 +179,27 @@ class ExportJob(models.Model):
     def mark_as_processing(self):
         """Marca el trabajo como en procesamiento"""
         self.status = self.PROCESSING
-        self.save(update_fields=['status'])
+        self.started_at = timezone.now()
+        self.progress = 0
+        self.save(update_fields=['status', 'started_at', 'progress'])
+    
+    def set_progress(self, progress):
+        """Registra el porcentaje de avance (solo si cambió)"""
+        progress = max(0, min(int(progress), 100))
+        if progress != self.progress:
+            self.progress = progress
+            ExportJob.objects.filter(id=self.id).update(progress=progress)
     
     def mark_as_completed(self, file_path=None, file_size=None):
         """Marca el trabajo como completado"""
         self.status = self.COMPLETED
         self.completed_at = timezone.now()
+        self.progress = 100
         if file_path:
             self.file = file_path
         if file_size:
             self.file_size = file_size
-        self.save(update_fields=['status', 'completed_at', 'file', 'file_size'])
+        self.save(update_fields=['status', 'completed_at', 'progress', 'file', 'file_size'])
     
     def mark_as_failed(self, error_message):
         """Marca el trabajo como fallido"""
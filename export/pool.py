@@ -0,0 +1,18 @@
+"""
+Puntos de entrada de los procesos del pool de exportación
+
+Los procesos arrancan con spawn: este módulo no importa modelos al cargarse
+(se importa antes de django.setup()), solo dentro de las funciones.
+"""
+
+
+def init_worker_process():
+    """Inicializador de cada proceso: configura Django"""
+    import django
+    django.setup()
+
+
+def run_export_job(job_id):
+    """Genera un trabajo reclamado (ver export.runner.run_export_job)"""
+    from .runner import run_export_job as run
+    return run(job_id)
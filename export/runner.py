@@ -0,0 +1,99 @@
+"""
+Cola de trabajos de exportación
+
+La vista solo crea el ExportJob (PENDING) y llama a enqueue_export. El comando
+`python manage.py process_exports` reclama trabajos pendientes
+(SELECT ... FOR UPDATE SKIP LOCKED en PostgreSQL, así varios workers no toman
+el mismo), los marca PROCESSING y los genera en un pool de procesos, fuera de
+los procesos web y sin competir por el GIL.
+
+Un trabajo que queda PROCESSING más de LEASE_SECONDS (p. ej. el worker murió)
+vuelve a estar disponible.
+
+El worker guarda los archivos en el almacenamiento por defecto, que debe ser
+compartido con el servicio web (settings.EXPORT_SHARED_STORAGE; en producción
+un bucket S3). Con settings.EXPORT_EAGER (tests) el trabajo se genera al
+encolarlo.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import stamp_content_key
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+WORKERS = 2
+LEASE_SECONDS = 30 * 60
+
+
+def _is_eager():
+    return getattr(settings, 'EXPORT_EAGER', False)
+
+
+def enqueue_export(export_job):
+    """Deja el trabajo para el worker (o lo genera ya si EXPORT_EAGER)"""
+    if _is_eager():
+        export_job.mark_as_processing()
+        run_export_job(export_job.id)
+        export_job.refresh_from_db()
+    return export_job
+
+
+def claim_jobs(limit=WORKERS):
+    """
+    Reclama hasta `limit` trabajos pendientes (o vencidos) y los marca
+    PROCESSING. Retorna sus IDs.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            ExportJob.objects.select_for_update(skip_locked=True).filter(
+                Q(status=ExportJob.PENDING) |
+                Q(status=ExportJob.PROCESSING, started_at__lt=now - timedelta(seconds=LEASE_SECONDS))
+            ).order_by('created_at', 'id').values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            ExportJob.objects.filter(id__in=ids).update(status=ExportJob.PROCESSING, started_at=now, progress=0)
+    return ids
+
+
+def run_export_job(job_id):
+    """
+    Genera el archivo de un trabajo ya reclamado. Se ejecuta en un proceso
+    del pool (o en línea con un solo worker). Retorna (job_id, éxito).
+    """
+    from .services import MonitorDataExporter
+
+    try:
+        close_old_connections()
+        export_job = ExportJob.objects.get(id=job_id)
+        if export_job.content_key:
+            # Versión de los datos al momento de generarlo (ver export.cache)
+            stamp_content_key(export_job)
+        exporter = MonitorDataExporter(export_job)
+        if export_job.format == ExportJob.PDF:
+            success = exporter.export_to_pdf()
+        elif export_job.format == ExportJob.EXCEL:
+            success = exporter.export_to_excel()
+        else:
+            export_job.mark_as_failed(f'Formato no soportado para esta exportación: {export_job.format}')
+            success = False
+    except Exception as e:
+        logger.error(f"Error generando la exportación {job_id}: {e}")
+        mark_job_failed(job_id, str(e))
+        success = False
+    return job_id, success
+
+
+def mark_job_failed(job_id, error_message):
+    """Marca un trabajo como fallido sin propagar errores (p. ej. si ya no existe)"""
+    try:
+        ExportJob.objects.get(id=job_id).mark_as_failed(error_message)
+    except Exception as e:
+        logger.error(f"No se pudo marcar como fallida la exportación {job_id}: {e}")
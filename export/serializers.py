@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.db.models import Sum
 from .models import ExportJob
 from users.models import User
 from rooms.models import RoomEntry
@@ -23,11 +24,11 @@ class ExportJobSerializer(serializers.ModelSerializer):
             'id', 'title', 'export_type', 'export_type_display', 'format', 'format_display',
             'status', 'status_display', 'start_date', 'end_date', 'monitor_ids',
             'file', 'file_url', 'file_size', 'file_size_mb', 'requested_by', 'requested_by_name',
-            'created_at', 'updated_at', 'completed_at', 'error_message'
+            'created_at', 'updated_at', 'started_at', 'completed_at', 'progress', 'error_message'
         ]
         read_only_fields = [
             'id', 'status', 'file', 'file_size', 'requested_by', 'created_at', 
-            'updated_at', 'completed_at', 'error_message'
+            'updated_at', 'started_at', 'completed_at', 'progress', 'error_message'
         ]
     
     def get_file_url(self, obj):
@@ -70,25 +71,33 @@ class MonitorExportSerializer(serializers.ModelSerializer):
         """Convierte el booleano a texto"""
         return "Sí" if obj.is_verified else "No"
     
+    # Los totales vienen anotados por MonitorExportLoader.get_summary_queryset();
+    # sin la anotación se consultan por monitor
+    
     def get_total_room_entries(self, obj):
         """Cuenta el total de entradas a salas"""
+        if hasattr(obj, 'export_total_entries'):
+            return obj.export_total_entries
         return obj.room_entries.count()
     
     def get_total_hours_worked(self, obj):
-        """Calcula el total de horas trabajadas"""
-        entries = obj.room_entries.filter(exit_time__isnull=False)
-        total_hours = 0
-        for entry in entries:
-            if entry.duration_hours:
-                total_hours += entry.duration_hours
-        return round(total_hours, 2)
+        """Calcula el total de horas trabajadas (desde el resumen diario de uso)"""
+        if hasattr(obj, 'export_worked_seconds'):
+            worked_seconds = obj.export_worked_seconds
+        else:
+            worked_seconds = obj.daily_usage.aggregate(total=Sum('worked_seconds'))['total'] or 0
+        return round(worked_seconds / 3600, 2)
     
     def get_total_schedules(self, obj):
         """Cuenta el total de turnos asignados"""
+        if hasattr(obj, 'export_total_schedules'):
+            return obj.export_total_schedules
         return obj.schedules.count()
     
     def get_total_incapacities(self, obj):
         """Cuenta el total de incapacidades"""
+        if hasattr(obj, 'export_total_incapacities'):
+            return obj.export_total_incapacities
         return obj.incapacities.count()
 
 
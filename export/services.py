@@ -3,7 +3,6 @@ import tempfile
 from io import BytesIO
 from datetime import datetime, date
 from django.conf import settings
-from django.db.models import Q, Sum, Count
 from django.utils import timezone
 from django.core.files import File
 from reportlab.lib import colors
@@ -12,14 +11,15 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from users.models import User
+import xlsxwriter
 from rooms.models import RoomEntry
 from attendance.models import Attendance, Incapacity
 from schedule.models import Schedule
 from .models import ExportJob
+from .loader import MonitorExportLoader
+
+# Filas por bloque al recorrer los querysets de la exportación con .iterator()
+EXPORT_CHUNK_SIZE = 2000
 
 
 class MonitorDataExporter:
@@ -32,65 +32,19 @@ class MonitorDataExporter:
         self.monitor_ids = export_job.monitor_ids
         self.start_date = export_job.start_date
         self.end_date = export_job.end_date
+        self.loader = MonitorExportLoader.for_job(export_job)
     
     def get_monitors_queryset(self):
         """Obtiene el queryset de monitores según los filtros"""
-        queryset = User.objects.filter(role=User.MONITOR, is_verified=True)
-        
-        # Filtrar por IDs específicos si se proporcionan
-        if self.monitor_ids:
-            queryset = queryset.filter(id__in=self.monitor_ids)
-        
-        return queryset.order_by('first_name', 'last_name')
+        return self.loader.get_monitors_queryset()
+    
+    def get_monitors_data(self):
+        """Datos de todos los monitores (ver MonitorExportLoader.load)"""
+        return self.loader.load()
     
     def get_monitor_data(self, monitor):
         """Obtiene todos los datos relacionados con un monitor"""
-        # Filtrar por fechas si se proporcionan
-        date_filter = Q()
-        if self.start_date:
-            date_filter &= Q(entry_time__date__gte=self.start_date)
-        if self.end_date:
-            date_filter &= Q(entry_time__date__lte=self.end_date)
-        
-        # Datos de entradas a salas
-        room_entries = monitor.room_entries.filter(date_filter).order_by('-entry_time')
-        
-        # Datos de turnos
-        schedule_filter = Q()
-        if self.start_date:
-            schedule_filter &= Q(start_datetime__date__gte=self.start_date)
-        if self.end_date:
-            schedule_filter &= Q(start_datetime__date__lte=self.end_date)
-        
-        schedules = monitor.schedules.filter(schedule_filter).order_by('-start_datetime')
-        
-        # Datos de incapacidades
-        incapacity_filter = Q()
-        if self.start_date:
-            incapacity_filter &= Q(start_date__gte=self.start_date)
-        if self.end_date:
-            incapacity_filter &= Q(end_date__lte=self.end_date)
-        
-        incapacities = monitor.incapacities.filter(incapacity_filter).order_by('-start_date')
-        
-        # Estadísticas
-        total_hours = sum([entry.duration_hours for entry in room_entries if entry.duration_hours])
-        total_entries = room_entries.count()
-        total_schedules = schedules.count()
-        total_incapacities = incapacities.count()
-        
-        return {
-            'monitor': monitor,
-            'room_entries': room_entries,
-            'schedules': schedules,
-            'incapacities': incapacities,
-            'stats': {
-                'total_hours': round(total_hours, 2),
-                'total_entries': total_entries,
-                'total_schedules': total_schedules,
-                'total_incapacities': total_incapacities
-            }
-        }
+        return next(data for data in self.get_monitors_data() if data['monitor'].id == monitor.id)
     
     def export_to_pdf(self):
         """Exporta los datos a PDF usando BytesIO para evitar WinError 32"""
@@ -129,7 +83,7 @@ class MonitorDataExporter:
                 ['Fecha de generación:', datetime.now().strftime('%d/%m/%Y %H:%M')],
                 ['Período:', f"{self.start_date or 'Sin límite'} - {self.end_date or 'Sin límite'}"],
                 ['Formato:', 'PDF'],
-                ['Total de monitores:', str(self.get_monitors_queryset().count())]
+                ['Total de monitores:', str(len(self.get_monitors_data()))]
             ]
             
             info_table = Table(report_info, colWidths=[2*inch, 3*inch])
@@ -146,12 +100,13 @@ class MonitorDataExporter:
             story.append(Spacer(1, 30))
             
             # Datos de cada monitor
-            monitors = self.get_monitors_queryset()
-            for i, monitor in enumerate(monitors):
+            monitors_data = self.get_monitors_data()
+            for i, monitor_data in enumerate(monitors_data):
                 if i > 0:
                     story.append(PageBreak())
+                self.export_job.set_progress(90 * i / len(monitors_data))
                 
-                monitor_data = self.get_monitor_data(monitor)
+                monitor = monitor_data['monitor']
                 
                 # Información del monitor
                 monitor_title = Paragraph(f"Monitor: {monitor.get_full_name()}", heading_style)
@@ -264,147 +219,124 @@ class MonitorDataExporter:
             self.export_job.mark_as_failed(str(e))
             return False
     
-    def export_to_excel(self):
-        """Exporta los datos a Excel usando BytesIO para evitar WinError 32"""
-        try:
-            # Crear workbook
-            wb = openpyxl.Workbook()
-            
-            # Estilos
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-            
-            # Hoja de resumen
-            ws_summary = wb.active
-            ws_summary.title = "Resumen de Monitores"
-            
-            # Encabezados del resumen
-            summary_headers = [
-                'ID', 'Nombre Completo', 'Identificación', 'Email', 'Teléfono',
-                'Verificado', 'Total Horas', 'Total Entradas', 'Total Turnos', 'Total Incapacidades',
-                'Fecha Registro'
+    def get_export_file_name(self, extension):
+        """Nombre del archivo de la exportación dentro del almacenamiento (exports/)"""
+        return f"exports/monitors_export_{self.export_job.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    
+    def get_summary_rows(self):
+        """Filas de la hoja de resumen, leídas por bloques del cursor"""
+        for monitor in self.loader.get_monitors_with_stats().iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            stats = self.loader.get_stats(monitor)
+            yield [
+                monitor.id,
+                monitor.get_full_name(),
+                monitor.identification,
+                monitor.email,
+                monitor.phone or 'No registrado',
+                'Sí' if monitor.is_verified else 'No',
+                stats['total_hours'],
+                stats['total_entries'],
+                stats['total_schedules'],
+                stats['total_incapacities'],
+                monitor.created_at.strftime('%d/%m/%Y %H:%M'),
             ]
-            
-            for col, header in enumerate(summary_headers, 1):
-                cell = ws_summary.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-            
-            # Datos del resumen
-            monitors = self.get_monitors_queryset()
-            for row, monitor in enumerate(monitors, 2):
-                monitor_data = self.get_monitor_data(monitor)
-                
-                ws_summary.cell(row=row, column=1, value=monitor.id)
-                ws_summary.cell(row=row, column=2, value=monitor.get_full_name())
-                ws_summary.cell(row=row, column=3, value=monitor.identification)
-                ws_summary.cell(row=row, column=4, value=monitor.email)
-                ws_summary.cell(row=row, column=5, value=monitor.phone or 'No registrado')
-                ws_summary.cell(row=row, column=6, value='Sí' if monitor.is_verified else 'No')
-                ws_summary.cell(row=row, column=7, value=monitor_data['stats']['total_hours'])
-                ws_summary.cell(row=row, column=8, value=monitor_data['stats']['total_entries'])
-                ws_summary.cell(row=row, column=9, value=monitor_data['stats']['total_schedules'])
-                ws_summary.cell(row=row, column=10, value=monitor_data['stats']['total_incapacities'])
-                ws_summary.cell(row=row, column=11, value=monitor.created_at.strftime('%d/%m/%Y %H:%M'))
-            
-            # Ajustar ancho de columnas
-            for col in range(1, len(summary_headers) + 1):
-                ws_summary.column_dimensions[get_column_letter(col)].width = 15
-            
-            # Hoja de entradas a salas
-            ws_entries = wb.create_sheet("Entradas a Salas")
-            
-            entries_headers = [
-                'ID Monitor', 'Monitor', 'Sala', 'Fecha Entrada', 'Fecha Salida',
-                'Duración (h)', 'Activo', 'Notas'
+    
+    def get_room_entry_rows(self):
+        """Filas de la hoja de entradas a salas, leídas por bloques del cursor"""
+        for entry in self.loader.get_room_entries_queryset().iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield [
+                entry.user.id,
+                entry.user.get_full_name(),
+                entry.room.name,
+                entry.entry_time.strftime('%d/%m/%Y %H:%M'),
+                entry.exit_time.strftime('%d/%m/%Y %H:%M') if entry.exit_time else 'En sala',
+                entry.duration_hours if entry.duration_hours else 0,
+                'Sí' if entry.active else 'No',
+                entry.notes,
             ]
-            
-            for col, header in enumerate(entries_headers, 1):
-                cell = ws_entries.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-            
-            # Datos de entradas
-            row = 2
-            for monitor in monitors:
-                monitor_data = self.get_monitor_data(monitor)
-                for entry in monitor_data['room_entries']:
-                    ws_entries.cell(row=row, column=1, value=monitor.id)
-                    ws_entries.cell(row=row, column=2, value=monitor.get_full_name())
-                    ws_entries.cell(row=row, column=3, value=entry.room.name)
-                    ws_entries.cell(row=row, column=4, value=entry.entry_time.strftime('%d/%m/%Y %H:%M'))
-                    ws_entries.cell(row=row, column=5, value=entry.exit_time.strftime('%d/%m/%Y %H:%M') if entry.exit_time else 'En sala')
-                    ws_entries.cell(row=row, column=6, value=entry.duration_hours if entry.duration_hours else 0)
-                    ws_entries.cell(row=row, column=7, value='Sí' if entry.active else 'No')
-                    ws_entries.cell(row=row, column=8, value=entry.notes)
-                    row += 1
-            
-            # Ajustar ancho de columnas
-            for col in range(1, len(entries_headers) + 1):
-                ws_entries.column_dimensions[get_column_letter(col)].width = 20
-            
-            # Hoja de turnos
-            ws_schedules = wb.create_sheet("Turnos")
-            
-            schedules_headers = [
-                'ID Monitor', 'Monitor', 'Sala', 'Fecha Inicio', 'Fecha Fin',
-                'Duración (h)', 'Estado', 'Recurrente', 'Notas'
+    
+    def get_schedule_rows(self):
+        """Filas de la hoja de turnos, leídas por bloques del cursor"""
+        for schedule in self.loader.get_schedules_queryset().iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield [
+                schedule.user.id,
+                schedule.user.get_full_name(),
+                schedule.room.name,
+                schedule.start_datetime.strftime('%d/%m/%Y %H:%M'),
+                schedule.end_datetime.strftime('%d/%m/%Y %H:%M'),
+                schedule.duration_hours,
+                schedule.get_status_display(),
+                'Sí' if schedule.recurring else 'No',
+                schedule.notes,
+            ]
+    
+    def export_to_excel(self):
+        """
+        Exporta los datos a Excel en streaming: las filas se leen del cursor por
+        bloques y xlsxwriter (constant_memory) las escribe a un archivo temporal
+        local, que luego se sube al almacenamiento de archivos (compartido con
+        el servicio web). La memoria usada no depende del número de filas.
+        """
+        temp_path = None
+        try:
+            temp_dir = settings.FILE_UPLOAD_TEMP_DIR
+            fd, temp_path = tempfile.mkstemp(suffix='.xlsx.part', dir=temp_dir)
+            os.close(fd)
+            
+            workbook = xlsxwriter.Workbook(temp_path, {
+                'constant_memory': True,
+                'tmpdir': temp_dir,
+                # Las notas se escriben tal cual, aunque parezcan fórmulas o URLs
+                'strings_to_formulas': False,
+                'strings_to_urls': False,
+            })
+            header_format = workbook.add_format({
+                'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#366092',
+                'align': 'center', 'valign': 'vcenter',
+            })
+            
+            sheets = [
+                ("Resumen de Monitores", [
+                    'ID', 'Nombre Completo', 'Identificación', 'Email', 'Teléfono',
+                    'Verificado', 'Total Horas', 'Total Entradas', 'Total Turnos', 'Total Incapacidades',
+                    'Fecha Registro'
+                ], 15, self.get_summary_rows()),
+                ("Entradas a Salas", [
+                    'ID Monitor', 'Monitor', 'Sala', 'Fecha Entrada', 'Fecha Salida',
+                    'Duración (h)', 'Activo', 'Notas'
+                ], 20, self.get_room_entry_rows()),
+                ("Turnos", [
+                    'ID Monitor', 'Monitor', 'Sala', 'Fecha Inicio', 'Fecha Fin',
+                    'Duración (h)', 'Estado', 'Recurrente', 'Notas'
+                ], 20, self.get_schedule_rows()),
             ]
             
-            for col, header in enumerate(schedules_headers, 1):
-                cell = ws_schedules.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-            
-            # Datos de turnos
-            row = 2
-            for monitor in monitors:
-                monitor_data = self.get_monitor_data(monitor)
-                for schedule in monitor_data['schedules']:
-                    ws_schedules.cell(row=row, column=1, value=monitor.id)
-                    ws_schedules.cell(row=row, column=2, value=monitor.get_full_name())
-                    ws_schedules.cell(row=row, column=3, value=schedule.room.name)
-                    ws_schedules.cell(row=row, column=4, value=schedule.start_datetime.strftime('%d/%m/%Y %H:%M'))
-                    ws_schedules.cell(row=row, column=5, value=schedule.end_datetime.strftime('%d/%m/%Y %H:%M'))
-                    ws_schedules.cell(row=row, column=6, value=schedule.duration_hours)
-                    ws_schedules.cell(row=row, column=7, value=schedule.get_status_display())
-                    ws_schedules.cell(row=row, column=8, value='Sí' if schedule.recurring else 'No')
-                    ws_schedules.cell(row=row, column=9, value=schedule.notes)
-                    row += 1
-            
-            # Ajustar ancho de columnas
-            for col in range(1, len(schedules_headers) + 1):
-                ws_schedules.column_dimensions[get_column_letter(col)].width = 20
-            
-            # Guardar en buffer de memoria
-            buffer = BytesIO()
-            wb.save(buffer)
-            
-            # Obtener contenido del buffer
-            buffer.seek(0)
-            excel_content = buffer.getvalue()
-            file_size = len(excel_content)
+            # En constant_memory cada fila se escribe en orden y se descarta
+            for sheet_number, (title, headers, width, rows) in enumerate(sheets):
+                worksheet = workbook.add_worksheet(title)
+                worksheet.set_column(0, len(headers) - 1, width)
+                worksheet.write_row(0, 0, headers, header_format)
+                for row, values in enumerate(rows, 1):
+                    worksheet.write_row(row, 0, values)
+                self.export_job.set_progress(90 * (sheet_number + 1) / len(sheets))
             
-            # Guardar archivo en el modelo usando BytesIO
-            django_file = File(BytesIO(excel_content))
-            self.export_job.file.save(
-                f"monitors_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                django_file,
-                save=True
-            )
+            workbook.close()
             
-            # Cerrar buffer
-            buffer.close()
+            # Subir el archivo por bloques al almacenamiento
+            storage = self.export_job.file.storage
+            file_size = os.path.getsize(temp_path)
+            with open(temp_path, 'rb') as temp_file:
+                name = storage.save(self.get_export_file_name('xlsx'), File(temp_file))
             
             # Marcar como completado
-            self.export_job.mark_as_completed(file_size=file_size)
+            self.export_job.mark_as_completed(file_path=name, file_size=file_size)
             
             return True
             
         except Exception as e:
             self.export_job.mark_as_failed(str(e))
             return False
+        
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
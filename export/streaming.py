@@ -0,0 +1,116 @@
+"""
+Exportación en streaming (CSV y NDJSON)
+
+Los endpoints de datos aceptan ?format=csv / ?format=ndjson (o el Accept
+equivalente). Las filas se leen del cursor por bloques (.iterator()), se
+serializan una a una y se envían con StreamingHttpResponse, de modo que la
+memoria no depende del número de filas y el primer byte sale enseguida.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+from .models import ExportJob
+
+# Filas por bloque leído del cursor y por fragmento enviado al cliente
+STREAM_CHUNK_SIZE = 1000
+
+
+class CSVStreamRenderer(BaseRenderer):
+    """
+    Habilita ?format=csv en la negociación de DRF. Los datos se envían con
+    streaming_export_response; este renderer solo se usa para las
+    respuestas normales (p. ej. errores de validación).
+    """
+    media_type = 'text/csv'
+    format = ExportJob.CSV
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(_csv_lines(list(rows[0].keys()) if rows else [], rows)).encode(self.charset)
+
+
+class NDJSONStreamRenderer(BaseRenderer):
+    """Habilita ?format=ndjson (un objeto JSON por línea)"""
+    media_type = 'application/x-ndjson'
+    format = ExportJob.NDJSON
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(_ndjson_line(row) for row in rows).encode(self.charset)
+
+
+STREAM_RENDERERS = [CSVStreamRenderer, NDJSONStreamRenderer]
+
+
+class _Echo:
+    """Buffer mínimo para csv.writer: write() retorna la línea escrita"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(fields, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row.get(field) for field in fields])
+
+
+def _ndjson_line(row):
+    return json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def _chunked(lines, size=STREAM_CHUNK_SIZE):
+    """
+    Agrupa líneas en fragmentos para no enviar uno por fila. La primera
+    línea sale sola para que el cliente reciba el primer byte enseguida.
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return
+    yield first
+
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def serialize_rows(queryset, serializer_class, context=None):
+    """Serializa el queryset fila a fila, leyendo el cursor por bloques"""
+    serializer = serializer_class(context=context or {})
+    for obj in queryset.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        yield serializer.to_representation(obj)
+
+
+def streaming_export_response(queryset, serializer_class, export_format, filename, context=None):
+    """
+    StreamingHttpResponse con el queryset en CSV (columnas = campos del
+    serializer) o NDJSON, como archivo adjunto `filename`.<formato>.
+    """
+    rows = serialize_rows(queryset, serializer_class, context)
+
+    if export_format == ExportJob.CSV:
+        lines = _csv_lines(list(serializer_class.Meta.fields), rows)
+    else:
+        lines = (_ndjson_line(row) for row in rows)
+
+    response = StreamingHttpResponse(_chunked(lines), content_type=ExportJob.CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
@@ -0,0 +1 @@
+# Marca el directorio de tests del app como paquete para discovery.
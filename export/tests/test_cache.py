@@ -0,0 +1,152 @@
+"""
+Tests para la reutilización de exportaciones y la limpieza de media/exports
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from export.cache import export_params_key
+from export.models import ExportJob
+from rooms.tests.test_reports import ReportsBaseTestCase
+
+
+class ExportCacheTest(ReportsBaseTestCase):
+    """Misma exportación con los mismos datos: se reutiliza el archivo"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.create_entry(self.monitor, self.room, 0, 60)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        self.params = {'format': 'excel', 'monitor_ids': [self.other_monitor.id, self.monitor.id]}
+
+    def export(self, **params):
+        return self.client.post('/api/export/monitors/export/', dict(self.params, **params), format='json')
+
+    def test_repeated_export_reuses_file(self):
+        first = self.export()
+        self.assertFalse(first.data['cached'])
+
+        with mock.patch('export.views.enqueue_export') as enqueue:
+            second = self.export(monitor_ids=[self.monitor.id, self.other_monitor.id])
+
+        enqueue.assert_not_called()
+        self.assertEqual(second.status_code, 200)
+        self.assertTrue(second.data['cached'])
+        first_job = ExportJob.objects.get(id=first.data['export_job_id'])
+        second_job = ExportJob.objects.get(id=second.data['export_job_id'])
+        self.assertEqual(second_job.status, ExportJob.COMPLETED)
+        self.assertEqual(second_job.file.name, first_job.file.name)
+        self.assertEqual(second_job.content_key, first_job.content_key)
+        self.assertIsNotNone(ExportJob.objects.get(id=first_job.id).last_accessed_at)
+
+    def test_changed_data_or_params_regenerate(self):
+        first = ExportJob.objects.get(id=self.export().data['export_job_id'])
+
+        self.assertFalse(self.export(format='pdf').data['cached'])
+
+        self.create_entry(self.monitor, self.other_room, 120, 30)
+        response = self.export()
+        self.assertFalse(response.data['cached'])
+        self.assertNotEqual(ExportJob.objects.get(id=response.data['export_job_id']).content_key, first.content_key)
+
+    def test_missing_file_is_not_reused(self):
+        first = ExportJob.objects.get(id=self.export().data['export_job_id'])
+        os.remove(first.file.path)
+
+        response = self.export()
+
+        self.assertFalse(response.data['cached'])
+        download = self.client.get(f'/api/export/jobs/{first.id}/download/')
+        self.assertEqual(download.status_code, 404)
+
+    def test_pdf_title_is_part_of_key(self):
+        self.export(format='pdf', title='Informe A')
+
+        self.assertTrue(self.export(format='pdf', title='Informe A').data['cached'])
+        self.assertFalse(self.export(format='pdf', title='Informe B').data['cached'])
+        # El Excel no imprime el título
+        self.export(title='Informe A')
+        self.assertTrue(self.export(title='Informe B').data['cached'])
+
+    def test_data_version_only_computed_with_candidates(self):
+        with mock.patch('export.cache.data_version', return_value=[]) as version:
+            self.export(format='pdf', title='Nuevo')
+        # Sin trabajos previos con esos parámetros: solo lo calcula el worker
+        self.assertEqual(version.call_count, 1)
+
+    def test_invalid_monitor_ids_returns_400(self):
+        for monitor_ids in (['abc'], 'abc', [None]):
+            response = self.export(monitor_ids=monitor_ids)
+            self.assertEqual(response.status_code, 400)
+
+    def test_key_ignores_monitor_order(self):
+        self.assertEqual(
+            export_params_key(ExportJob.MONITORS_DATA, ExportJob.PDF, 'T', [2, 1]),
+            export_params_key(ExportJob.MONITORS_DATA, ExportJob.PDF, 'T', ['1', 2])
+        )
+
+
+class PruneExportsTest(ReportsBaseTestCase):
+    """Borrado por antigüedad de uso y por tamaño total (LRU)"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_export(self, name, size_kb, used_days_ago):
+        default_storage.save(f'exports/{name}', ContentFile(b'x' * size_kb * 1024))
+        return ExportJob.objects.create(
+            title=name, export_type=ExportJob.MONITORS_DATA, format=ExportJob.PDF,
+            status=ExportJob.COMPLETED, file=f'exports/{name}', file_size=size_kb * 1024,
+            completed_at=timezone.now() - timedelta(days=30),
+            last_accessed_at=timezone.now() - timedelta(days=used_days_ago),
+            requested_by=self.admin
+        )
+
+    def run_prune(self, *args):
+        out = StringIO()
+        call_command('prune_exports', *args, stdout=out)
+        return out.getvalue()
+
+    def test_ttl_and_lru_eviction(self):
+        old = self.create_export('old.pdf', 10, used_days_ago=10)
+        least_recent = self.create_export('least.pdf', 600, used_days_ago=3)
+        recent = self.create_export('recent.pdf', 600, used_days_ago=1)
+
+        output = self.run_prune('--ttl-days', '7', '--max-mb', '1')
+
+        self.assertIn('Borrados 2 archivos', output)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'exports')), ['recent.pdf'])
+        for job in (old, least_recent):
+            job.refresh_from_db()
+            self.assertFalse(job.file)
+        recent.refresh_from_db()
+        self.assertEqual(recent.file.name, 'exports/recent.pdf')
+
+    def test_dry_run_keeps_files(self):
+        self.create_export('old.pdf', 10, used_days_ago=10)
+
+        output = self.run_prune('--ttl-days', '7', '--dry-run')
+
+        self.assertIn('Se borrarían 1 archivos', output)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'exports')), ['old.pdf'])
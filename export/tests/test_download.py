@@ -0,0 +1,107 @@
+"""
+Tests para la descarga de archivos sin cargarlos en memoria (ds2_back.downloads)
+"""
+
+import shutil
+import tempfile
+from datetime import date
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import FileResponse
+from django.test import override_settings
+
+from attendance.models import Attendance
+from export.models import ExportJob
+from rooms.tests.test_reports import ReportsBaseTestCase
+
+CONTENT = bytes(range(256)) * 40
+
+
+class FileDownloadTest(ReportsBaseTestCase):
+    """FileResponse, rangos de bytes y ETag/If-None-Match"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.export_job = ExportJob.objects.create(
+            title='Exportación', export_type=ExportJob.MONITORS_DATA, format=ExportJob.PDF,
+            status=ExportJob.COMPLETED, file_size=len(CONTENT), requested_by=self.admin
+        )
+        self.export_job.file.save('monitors.pdf', ContentFile(CONTENT))
+        self.url = f'/api/export/jobs/{self.export_job.id}/download/'
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+
+    def download(self, url=None, **headers):
+        response = self.client.get(url or self.url, **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_download_streams_file(self):
+        response = self.download()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(self.body(response), CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('attachment;', response['Content-Disposition'])
+        self.assertTrue(response['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.download()['ETag']
+
+        response = self.download(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_range_requests(self):
+        response = self.download(HTTP_RANGE='bytes=100-299')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), CONTENT[100:300])
+        self.assertEqual(response['Content-Length'], '200')
+        self.assertEqual(response['Content-Range'], f'bytes 100-299/{len(CONTENT)}')
+
+        response = self.download(HTTP_RANGE='bytes=-10')
+        self.assertEqual(self.body(response), CONTENT[-10:])
+
+        response = self.download(HTTP_RANGE='bytes=10000-')
+        self.assertEqual(self.body(response), CONTENT[10000:])
+
+    def test_unsatisfiable_range_returns_416(self):
+        response = self.download(HTTP_RANGE=f'bytes={len(CONTENT)}-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_stale_if_range_sends_whole_file(self):
+        response = self.download(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"otra-version"')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), CONTENT)
+
+    def test_attendance_download(self):
+        attendance = Attendance.objects.create(
+            title='Listado', date=date.today(), uploaded_by=self.monitor,
+            file=SimpleUploadedFile('listado.pdf', CONTENT, content_type='application/pdf')
+        )
+        url = f'/api/attendance/attendances/{attendance.id}/download/'
+
+        response = self.download(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), CONTENT)
+        self.assertIn('Listado.pdf', response['Content-Disposition'])
+
+        self.assertEqual(self.download(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.body(self.download(url, HTTP_RANGE='bytes=0-3')), CONTENT[:4])
@@ -0,0 +1,74 @@
+"""
+Tests para la exportación a Excel en streaming (xlsxwriter constant_memory)
+"""
+
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import openpyxl
+from django.db.models.query import QuerySet
+from django.test import override_settings
+
+from export.models import ExportJob
+from export.services import EXPORT_CHUNK_SIZE, MonitorDataExporter
+from rooms.tests.test_reports import ReportsBaseTestCase
+
+
+class ExcelStreamingExportTest(ReportsBaseTestCase):
+    """El archivo se escribe por filas en un temporal local y luego se sube al almacenamiento"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, FILE_UPLOAD_TEMP_DIR=self.temp_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.create_schedule(self.monitor, self.room, 0, 2)
+        entry = self.create_entry(self.monitor, self.room, 0, 90)
+        entry.notes = '=HYPERLINK("http://example.com")'
+        entry.save(update_fields=['notes'])
+        self.create_entry(self.other_monitor, self.other_room, 10)
+
+        self.job = ExportJob.objects.create(
+            title='Exportación', export_type=ExportJob.MONITORS_DATA, format=ExportJob.EXCEL,
+            requested_by=self.admin
+        )
+
+    def exports_dir(self):
+        return os.path.join(self.media_root, 'exports')
+
+    def test_rows_are_streamed_from_cursor(self):
+        with mock.patch.object(QuerySet, 'iterator', autospec=True, side_effect=QuerySet.iterator) as iterator:
+            self.assertTrue(MonitorDataExporter(self.job).export_to_excel())
+
+        self.assertEqual(iterator.call_count, 3)
+        self.assertTrue(all(call.kwargs == {'chunk_size': EXPORT_CHUNK_SIZE} for call in iterator.call_args_list))
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, ExportJob.COMPLETED)
+        self.assertTrue(self.job.file.name.startswith('exports/'))
+        self.assertEqual(os.listdir(self.exports_dir()), [os.path.basename(self.job.file.name)])
+        self.assertEqual(self.job.file_size, os.path.getsize(self.job.file.path))
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+        entries = list(openpyxl.load_workbook(self.job.file.path)['Entradas a Salas'].values)
+        self.assertEqual(entries[0][:3], ('ID Monitor', 'Monitor', 'Sala'))
+        self.assertEqual(len(entries), 3)
+        notes = {row[0]: row[7] for row in entries[1:]}
+        self.assertEqual(notes[self.monitor.id], '=HYPERLINK("http://example.com")')
+
+    def test_failure_leaves_no_partial_file(self):
+        with mock.patch.object(MonitorDataExporter, 'get_schedule_rows', side_effect=RuntimeError('fallo')):
+            self.assertFalse(MonitorDataExporter(self.job).export_to_excel())
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, ExportJob.FAILED)
+        self.assertEqual(self.job.error_message, 'fallo')
+        self.assertFalse(os.path.exists(self.exports_dir()))
+        self.assertEqual(os.listdir(self.temp_dir), [])
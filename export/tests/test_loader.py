@@ -0,0 +1,107 @@
+"""
+Tests para la carga de datos de exportación (MonitorExportLoader)
+"""
+
+import shutil
+import tempfile
+from datetime import timedelta
+
+import openpyxl
+from django.test import override_settings
+
+from attendance.models import Incapacity
+from export.loader import MonitorExportLoader
+from export.models import ExportJob
+from export.services import MonitorDataExporter
+from rooms.daily_usage import rebuild_daily_usage
+from rooms.tests.test_reports import ReportsBaseTestCase
+
+
+class MonitorExportLoaderTest(ReportsBaseTestCase):
+    """Cada conjunto de datos se consulta una vez para todos los monitores"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        for monitor in (self.monitor, self.other_monitor):
+            self.create_schedule(monitor, self.room, 0, 2)
+            self.create_schedule(monitor, self.other_room, 24, 2)
+            Incapacity.objects.create(
+                user=monitor, start_date=self.base.date(), end_date=self.base.date(),
+                document='incapacities/test.pdf'
+            )
+        self.create_entry(self.monitor, self.room, 0, 90)
+        self.create_entry(self.monitor, self.other_room, 200, 30)
+        self.create_entry(self.other_monitor, self.room, 300)  # Sin salida: no suma horas
+
+    def create_job(self, format_type=ExportJob.EXCEL, **kwargs):
+        return ExportJob.objects.create(
+            title='Exportación', export_type=ExportJob.MONITORS_DATA, format=format_type,
+            requested_by=self.admin, **kwargs
+        )
+
+    def test_load_is_constant_queries(self):
+        loader = MonitorExportLoader()
+
+        with self.assertNumQueries(4):
+            data = loader.load()
+            rooms = [entry.room.name for monitor_data in data for entry in monitor_data['room_entries']]
+            rooms += [schedule.room.name for monitor_data in data for schedule in monitor_data['schedules']]
+
+        self.assertEqual(len(rooms), 7)
+        by_monitor = {monitor_data['monitor'].id: monitor_data for monitor_data in data}
+        self.assertEqual(by_monitor[self.monitor.id]['stats'], {
+            'total_hours': 2.0, 'total_entries': 2, 'total_schedules': 2, 'total_incapacities': 1
+        })
+        self.assertEqual(by_monitor[self.other_monitor.id]['stats']['total_hours'], 0)
+        self.assertEqual(by_monitor[self.other_monitor.id]['stats']['total_entries'], 1)
+
+    def test_date_and_monitor_filters(self):
+        loader = MonitorExportLoader(monitor_ids=[self.monitor.id], end_date=self.base.date())
+
+        data = loader.load()
+
+        self.assertEqual([monitor_data['monitor'] for monitor_data in data], [self.monitor])
+        self.assertEqual(data[0]['stats']['total_schedules'], 1)
+        self.assertEqual(len(data[0]['schedules']), 1)
+        self.assertEqual(MonitorExportLoader(start_date=self.base.date() + timedelta(days=365)).load()[0]['room_entries'], [])
+
+    def test_excel_export_uses_loader(self):
+        job = self.create_job()
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            self.assertTrue(MonitorDataExporter(job).export_to_excel())
+
+            job.refresh_from_db()
+            self.assertEqual(job.status, ExportJob.COMPLETED)
+            workbook = openpyxl.load_workbook(job.file.path)
+
+        self.assertEqual(workbook['Resumen de Monitores'].max_row, 3)
+        self.assertEqual(workbook['Entradas a Salas'].max_row, 4)
+        self.assertEqual(workbook['Turnos'].max_row, 5)
+
+    def test_pdf_export_uses_loader(self):
+        job = self.create_job(ExportJob.PDF)
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            self.assertTrue(MonitorDataExporter(job).export_to_pdf())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.COMPLETED)
+        self.assertGreater(job.file_size, 0)
+
+    def test_json_endpoint_totals(self):
+        rebuild_daily_usage()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+
+        response = self.client.get('/api/export/monitors/data/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_count'], 2)
+        totals = {monitor['id']: monitor for monitor in response.data['monitors']}
+        self.assertEqual(totals[self.monitor.id]['total_room_entries'], 2)
+        self.assertEqual(totals[self.monitor.id]['total_schedules'], 2)
+        self.assertEqual(totals[self.monitor.id]['total_incapacities'], 1)
+        self.assertEqual(totals[self.monitor.id]['total_hours_worked'], 2.0)
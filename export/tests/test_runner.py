@@ -0,0 +1,125 @@
+"""
+Tests para la cola de trabajos de exportación (export.runner)
+"""
+
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from export.models import ExportJob
+from export.runner import LEASE_SECONDS, claim_jobs, enqueue_export, run_export_job
+from rooms.tests.test_reports import ReportsBaseTestCase
+
+
+class ExportRunnerTest(ReportsBaseTestCase):
+    """La vista solo encola; el worker reclama y genera los trabajos"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.create_entry(self.monitor, self.room, 0, 60)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+
+    def create_job(self, format_type=ExportJob.EXCEL):
+        return ExportJob.objects.create(
+            title='Exportación', export_type=ExportJob.MONITORS_DATA, format=format_type,
+            requested_by=self.admin
+        )
+
+    @override_settings(EXPORT_EAGER=False)
+    def test_view_only_enqueues(self):
+        response = self.client.post('/api/export/monitors/export/', {'format': 'pdf'}, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], ExportJob.PENDING)
+        job = ExportJob.objects.get(id=response.data['export_job_id'])
+        self.assertEqual(job.status, ExportJob.PENDING)
+        self.assertFalse(job.file)
+
+    def test_view_eager_generates_file(self):
+        response = self.client.post('/api/export/monitors/export/', {'format': 'excel'}, format='json')
+
+        self.assertEqual(response.data['status'], ExportJob.COMPLETED)
+        job = ExportJob.objects.get(id=response.data['export_job_id'])
+        self.assertEqual(job.progress, 100)
+        self.assertIsNotNone(job.started_at)
+
+    def test_claim_marks_processing_once(self):
+        jobs = [self.create_job() for _ in range(3)]
+
+        self.assertEqual(claim_jobs(2), [jobs[0].id, jobs[1].id])
+        self.assertEqual(claim_jobs(2), [jobs[2].id])
+        self.assertEqual(claim_jobs(2), [])
+
+        jobs[0].refresh_from_db()
+        self.assertEqual(jobs[0].status, ExportJob.PROCESSING)
+        self.assertIsNotNone(jobs[0].started_at)
+
+    def test_stale_processing_job_is_reclaimed(self):
+        job = self.create_job()
+        claim_jobs()
+        ExportJob.objects.filter(id=job.id).update(
+            started_at=timezone.now() - timedelta(seconds=LEASE_SECONDS + 1)
+        )
+
+        self.assertEqual(claim_jobs(), [job.id])
+
+    def test_deleted_job_does_not_raise(self):
+        job = self.create_job()
+        ExportJob.objects.filter(id=job.id).delete()
+
+        self.assertEqual(run_export_job(job.id), (job.id, False))
+
+    @override_settings(EXPORT_EAGER=False)
+    def test_command_survives_job_errors(self):
+        failing, ok = self.create_job(), self.create_job()
+        out = StringIO()
+
+        with mock.patch('export.management.commands.process_exports.run_export_job',
+                        side_effect=[RuntimeError('sin conexión'), (ok.id, True)]):
+            call_command('process_exports', '--once', '--workers', '1', stdout=out)
+
+        self.assertIn('Completadas: 1 - Fallidas: 1', out.getvalue())
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, ExportJob.FAILED)
+        self.assertEqual(failing.error_message, 'sin conexión')
+
+    def test_unsupported_format_fails(self):
+        job = self.create_job(ExportJob.CSV)
+
+        self.assertEqual(run_export_job(job.id), (job.id, False))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.FAILED)
+        self.assertIn('csv', job.error_message)
+
+    @override_settings(EXPORT_EAGER=False)
+    def test_command_processes_pending_jobs(self):
+        pdf, excel = self.create_job(ExportJob.PDF), self.create_job()
+        enqueue_export(pdf)
+        out = StringIO()
+
+        call_command('process_exports', '--once', '--workers', '1', stdout=out)
+
+        self.assertIn('Completadas: 2 - Fallidas: 0', out.getvalue())
+        for job in (pdf, excel):
+            job.refresh_from_db()
+            self.assertEqual(job.status, ExportJob.COMPLETED)
+            self.assertEqual(job.progress, 100)
+            self.assertTrue(job.file)
+
+    @override_settings(EXPORT_EAGER=False, EXPORT_SHARED_STORAGE=False)
+    def test_command_refuses_without_shared_storage(self):
+        with self.assertRaises(CommandError):
+            call_command('process_exports', '--once', stdout=StringIO())
@@ -0,0 +1,65 @@
+"""
+Tests para la exportación en streaming (CSV y NDJSON)
+"""
+
+import csv
+import io
+import json
+
+from export.serializers import RoomEntryExportSerializer
+from rooms.tests.test_reports import ReportsBaseTestCase
+
+
+class StreamingExportTest(ReportsBaseTestCase):
+    """Los endpoints de datos entregan CSV / NDJSON con StreamingHttpResponse"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        for offset in range(3):
+            self.create_entry(self.monitor, self.room, offset * 60, 30)
+        self.create_entry(self.other_monitor, self.other_room, 30)
+        self.create_schedule(self.monitor, self.room, 0, 2)
+        self.create_schedule(self.other_monitor, self.other_room, 3, 2)
+
+    def content(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_room_entries_csv(self):
+        response = self.client.get('/api/export/room-entries/data/', {'format': 'csv', 'monitor_ids': self.monitor.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('room_entries.csv', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(self.content(response))))
+        self.assertEqual(rows[0], list(RoomEntryExportSerializer.Meta.fields))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual({row[rows[0].index('user')] for row in rows[1:]}, {str(self.monitor.id)})
+
+    def test_schedules_ndjson(self):
+        response = self.client.get('/api/export/schedules/data/?format=ndjson')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lines = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual({line['user'] for line in lines}, {self.monitor.id, self.other_monitor.id})
+        self.assertEqual(lines[0]['room_name'], 'Sala Reportes 2')
+
+    def test_accept_header_selects_csv(self):
+        response = self.client.get('/api/export/room-entries/data/', HTTP_ACCEPT='text/csv')
+
+        self.assertEqual(len(self.content(response).splitlines()), 5)
+
+    def test_json_is_still_the_default(self):
+        response = self.client.get('/api/export/room-entries/data/')
+
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.data['total_count'], 4)
+
+    def test_validation_error_in_stream_format(self):
+        response = self.client.get('/api/export/schedules/data/', {'format': 'csv', 'start_date': 'ayer'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Formato de fecha inicial', response.content.decode('utf-8'))
@@ -1,21 +1,24 @@
 from rest_framework import status, generics, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.http import HttpResponse, Http404
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from django.utils import timezone
 from datetime import datetime, date
-import threading
 from .models import ExportJob
 from .serializers import (
     ExportJobSerializer, MonitorExportSerializer, 
     RoomEntryExportSerializer, ScheduleExportSerializer,
     AttendanceExportSerializer, IncapacityExportSerializer
 )
-from .services import MonitorDataExporter
-from users.models import User
+from .cache import export_params_key, find_cached_export, reuse_export
+from .runner import enqueue_export
+from .loader import MonitorExportLoader
+from .streaming import STREAM_RENDERERS, streaming_export_response
+from ds2_back.downloads import file_download_response
 from rooms.models import RoomEntry
 from attendance.models import Attendance, Incapacity
 from schedule.models import Schedule
@@ -93,6 +96,17 @@ def export_monitors_data(request):
                 'error': 'La fecha inicial no puede ser posterior a la fecha final'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Validar IDs de monitores
+        if monitor_ids is not None:
+            try:
+                if not isinstance(monitor_ids, list):
+                    raise ValueError
+                monitor_ids = [int(monitor_id) for monitor_id in monitor_ids]
+            except (TypeError, ValueError):
+                return Response({
+                    'error': 'monitor_ids debe ser una lista de IDs numéricos'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
         # Crear trabajo de exportación
         export_job = ExportJob.objects.create(
             title=title,
@@ -101,25 +115,29 @@ def export_monitors_data(request):
             start_date=start_date,
             end_date=end_date,
             monitor_ids=monitor_ids,
+            content_key=export_params_key(export_type, format_type, title, monitor_ids, start_date, end_date),
             requested_by=request.user
         )
         
-        # Iniciar exportación en hilo separado
-        def run_export():
-            exporter = MonitorDataExporter(export_job)
-            if format_type == 'pdf':
-                exporter.export_to_pdf()
-            else:
-                exporter.export_to_excel()
+        # Reutilizar un archivo ya generado con los mismos parámetros y datos
+        cached_job = find_cached_export(export_job.content_key, monitor_ids, start_date, end_date)
+        if cached_job:
+            reuse_export(export_job, cached_job)
+            return Response({
+                'message': 'Exportación disponible',
+                'export_job_id': export_job.id,
+                'status': export_job.status,
+                'cached': True
+            }, status=status.HTTP_200_OK)
         
-        thread = threading.Thread(target=run_export)
-        thread.daemon = True
-        thread.start()
+        # Encolar: el worker `process_exports` genera el archivo
+        enqueue_export(export_job)
         
         return Response({
             'message': 'Exportación iniciada',
             'export_job_id': export_job.id,
-            'status': 'processing'
+            'status': export_job.status,
+            'cached': False
         }, status=status.HTTP_202_ACCEPTED)
         
     except Exception as e:
@@ -141,11 +159,8 @@ def get_monitors_data(request):
         end_date = request.GET.get('end_date')
         format_type = request.GET.get('format', 'json')
         
-        # Construir queryset
-        queryset = User.objects.filter(role=User.MONITOR, is_verified=True)
-        
-        if monitor_ids:
-            queryset = queryset.filter(id__in=monitor_ids)
+        # Construir queryset (totales calculados en la misma consulta)
+        queryset = MonitorExportLoader(monitor_ids=monitor_ids).get_summary_queryset()
         
         # Aplicar filtros de fecha si se proporcionan
         if start_date:
@@ -165,11 +180,12 @@ def get_monitors_data(request):
                 }, status=status.HTTP_400_BAD_REQUEST)
         
         # Serializar datos
-        serializer = MonitorExportSerializer(queryset, many=True, context={'request': request})
+        monitors = list(queryset)
+        serializer = MonitorExportSerializer(monitors, many=True, context={'request': request})
         
         return Response({
             'monitors': serializer.data,
-            'total_count': queryset.count(),
+            'total_count': len(monitors),
             'filters_applied': {
                 'monitor_ids': monitor_ids,
                 'start_date': start_date.isoformat() if start_date else None,
@@ -185,9 +201,11 @@ def get_monitors_data(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@renderer_classes([JSONRenderer] + STREAM_RENDERERS)
 def get_room_entries_data(request):
     """
     Endpoint para obtener datos de entradas a salas
+    (?format=csv o ?format=ndjson para descargarlos en streaming)
     """
     try:
         # Parámetros de filtrado
@@ -224,6 +242,13 @@ def get_room_entries_data(request):
                     'error': 'Formato de fecha final inválido. Use YYYY-MM-DD'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
+        # CSV / NDJSON: filas en streaming desde el cursor
+        if request.accepted_renderer.format in (ExportJob.CSV, ExportJob.NDJSON):
+            return streaming_export_response(
+                queryset.order_by('-entry_time'), RoomEntryExportSerializer,
+                request.accepted_renderer.format, 'room_entries', context={'request': request}
+            )
+        
         # Serializar datos
         serializer = RoomEntryExportSerializer(queryset.order_by('-entry_time'), many=True, context={'request': request})
         
@@ -246,9 +271,11 @@ def get_room_entries_data(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@renderer_classes([JSONRenderer] + STREAM_RENDERERS)
 def get_schedules_data(request):
     """
     Endpoint para obtener datos de turnos
+    (?format=csv o ?format=ndjson para descargarlos en streaming)
     """
     try:
         # Parámetros de filtrado
@@ -289,6 +316,13 @@ def get_schedules_data(request):
                     'error': 'Formato de fecha final inválido. Use YYYY-MM-DD'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
+        # CSV / NDJSON: filas en streaming desde el cursor
+        if request.accepted_renderer.format in (ExportJob.CSV, ExportJob.NDJSON):
+            return streaming_export_response(
+                queryset.order_by('-start_datetime'), ScheduleExportSerializer,
+                request.accepted_renderer.format, 'schedules', context={'request': request}
+            )
+        
         # Serializar datos
         serializer = ScheduleExportSerializer(queryset.order_by('-start_datetime'), many=True, context={'request': request})
         
@@ -319,32 +353,21 @@ def download_export_file(request, export_job_id):
     try:
         export_job = get_object_or_404(ExportJob, id=export_job_id, requested_by=request.user)
         
-        if not export_job.is_completed or not export_job.file:
+        if (not export_job.is_completed or not export_job.file
+                or not export_job.file.storage.exists(export_job.file.name)):
             return Response({
                 'error': 'El archivo no está disponible o la exportación no ha terminado'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Determinar content type según el formato
-        if export_job.format == ExportJob.PDF:
-            content_type = 'application/pdf'
-        elif export_job.format == ExportJob.EXCEL:
-            content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        else:
-            content_type = 'application/octet-stream'
-        
-        # Crear respuesta HTTP con el archivo
-        response = HttpResponse(
-            export_job.file.read(),
-            content_type=content_type
-        )
+        # Uso reciente: prune_exports conserva primero los archivos más usados
+        ExportJob.objects.filter(id=export_job.id).update(last_accessed_at=timezone.now())
         
-        # Configurar headers para descarga
-        filename = f"export_{export_job.export_type}_{export_job.format}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_job.format}"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        if export_job.file_size:
-            response['Content-Length'] = export_job.file_size
+        # Determinar content type según el formato
+        content_type = ExportJob.CONTENT_TYPES.get(export_job.format, 'application/octet-stream')
         
-        return response
+        # Enviar el archivo sin cargarlo en memoria (Range, ETag/If-None-Match)
+        filename = f"export_{export_job.export_type}_{export_job.format}_{export_job.created_at.strftime('%Y%m%d_%H%M%S')}.{export_job.format}"
+        return file_download_response(request, export_job.file, filename, content_type)
         
     except Exception as e:
         return Response({
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class NotificationsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'notifications'
+
+    def ready(self):
+        # Registrar señales de la app (contadores de notificaciones)
+        import notifications.signals  # noqa: F401
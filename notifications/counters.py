@@ -0,0 +1,129 @@
+"""
+Contadores de notificaciones por usuario (campana y resumen)
+
+NotificationCounter guarda, por usuario y tipo, el total de notificaciones y
+las no leídas. Se actualizan con UPDATE ... SET x = x + n (F()), sin COUNT
+sobre la tabla de notificaciones:
+
+- Notification.objects.create() / save() / delete(): señales en
+  notifications.signals.
+- bulk_create (NotificationService.notify_users) y los QuerySet.update() de
+  marcar como leídas: llamadas explícitas a NotificationCounterCache.
+
+El agregado de cada usuario se guarda en la cache de Django; se descarta
+cada vez que cambian sus contadores y solo se guarda al confirmar la
+transacción en que se leyó (como AdminRecipientCache).
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import NotificationCounter
+
+
+class NotificationCounterCache:
+    """Contadores de notificaciones por usuario, en cache"""
+    KEY_PREFIX = 'notifications:counters:'
+    TIMEOUT = 5 * 60
+
+    @staticmethod
+    def _key(user_id):
+        return f'{NotificationCounterCache.KEY_PREFIX}{user_id}'
+
+    @staticmethod
+    def get(user):
+        """
+        Contadores del usuario:
+        {'total', 'unread', 'by_type': [{'notification_type', 'count', 'unread'}, ...]}
+        con `by_type` ordenado de mayor a menor cantidad.
+        """
+        key = NotificationCounterCache._key(user.pk)
+        counters = cache.get(key)
+        if counters is None:
+            rows = NotificationCounter.objects.filter(user_id=user.pk, total__gt=0).order_by('-total', 'notification_type')
+            by_type = [
+                {'notification_type': row.notification_type, 'count': row.total, 'unread': row.unread}
+                for row in rows
+            ]
+            counters = {
+                'total': sum(row['count'] for row in by_type),
+                'unread': sum(row['unread'] for row in by_type),
+                'by_type': by_type,
+            }
+            transaction.on_commit(lambda: cache.set(key, counters, NotificationCounterCache.TIMEOUT))
+        return counters
+
+    @staticmethod
+    def unread_count(user):
+        return NotificationCounterCache.get(user)['unread']
+
+    @staticmethod
+    def invalidate(user_ids):
+        """Descarta los contadores en cache ahora y de nuevo al confirmar"""
+        keys = [NotificationCounterCache._key(user_id) for user_id in set(user_ids)]
+        if not keys:
+            return
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @staticmethod
+    def apply(deltas):
+        """
+        Suma los deltas {(user_id, notification_type): (total, unread)}.
+        Un UPDATE por cada combinación distinta de (tipo, deltas); las filas
+        que faltan se crean en cero antes de sumar.
+        """
+        groups = defaultdict(list)
+        for (user_id, notification_type), (total, unread) in deltas.items():
+            if total or unread:
+                groups[(notification_type, total, unread)].append(user_id)
+
+        for (notification_type, total, unread), user_ids in groups.items():
+            rows = NotificationCounter.objects.filter(user_id__in=user_ids, notification_type=notification_type)
+            if total > 0 or unread > 0:
+                existing = set(rows.values_list('user_id', flat=True))
+                missing = [user_id for user_id in user_ids if user_id not in existing]
+                if missing:
+                    # Otro proceso pudo crearla entretanto: el conflicto se ignora y el UPDATE suma igual
+                    NotificationCounter.objects.bulk_create(
+                        [NotificationCounter(user_id=user_id, notification_type=notification_type) for user_id in missing],
+                        ignore_conflicts=True
+                    )
+            # Nunca por debajo de cero aunque los contadores se hayan desfasado
+            rows.update(total=Greatest(F('total') + total, 0), unread=Greatest(F('unread') + unread, 0))
+
+        NotificationCounterCache.invalidate(user_id for user_id, _ in deltas)
+
+    @staticmethod
+    def added(notifications):
+        """Suma notificaciones recién creadas (p. ej. tras un bulk_create)"""
+        deltas = defaultdict(lambda: (0, 0))
+        for notification in notifications:
+            total, unread = deltas[(notification.user_id, notification.notification_type)]
+            deltas[(notification.user_id, notification.notification_type)] = (
+                total + 1, unread + (0 if notification.read else 1)
+            )
+        NotificationCounterCache.apply(deltas)
+
+    @staticmethod
+    def read(user_id, notification_type, count=1):
+        """Descuenta `count` notificaciones del tipo que pasaron a leídas"""
+        NotificationCounterCache.apply({(user_id, notification_type): (0, -count)})
+
+    @staticmethod
+    def lock(user):
+        """
+        Bloquea los contadores del usuario hasta el fin de la transacción
+        (SELECT ... FOR UPDATE). Se usa antes de marcar todas como leídas para
+        que una notificación creada en paralelo no quede descontada.
+        """
+        list(NotificationCounter.objects.select_for_update().filter(user_id=user.pk).values_list('id', flat=True))
+
+    @staticmethod
+    def all_read(user):
+        """Deja en cero las no leídas del usuario"""
+        NotificationCounter.objects.filter(user_id=user.pk, unread__gt=0).update(unread=0)
+        NotificationCounterCache.invalidate([user.pk])
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications.outbox import BATCH_SIZE, WORKERS, process_outbox
+
+
+class Command(BaseCommand):
+    help = 'Entregar las notificaciones y correos pendientes de la bandeja de salida'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Mensajes reclamados por lote (por defecto {BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=WORKERS,
+            help=f'Hilos para el envío de correos (por defecto {WORKERS})',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Segundos de espera cuando la bandeja está vacía',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Vaciar la bandeja una vez y terminar',
+        )
+
+    def handle(self, *args, **options):
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+
+        try:
+            while True:
+                close_old_connections()
+                results = process_outbox(batch_size=options['batch_size'], workers=options['workers'])
+                for key, value in results.items():
+                    totals[key] += value
+
+                if any(results.values()):
+                    self.stdout.write(
+                        f"Enviados: {results['sent']} - Reintentos: {results['retried']} - Fallidos: {results['failed']}"
+                    )
+                    continue
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Bandeja procesada. Enviados: {totals['sent']} - Reintentos: {totals['retried']} - Fallidos: {totals['failed']}"
+        ))
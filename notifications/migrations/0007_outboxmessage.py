@@ -0,0 +1,35 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:55
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_add_schedule_non_compliance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('notification', 'Notificación'), ('email', 'Correo')], max_length=20, verbose_name='Tipo')),
+                ('payload', models.JSONField(help_text='Datos necesarios para entregar el mensaje', verbose_name='Contenido')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('processing', 'En proceso'), ('sent', 'Enviado'), ('failed', 'Fallido')], default='pending', max_length=20, verbose_name='Estado')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Momento a partir del cual se puede (re)intentar la entrega', verbose_name='Disponible desde')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último error')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de envío')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Mensaje de salida',
+                'verbose_name_plural': 'Mensajes de salida',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['notification_type', 'related_object_id', 'created_at'], name='notification_type_object_idx'),
+        ),
+    ]
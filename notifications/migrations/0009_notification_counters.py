@@ -0,0 +1,60 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_notification_counters(apps, schema_editor):
+    """
+    Inicializar los contadores con las notificaciones existentes
+    (un GROUP BY por usuario y tipo).
+    """
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationCounter = apps.get_model('notifications', 'NotificationCounter')
+    rows = Notification.objects.values('user_id', 'notification_type').annotate(
+        total=models.Count('id'),
+        unread=models.Count('id', filter=models.Q(read=False)),
+    ).order_by()
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(**row) for row in rows],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0008_notification_type_object_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(choices=[('room_entry', 'Entrada a sala'), ('room_exit', 'Salida de sala'), ('incapacity', 'Incapacidad registrada'), ('equipment_report', 'Reporte de equipo'), ('attendance', 'Listado de asistencia'), ('admin_verification', 'Verificación de usuario'), ('excessive_hours', 'Exceso de horas continuas'), ('schedule_non_compliance', 'Incumplimiento de turno'), ('conversation_message', 'Nuevo mensaje en conversación')], max_length=30, verbose_name='Tipo')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('unread', models.PositiveIntegerField(default=0, verbose_name='No leídas')),
+            ],
+            options={
+                'verbose_name': 'Contador de notificaciones',
+                'verbose_name_plural': 'Contadores de notificaciones',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'read', 'created_at'], name='notification_user_read_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificationcounter',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_counters', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationcounter',
+            constraint=models.UniqueConstraint(fields=('user', 'notification_type'), name='unique_notification_counter'),
+        ),
+        migrations.RunPython(fill_notification_counters, migrations.RunPython.noop),
+    ]
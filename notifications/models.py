@@ -80,6 +80,7 @@ class Notification(models.Model):
 
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Notification(models.Model):
@@ -156,6 +157,125 @@ class Notification(models.Model):
         verbose_name = 'Notificación'
         verbose_name_plural = 'Notificaciones'
         ordering = ['-created_at']
+        indexes = [
+            # Deduplicación de alertas por objeto relacionado (p. ej. exceso de horas por entrada)
+            models.Index(fields=['notification_type', 'related_object_id', 'created_at'], name='notification_type_object_idx'),
+            # Listados de no leídas del usuario, de la más reciente a la más antigua
+            models.Index(fields=['user', 'read', 'created_at'], name='notification_user_read_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.get_notification_type_display()} - {self.title} ({self.user})"
\ No newline at end of file
+        return f"{self.get_notification_type_display()} - {self.title} ({self.user})"
+
+class OutboxMessage(models.Model):
+    """
+    Bandeja de salida persistente de notificaciones y correos.
+
+    Los servicios y señales solo insertan filas aquí; el comando
+    `process_outbox` las entrega en lotes, con reintentos y espera exponencial.
+    """
+    NOTIFICATION = 'notification'
+    EMAIL = 'email'
+
+    KIND_CHOICES = [
+        (NOTIFICATION, 'Notificación'),
+        (EMAIL, 'Correo'),
+    ]
+
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pendiente'),
+        (PROCESSING, 'En proceso'),
+        (SENT, 'Enviado'),
+        (FAILED, 'Fallido'),
+    ]
+
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        verbose_name="Tipo",
+    )
+    payload = models.JSONField(
+        verbose_name="Contenido",
+        help_text='Datos necesarios para entregar el mensaje'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name="Estado",
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Intentos",
+    )
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Disponible desde",
+        help_text='Momento a partir del cual se puede (re)intentar la entrega'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name="Último error",
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Fecha de envío",
+    )
+
+    # Campos de auditoría
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Mensaje de salida'
+        verbose_name_plural = 'Mensajes de salida'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
+
+
+class NotificationCounter(models.Model):
+    """
+    Contadores de notificaciones por usuario y tipo (total y no leídas).
+
+    Evitan los COUNT sobre la tabla de notificaciones en el contador de la
+    campana y en el resumen; se mantienen desde notifications.counters.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notification_counters',
+    )
+    notification_type = models.CharField(
+        max_length=30,
+        choices=Notification.TYPE_CHOICES,
+        verbose_name="Tipo",
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Total",
+    )
+    unread = models.PositiveIntegerField(
+        default=0,
+        verbose_name="No leídas",
+    )
+
+    class Meta:
+        verbose_name = 'Contador de notificaciones'
+        verbose_name_plural = 'Contadores de notificaciones'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'notification_type'], name='unique_notification_counter'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.notification_type}: {self.unread}/{self.total}"
@@ -0,0 +1,263 @@
+"""
+Bandeja de salida (outbox) de notificaciones y correos
+
+Los servicios y señales llaman a enqueue_notification / enqueue_email (o
+enqueue_many para varios a la vez), que solo insertan filas OutboxMessage
+dentro de la transacción en curso. El comando
+`python manage.py process_outbox` reclama lotes de mensajes pendientes
+(SELECT ... FOR UPDATE SKIP LOCKED en PostgreSQL), entrega las notificaciones
+con un solo INSERT por mensaje y los correos en lotes (users.email_utils)
+repartidos en un pool de hilos.
+
+Si la entrega falla se reintenta con espera exponencial hasta MAX_ATTEMPTS.
+Un mensaje reclamado que no se resuelve (p. ej. el worker murió) vuelve a
+estar disponible al vencer LEASE_SECONDS.
+
+Con settings.OUTBOX_EAGER (tests) los mensajes se entregan al encolarlos.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboxMessage
+from .recipients import AdminRecipientCache
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+WORKERS = 4
+MAX_ATTEMPTS = 5
+BASE_BACKOFF_SECONDS = 30
+MAX_BACKOFF_SECONDS = 60 * 60
+LEASE_SECONDS = 5 * 60
+
+
+def _is_eager():
+    return getattr(settings, 'OUTBOX_EAGER', False)
+
+
+def _enqueue(kind, payload):
+    message = OutboxMessage.objects.create(kind=kind, payload=payload)
+    if _is_eager():
+        deliver_messages([message])
+    return message
+
+
+def enqueue_many(messages):
+    """
+    Encola varios mensajes [(kind, payload), ...] con un solo INSERT
+    (ver notification_payload / email_payload).
+    """
+    created = OutboxMessage.objects.bulk_create([
+        OutboxMessage(kind=kind, payload=payload) for kind, payload in messages
+    ])
+    if created and _is_eager():
+        deliver_messages(created)
+    return created
+
+
+def notification_payload(notification_type, title, message, related_object_id=None, user_ids=None, verified_only=False):
+    """
+    Contenido de una notificación en la aplicación.
+    Sin `user_ids` se entrega a todos los administradores activos
+    (resueltos al momento de la entrega).
+    """
+    return {
+        'notification_type': notification_type,
+        'title': title,
+        'message': message,
+        'related_object_id': related_object_id,
+        'user_ids': list(user_ids) if user_ids is not None else None,
+        'verified_only': verified_only,
+    }
+
+
+def email_payload(subject, text_content, html_content=None, to=None, verified_only=False):
+    """
+    Contenido de un correo. `to` puede ser una dirección o una lista; sin `to`
+    se envía a todos los administradores activos (resueltos al entregar).
+    """
+    if isinstance(to, str):
+        to = [to]
+    return {
+        'subject': subject,
+        'text_content': text_content,
+        'html_content': html_content,
+        'to': list(to) if to is not None else None,
+        'verified_only': verified_only,
+    }
+
+
+def enqueue_notification(*args, **kwargs):
+    """Encola una notificación (mismos argumentos que notification_payload)"""
+    return _enqueue(OutboxMessage.NOTIFICATION, notification_payload(*args, **kwargs))
+
+
+def enqueue_email(*args, **kwargs):
+    """Encola un correo (mismos argumentos que email_payload)"""
+    return _enqueue(OutboxMessage.EMAIL, email_payload(*args, **kwargs))
+
+
+def backoff_seconds(attempts):
+    """Espera antes del siguiente intento tras `attempts` intentos fallidos"""
+    return min(BASE_BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS)
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """
+    Reclama hasta `batch_size` mensajes disponibles para este worker.
+    Otros workers concurrentes saltan las filas bloqueadas.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True).filter(
+                Q(status=OutboxMessage.PENDING) | Q(status=OutboxMessage.PROCESSING),
+                available_at__lte=now
+            ).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        OutboxMessage.objects.filter(id__in=ids).update(
+            status=OutboxMessage.PROCESSING,
+            available_at=now + timedelta(seconds=LEASE_SECONDS)
+        )
+    return list(OutboxMessage.objects.filter(id__in=ids).order_by('id'))
+
+
+def _deliver_notification(payload):
+    from .services import NotificationService
+    from users.models import User
+
+    if payload.get('user_ids') is None:
+        recipients = AdminRecipientCache.get_admins(verified_only=payload.get('verified_only', False))
+    else:
+        recipients = list(User.objects.filter(id__in=payload['user_ids']))
+
+    if recipients and not NotificationService.notify_users(
+        recipients,
+        notification_type=payload['notification_type'],
+        title=payload['title'],
+        message=payload['message'],
+        related_object_id=payload.get('related_object_id')
+    ):
+        raise RuntimeError('No se pudieron crear las notificaciones')
+
+
+def _email_recipients(payload):
+    if payload.get('to') is not None:
+        return payload['to']
+    admins = AdminRecipientCache.get_admins(verified_only=payload.get('verified_only', False))
+    return [admin.email for admin in admins if admin.email]
+
+
+def _send_emails(items):
+    """
+    Envía los correos de varios mensajes en un solo lote (users.email_utils)
+    Recibe [(mensaje, destinatarios)] y retorna, en el mismo orden,
+    [(destinatarios_fallidos, último_error)].
+    """
+    from users.email_utils import send_email_batch
+
+    emails, owners = [], []
+    for position, (message, recipients) in enumerate(items):
+        for recipient in recipients:
+            emails.append({
+                'to': recipient,
+                'subject': message.payload['subject'],
+                'text_content': message.payload['text_content'],
+                'html_content': message.payload.get('html_content'),
+            })
+            owners.append(position)
+
+    failed = [[] for _ in items]
+    last_errors = [None] * len(items)
+    for email, position, error in zip(emails, owners, send_email_batch(emails)):
+        if error is not None:
+            failed[position].append(email['to'])
+            last_errors[position] = error
+    return list(zip(failed, last_errors))
+
+
+def _mark_sent(message):
+    message.status = OutboxMessage.SENT
+    message.sent_at = timezone.now()
+    message.last_error = ''
+    message.save(update_fields=['status', 'sent_at', 'last_error', 'payload', 'attempts', 'updated_at'])
+
+
+def _mark_failed(message, error):
+    message.attempts += 1
+    message.last_error = str(error)
+    if message.attempts >= MAX_ATTEMPTS:
+        message.status = OutboxMessage.FAILED
+        logger.error(f"Mensaje de salida {message.id} descartado tras {message.attempts} intentos: {error}")
+    else:
+        message.status = OutboxMessage.PENDING
+        message.available_at = timezone.now() + timedelta(seconds=backoff_seconds(message.attempts))
+        logger.warning(f"Mensaje de salida {message.id} falló (intento {message.attempts}): {error}")
+    message.save(update_fields=['status', 'attempts', 'last_error', 'available_at', 'payload', 'updated_at'])
+
+
+def deliver_messages(messages, workers=1):
+    """
+    Entrega los mensajes dados y actualiza su estado.
+    Las notificaciones se crean en este hilo (usan la base de datos); los
+    correos se reparten en hasta `workers` lotes enviados en paralelo.
+
+    Retorna {'sent', 'retried', 'failed'}.
+    """
+    results = {'sent': 0, 'retried': 0, 'failed': 0}
+
+    def record(message, error=None):
+        if error is None:
+            _mark_sent(message)
+            results['sent'] += 1
+        else:
+            _mark_failed(message, error)
+            results['failed' if message.status == OutboxMessage.FAILED else 'retried'] += 1
+
+    emails = []
+    for message in messages:
+        if message.kind == OutboxMessage.EMAIL:
+            emails.append((message, _email_recipients(message.payload)))
+            continue
+        try:
+            _deliver_notification(message.payload)
+        except Exception as e:
+            record(message, e)
+        else:
+            record(message)
+
+    # Cada hilo envía un lote con su propia conexión SMTP / sesión HTTP
+    chunks = [emails[i::workers] for i in range(min(max(workers, 1), len(emails)))]
+    if len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            chunk_outcomes = list(executor.map(_send_emails, chunks))
+    else:
+        chunk_outcomes = [_send_emails(chunk) for chunk in chunks]
+    emails = [item for chunk in chunks for item in chunk]
+    outcomes = [outcome for chunk in chunk_outcomes for outcome in chunk]
+
+    for (message, recipients), (failed, error) in zip(emails, outcomes):
+        if failed:
+            # Solo se reintentan los destinatarios que fallaron
+            message.payload = dict(message.payload, to=failed)
+            record(message, error)
+        else:
+            record(message)
+
+    return results
+
+
+def process_outbox(batch_size=BATCH_SIZE, workers=WORKERS):
+    """Reclama y entrega un lote. Retorna los contadores de deliver_messages"""
+    messages = claim_batch(batch_size)
+    if not messages:
+        return {'sent': 0, 'retried': 0, 'failed': 0}
+    return deliver_messages(messages, workers=workers)
@@ -0,0 +1,77 @@
+"""
+Destinatarios de las notificaciones a administradores
+
+AdminRecipientCache guarda en la cache de Django la lista de administradores
+activos, de modo que cada notificación masiva no consulte la tabla de
+usuarios. Se invalida desde users.signals cuando un usuario entra o sale del
+conjunto (rol, is_active) o cambian los datos usados en los mensajes; el
+TIMEOUT cubre los cambios hechos con QuerySet.update(), que no emiten señales.
+
+La lista solo se guarda al confirmar la transacción en que se leyó, para que
+un rollback no deje en cache administradores que nunca existieron.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from users.models import User
+
+
+class AdminRecipientCache:
+    """Lista en cache de administradores activos"""
+    KEY = 'notifications:admin_recipients'
+    TIMEOUT = 5 * 60
+    TRACKED_FIELDS = ('role', 'is_active', 'is_verified', 'email', 'username', 'first_name', 'last_name')
+
+    @staticmethod
+    def _snapshot(user):
+        return tuple(getattr(user, field) for field in AdminRecipientCache.TRACKED_FIELDS)
+
+    @staticmethod
+    def get_admins(verified_only=False):
+        """
+        Administradores activos (y verificados si `verified_only`).
+        Retorna una lista de instancias de User.
+        """
+        admins = cache.get(AdminRecipientCache.KEY)
+        if admins is None:
+            admins = list(User.objects.filter(role=User.ADMIN, is_active=True).order_by('id'))
+            transaction.on_commit(
+                lambda: cache.set(AdminRecipientCache.KEY, admins, AdminRecipientCache.TIMEOUT)
+            )
+
+        if verified_only:
+            return [admin for admin in admins if admin.is_verified]
+        return admins
+
+    @staticmethod
+    def invalidate():
+        """Descarta la lista ahora y de nuevo al confirmar (por si otro proceso la recargó)"""
+        cache.delete(AdminRecipientCache.KEY)
+        transaction.on_commit(lambda: cache.delete(AdminRecipientCache.KEY))
+
+    @staticmethod
+    def user_saved(user, on_commit=False):
+        """Invalida la lista si el usuario guardado entra, sale o cambia dentro de ella"""
+        admins = cache.get(AdminRecipientCache.KEY)
+        if admins is None:
+            # La lista pudo leerse en esta misma transacción y guardarse al confirmar
+            if not on_commit and transaction.get_connection().in_atomic_block:
+                transaction.on_commit(lambda: AdminRecipientCache.user_saved(user, on_commit=True))
+            return
+
+        previous = next((admin for admin in admins if admin.pk == user.pk), None)
+        if previous is None:
+            if user.role == User.ADMIN and user.is_active:
+                AdminRecipientCache.invalidate()
+        elif AdminRecipientCache._snapshot(previous) != AdminRecipientCache._snapshot(user):
+            AdminRecipientCache.invalidate()
+
+    @staticmethod
+    def user_deleted(user_id, on_commit=False):
+        admins = cache.get(AdminRecipientCache.KEY)
+        if admins is None:
+            if not on_commit and transaction.get_connection().in_atomic_block:
+                transaction.on_commit(lambda: AdminRecipientCache.user_deleted(user_id, on_commit=True))
+            return
+        if any(admin.pk == user_id for admin in admins):
+            AdminRecipientCache.invalidate()
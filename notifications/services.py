@@ -405,14 +405,20 @@ class ExcessiveHoursChecker:
             logger.error(f"Error obteniendo monitores con exceso de horas: {e}")
             return []
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Exists, IntegerField, OuterRef
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
 from django.utils import timezone
 from django.conf import settings
 from django.core.mail import send_mail
 from datetime import timedelta
-from .models import Notification
+from .models import Notification, OutboxMessage
 from rooms.models import RoomEntry
 from users.models import User
+from .recipients import AdminRecipientCache
+from .outbox import email_payload, enqueue_email, enqueue_many, enqueue_notification, notification_payload
+from .counters import NotificationCounterCache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -442,6 +448,43 @@ class NotificationService:
             logger.error(f"Error creando notificación: {e}")
             return None
     
+    @staticmethod
+    def notify_users(recipients, notification_type, title, message, related_object_id=None):
+        """
+        Crear la misma notificación para varios usuarios con un solo INSERT
+        """
+        notifications = [
+            Notification(
+                user=recipient,
+                notification_type=notification_type,
+                title=title,
+                message=message,
+                related_object_id=related_object_id
+            )
+            for recipient in recipients
+        ]
+        if not notifications:
+            return []
+
+        try:
+            with transaction.atomic():
+                notifications = Notification.objects.bulk_create(notifications)
+                # bulk_create no emite señales: los contadores se suman aquí
+                NotificationCounterCache.added(notifications)
+            logger.info(f"Notificación {notification_type} creada para {len(notifications)} usuarios")
+            return notifications
+        except Exception as e:
+            logger.error(f"Error creando notificaciones: {e}")
+            return []
+    
+    @staticmethod
+    def notify_admins(notification_type, title, message, related_object_id=None, verified_only=False):
+        """
+        Crear una notificación para todos los administradores activos
+        """
+        admins = AdminRecipientCache.get_admins(verified_only=verified_only)
+        return NotificationService.notify_users(admins, notification_type, title, message, related_object_id)
+    
     @staticmethod
     def notify_excessive_hours(room_entry):
         """
@@ -457,36 +500,14 @@ class NotificationService:
             
             if total_hours > 8:
                 # Obtener todos los administradores
-                admins = User.objects.filter(role='admin', is_active=True)
+                admins = AdminRecipientCache.get_admins()
                 
-                if not admins.exists():
+                if not admins:
                     logger.warning(f"No hay administradores para notificar exceso de horas de {room_entry.user.username}")
                     return False
                 
-                excess_hours = round(total_hours - 8, 2)
-                
-                for admin in admins:
-                    title = f"⚠️ Exceso de Horas - {room_entry.user.get_full_name()}"
-                    message = (
-                        f"El monitor {room_entry.user.get_full_name()} ({room_entry.user.username}) "
-                        f"ha excedido las 8 horas continuas en la sala {room_entry.room.name}.\n\n"
-                        f"⏰ Duración actual: {total_hours:.1f} horas\n"
-                        f"⚠️ Exceso: {excess_hours:.1f} horas\n"
-                        f"🏢 Sala: {room_entry.room.name}\n"
-                        f"📅 Desde: {room_entry.entry_time.strftime('%d/%m/%Y %H:%M')}"
-                    )
-                    
-                    # Crear notificación
-                    NotificationService.create_notification(
-                        user=admin,
-                        notification_type=Notification.EXCESSIVE_HOURS,
-                        title=title,
-                        message=message,
-                        related_object_id=room_entry.id
-                    )
-                    
-                    # Enviar email de alerta
-                    NotificationService.send_excessive_hours_email(admin, room_entry, total_hours, excess_hours)
+                # Encolar la notificación y el email de alerta para todos los administradores
+                enqueue_many(NotificationService.build_excessive_hours_messages(room_entry, total_hours))
                 
                 logger.warning(f"Notificaciones de exceso de horas enviadas para {room_entry.user.username}: {total_hours:.1f}h")
                 return True
@@ -498,35 +519,78 @@ class NotificationService:
             logger.error(f"Error notificando exceso de horas: {e}")
             return False
     
+    @staticmethod
+    def build_excessive_hours_messages(room_entry, total_hours):
+        """
+        Mensajes de la bandeja de salida (notificación y email a administradores)
+        para una entrada que excede las 8 horas continuas
+        """
+        excess_hours = round(total_hours - 8, 2)
+        
+        title = f"⚠️ Exceso de Horas - {room_entry.user.get_full_name()}"
+        message = (
+            f"El monitor {room_entry.user.get_full_name()} ({room_entry.user.username}) "
+            f"ha excedido las 8 horas continuas en la sala {room_entry.room.name}.\n\n"
+            f"⏰ Duración actual: {total_hours:.1f} horas\n"
+            f"⚠️ Exceso: {excess_hours:.1f} horas\n"
+            f"🏢 Sala: {room_entry.room.name}\n"
+            f"📅 Desde: {room_entry.entry_time.strftime('%d/%m/%Y %H:%M')}"
+        )
+        
+        return [
+            (OutboxMessage.NOTIFICATION, notification_payload(
+                notification_type=Notification.EXCESSIVE_HOURS,
+                title=title,
+                message=message,
+                related_object_id=room_entry.id
+            )),
+            (OutboxMessage.EMAIL, email_payload(
+                *NotificationService.build_excessive_hours_email(room_entry, total_hours, excess_hours)
+            )),
+        ]
+    
     @staticmethod
     def send_excessive_hours_email(admin, room_entry, total_hours, excess_hours):
         """
-        Enviar email de alerta por exceso de horas a administradores
+        Encolar email de alerta por exceso de horas para un administrador
         """
         try:
-            subject = f'[DS2] ALERTA: Exceso de Horas - {room_entry.user.get_full_name()}'
-            
-            # Texto plano
-            text_message = (
-                f"ALERTA DE EXCESO DE HORAS\n\n"
-                f"El monitor {room_entry.user.get_full_name()} ({room_entry.user.username}) "
-                f"ha excedido las 8 horas continuas en la sala {room_entry.room.name}.\n\n"
-                f"DATOS DEL USUARIO:\n"
-                f"• Nombre: {room_entry.user.get_full_name()}\n"
-                f"• Username: {room_entry.user.username}\n"
-                f"• Email: {room_entry.user.email}\n"
-                f"• Identificación: {room_entry.user.identification}\n"
-                f"• Teléfono: {room_entry.user.phone}\n\n"
-                f"DATOS DE LA SESIÓN:\n"
-                f"• Sala: {room_entry.room.name}\n"
-                f"• Hora de entrada: {room_entry.entry_time.strftime('%d/%m/%Y %H:%M')}\n"
-                f"• Duración actual: {total_hours:.1f} horas\n"
-                f"• Exceso: {excess_hours:.1f} horas\n\n"
-                f"Esta es una alerta automática del sistema DS2."
+            subject, text_message, html_message = NotificationService.build_excessive_hours_email(
+                room_entry, total_hours, excess_hours
             )
-            
-            # HTML con card profesional
-            html_message = f"""
+            enqueue_email(subject, text_message, html_message, to=admin.email)
+            logger.info(f"Email de exceso de horas encolado para {admin.email}")
+        except Exception as e:
+            logger.error(f"Error encolando email de exceso de horas: {e}")
+    
+    @staticmethod
+    def build_excessive_hours_email(room_entry, total_hours, excess_hours):
+        """
+        Asunto, texto plano y HTML del email de alerta por exceso de horas
+        """
+        subject = f'[DS2] ALERTA: Exceso de Horas - {room_entry.user.get_full_name()}'
+        
+        # Texto plano
+        text_message = (
+            f"ALERTA DE EXCESO DE HORAS\n\n"
+            f"El monitor {room_entry.user.get_full_name()} ({room_entry.user.username}) "
+            f"ha excedido las 8 horas continuas en la sala {room_entry.room.name}.\n\n"
+            f"DATOS DEL USUARIO:\n"
+            f"• Nombre: {room_entry.user.get_full_name()}\n"
+            f"• Username: {room_entry.user.username}\n"
+            f"• Email: {room_entry.user.email}\n"
+            f"• Identificación: {room_entry.user.identification}\n"
+            f"• Teléfono: {room_entry.user.phone}\n\n"
+            f"DATOS DE LA SESIÓN:\n"
+            f"• Sala: {room_entry.room.name}\n"
+            f"• Hora de entrada: {room_entry.entry_time.strftime('%d/%m/%Y %H:%M')}\n"
+            f"• Duración actual: {total_hours:.1f} horas\n"
+            f"• Exceso: {excess_hours:.1f} horas\n\n"
+            f"Esta es una alerta automática del sistema DS2."
+        )
+        
+        # HTML con card profesional
+        html_message = f"""
 <!doctype html>
 <html>
   <body style="font-family:Segoe UI,Arial,sans-serif;background:#f6f7f9;padding:24px;">
@@ -600,20 +664,7 @@ class NotificationService:
   </body>
 </html>
 """
-            
-            send_mail(
-                subject=subject,
-                message=text_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[admin.email],
-                html_message=html_message,
-                fail_silently=True,
-            )
-            
-            logger.info(f"Email de exceso de horas enviado a {admin.email}")
-            
-        except Exception as e:
-            logger.error(f"Error enviando email de exceso de horas: {e}")
+        return subject, text_message, html_message
     
     @staticmethod
     def notify_room_entry(room_entry, is_entry=True):
@@ -633,18 +684,15 @@ class NotificationService:
                 f"📅 Hora: {room_entry.entry_time.strftime('%d/%m/%Y %H:%M')}"
             )
             
-            # Notificar a administradores
-            admins = User.objects.filter(role='admin', is_active=True)
-            for admin in admins:
-                NotificationService.create_notification(
-                    user=admin,
-                    notification_type=Notification.ROOM_ENTRY if is_entry else Notification.ROOM_EXIT,
-                    title=title,
-                    message=message,
-                    related_object_id=room_entry.id
-                )
+            # Notificar a administradores (se entrega desde la bandeja de salida)
+            enqueue_notification(
+                notification_type=Notification.ROOM_ENTRY if is_entry else Notification.ROOM_EXIT,
+                title=title,
+                message=message,
+                related_object_id=room_entry.id
+            )
             
-            logger.info(f"Notificación de {action} enviada para {room_entry.user.username}")
+            logger.info(f"Notificación de {action} encolada para {room_entry.user.username}")
             return True
             
         except Exception as e:
@@ -654,26 +702,32 @@ class NotificationService:
     @staticmethod
     def check_and_notify_excessive_hours():
         """
-        Verificar todas las entradas activas y notificar exceso de horas
+        Verificar las entradas activas y notificar exceso de horas
         Esta función se puede llamar periódicamente (cada hora)
+        
+        Una sola consulta trae las entradas abiertas hace más de 8 horas que no
+        tienen una notificación reciente (ni pendiente en la bandeja de salida),
+        y todas las alertas se encolan con un solo INSERT.
         """
         try:
-            # Obtener todas las entradas activas
-            active_entries = RoomEntry.objects.filter(exit_time__isnull=True)
-            notifications_sent = 0
+            now = timezone.now()
+            entries = list(ExcessiveHoursChecker.get_excessive_entries(now=now, exclude_recently_notified=True))
             
-            for entry in active_entries:
-                # Verificar si ya se envió notificación para esta entrada
-                existing_notification = Notification.objects.filter(
-                    notification_type=Notification.EXCESSIVE_HOURS,
-                    related_object_id=entry.id,
-                    created_at__gte=timezone.now() - timedelta(hours=1)  # No duplicar en 1 hora
-                ).exists()
-                
-                if not existing_notification:
-                    if NotificationService.notify_excessive_hours(entry):
-                        notifications_sent += 1
+            if not entries:
+                logger.info("Verificación de exceso de horas completada. Notificaciones enviadas: 0")
+                return 0
             
+            if not AdminRecipientCache.get_admins():
+                logger.warning("No hay administradores para notificar exceso de horas")
+                return 0
+            
+            messages = []
+            for entry in entries:
+                total_hours = ExcessiveHoursChecker.elapsed_hours(entry, now)
+                messages.extend(NotificationService.build_excessive_hours_messages(entry, total_hours))
+            enqueue_many(messages)
+            
+            notifications_sent = len(entries)
             logger.info(f"Verificación de exceso de horas completada. Notificaciones enviadas: {notifications_sent}")
             return notifications_sent
             
@@ -687,15 +741,17 @@ class NotificationService:
         Obtener resumen de notificaciones para un usuario
         """
         try:
-            notifications = Notification.objects.filter(user=user)
+            # Totales desde los contadores (notifications.counters), sin COUNT
+            counters = NotificationCounterCache.get(user)
             
             return {
-                'total': notifications.count(),
-                'unread': notifications.filter(read=False).count(),
-                'recent': notifications.order_by('-created_at')[:5],
-                'by_type': notifications.values('notification_type').annotate(
-                    count=models.Count('id')
-                ).order_by('-count')
+                'total': counters['total'],
+                'unread': counters['unread'],
+                'recent': Notification.objects.filter(user=user).order_by('-created_at')[:5],
+                'by_type': [
+                    {'notification_type': row['notification_type'], 'count': row['count']}
+                    for row in counters['by_type']
+                ]
             }
             
         except Exception as e:
@@ -707,6 +763,13 @@ class NotificationService:
                 'by_type': []
             }
     
+    @staticmethod
+    def get_unread_count(user):
+        """
+        Número de notificaciones no leídas del usuario (desde los contadores)
+        """
+        return NotificationCounterCache.unread_count(user)
+    
     @staticmethod
     def mark_notification_as_read(notification_id, user):
         """
@@ -714,9 +777,14 @@ class NotificationService:
         """
         try:
             notification = Notification.objects.get(id=notification_id, user=user)
-            notification.read = True
-            notification.read_timestamp = timezone.now()
-            notification.save()
+            
+            with transaction.atomic():
+                # Solo descuenta si esta llamada es la que la marca como leída
+                if Notification.objects.filter(id=notification.id, read=False).update(
+                    read=True,
+                    read_timestamp=timezone.now()
+                ):
+                    NotificationCounterCache.read(user.pk, notification.notification_type)
             
             logger.info(f"Notificación {notification_id} marcada como leída por {user.username}")
             return True
@@ -734,13 +802,16 @@ class NotificationService:
         Marcar todas las notificaciones de un usuario como leídas
         """
         try:
-            updated = Notification.objects.filter(
-                user=user, 
-                read=False
-            ).update(
-                read=True,
-                read_timestamp=timezone.now()
-            )
+            with transaction.atomic():
+                NotificationCounterCache.lock(user)
+                updated = Notification.objects.filter(
+                    user=user, 
+                    read=False
+                ).update(
+                    read=True,
+                    read_timestamp=timezone.now()
+                )
+                NotificationCounterCache.all_read(user)
             
             logger.info(f"{updated} notificaciones marcadas como leídas para {user.username}")
             return updated
@@ -754,6 +825,10 @@ class ExcessiveHoursChecker:
     """
     Clase especializada para verificar y manejar exceso de horas
     """
+    EXCESSIVE_HOURS_LIMIT = 8
+    CRITICAL_HOURS = 12  # Más de 12 horas es crítico
+    # No repetir la alerta de una misma entrada dentro de este intervalo
+    NOTIFICATION_DEBOUNCE = timedelta(hours=1)
     
     @staticmethod
     def check_entry_for_excessive_hours(room_entry):
@@ -783,31 +858,67 @@ class ExcessiveHoursChecker:
                 'warning_threshold': False,
             }
     
+    @staticmethod
+    def elapsed_hours(room_entry, now=None):
+        """Horas transcurridas desde la entrada (hasta la salida si ya salió)"""
+        end = room_entry.exit_time or now or timezone.now()
+        return round((end - room_entry.entry_time).total_seconds() / 3600, 2)
+    
+    @staticmethod
+    def get_excessive_entries(now=None, exclude_recently_notified=False):
+        """
+        Entradas abiertas hace más de EXCESSIVE_HOURS_LIMIT horas, en una consulta.
+        
+        Con `exclude_recently_notified` se descartan (anti-join en la misma
+        consulta) las que ya tienen una notificación de exceso en la última
+        NOTIFICATION_DEBOUNCE o una pendiente en la bandeja de salida.
+        """
+        now = now or timezone.now()
+        entries = RoomEntry.objects.filter(
+            exit_time__isnull=True,
+            entry_time__lt=now - timedelta(hours=ExcessiveHoursChecker.EXCESSIVE_HOURS_LIMIT)
+        ).select_related('user', 'room').order_by('entry_time')
+        
+        if exclude_recently_notified:
+            recent_notifications = Notification.objects.filter(
+                notification_type=Notification.EXCESSIVE_HOURS,
+                related_object_id=OuterRef('id'),
+                created_at__gte=now - ExcessiveHoursChecker.NOTIFICATION_DEBOUNCE
+            )
+            pending_notifications = OutboxMessage.objects.filter(
+                kind=OutboxMessage.NOTIFICATION,
+                status__in=[OutboxMessage.PENDING, OutboxMessage.PROCESSING],
+                payload__notification_type=Notification.EXCESSIVE_HOURS
+            ).annotate(
+                related_object_id=Cast(KeyTextTransform('related_object_id', 'payload'), IntegerField())
+            ).filter(related_object_id=OuterRef('id'))
+            entries = entries.filter(~Exists(recent_notifications), ~Exists(pending_notifications))
+        
+        return entries
+    
     @staticmethod
     def get_monitors_with_excessive_hours():
         """
         Obtener lista de monitores que actualmente exceden las 8 horas
         """
         try:
-            active_entries = RoomEntry.objects.filter(exit_time__isnull=True)
+            now = timezone.now()
             excessive_monitors = []
             
-            for entry in active_entries:
-                check_result = ExcessiveHoursChecker.check_entry_for_excessive_hours(entry)
-                
-                if check_result['exceeds_limit']:
-                    excessive_monitors.append({
-                        'entry_id': entry.id,
-                        'user': entry.user,
-                        'room': entry.room,
-                        'entry_time': entry.entry_time,
-                        'total_hours': check_result['total_hours'],
-                        'excess_hours': check_result['excess_hours'],
-                        'is_critical': check_result['is_critical']
-                    })
+            for entry in ExcessiveHoursChecker.get_excessive_entries(now=now):
+                total_hours = ExcessiveHoursChecker.elapsed_hours(entry, now)
+                excessive_monitors.append({
+                    'entry_id': entry.id,
+                    'user': entry.user,
+                    'room': entry.room,
+                    'entry_time': entry.entry_time,
+                    'total_hours': total_hours,
+                    'excess_hours': max(0, total_hours - ExcessiveHoursChecker.EXCESSIVE_HOURS_LIMIT),
+                    'is_critical': total_hours > ExcessiveHoursChecker.CRITICAL_HOURS
+                })
             
             return excessive_monitors
             
         except Exception as e:
             logger.error(f"Error obteniendo monitores con exceso de horas: {e}")
-            return []
\ No newline at end of file
+            return []
@@ -0,0 +1,52 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .counters import NotificationCounterCache
+from .models import Notification
+
+COUNTED_FIELDS = ('user_id', 'notification_type', 'read')
+
+
+def _counted(user_id, notification_type, read):
+    return {(user_id, notification_type): (1, 0 if read else 1)}
+
+
+@receiver(pre_save, sender=Notification)
+def remember_counted_fields(sender, instance, update_fields=None, **kwargs):
+    """Guarda usuario, tipo y leída antes de modificar una notificación existente"""
+    instance._counted_before = None
+    if instance.pk is None or kwargs.get('raw'):
+        return
+    if update_fields is not None and not {'user', 'user_id', 'notification_type', 'read'} & set(update_fields):
+        return
+    instance._counted_before = (
+        Notification.objects.filter(pk=instance.pk).values_list(*COUNTED_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=Notification)
+def update_counters_on_save(sender, instance, created, **kwargs):
+    """Mantiene los contadores de la campana al crear o modificar una notificación"""
+    if created:
+        NotificationCounterCache.added([instance])
+        return
+
+    before = getattr(instance, '_counted_before', None)
+    after = tuple(getattr(instance, field) for field in COUNTED_FIELDS)
+    if before is None or before == after:
+        return
+
+    deltas = {}
+    for key, (total, unread) in _counted(*before).items():
+        deltas[key] = (-total, -unread)
+    for key, (total, unread) in _counted(*after).items():
+        previous_total, previous_unread = deltas.get(key, (0, 0))
+        deltas[key] = (previous_total + total, previous_unread + unread)
+    NotificationCounterCache.apply(deltas)
+
+
+@receiver(post_delete, sender=Notification)
+def update_counters_on_delete(sender, instance, **kwargs):
+    NotificationCounterCache.apply({
+        (instance.user_id, instance.notification_type): (-1, 0 if instance.read else -1)
+    })
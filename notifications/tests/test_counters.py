@@ -0,0 +1,119 @@
+"""
+Tests para los contadores de notificaciones (campana y resumen)
+"""
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from notifications.counters import NotificationCounterCache
+from notifications.models import Notification
+from notifications.services import NotificationService
+from users.models import User
+
+
+class NotificationCounterTest(TestCase):
+    """Contadores mantenidos al crear, leer y borrar notificaciones"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='admin', email='admin@test.com', password='pass12345',
+            identification='ADM-1', role='admin', is_verified=True
+        )
+        self.other = User.objects.create_user(
+            username='monitor', email='monitor@test.com', password='pass12345',
+            identification='MON-1', role='monitor', is_verified=True
+        )
+        Notification.objects.all().delete()
+
+    def tearDown(self):
+        cache.clear()
+
+    def create(self, notification_type=Notification.ROOM_ENTRY, user=None, **kwargs):
+        return Notification.objects.create(
+            user=user or self.user, notification_type=notification_type,
+            title='Título', message='Mensaje', **kwargs
+        )
+
+    def assertMatchesTable(self, user):
+        """Los contadores coinciden con un COUNT sobre la tabla"""
+        counters = NotificationCounterCache.get(user)
+        notifications = Notification.objects.filter(user=user)
+        self.assertEqual(counters['total'], notifications.count())
+        self.assertEqual(counters['unread'], notifications.filter(read=False).count())
+
+    def test_create_and_bulk_create_are_counted(self):
+        self.create()
+        self.create(Notification.EXCESSIVE_HOURS)
+        self.create(read=True)
+        NotificationService.notify_users([self.user, self.other], Notification.ATTENDANCE, 'Título', 'Mensaje')
+
+        summary = NotificationService.get_user_notifications_summary(self.user)
+
+        self.assertEqual(summary['total'], 4)
+        self.assertEqual(summary['unread'], 3)
+        self.assertEqual(summary['by_type'][0], {'notification_type': Notification.ROOM_ENTRY, 'count': 2})
+        self.assertEqual(len(summary['recent']), 4)
+        self.assertEqual(NotificationService.get_unread_count(self.other), 1)
+
+    def test_unread_count_is_cached(self):
+        self.create()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(NotificationService.get_unread_count(self.user), 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(NotificationService.get_unread_count(self.user), 1)
+
+        # Una notificación nueva descarta el valor en cache
+        self.create()
+        self.assertEqual(NotificationService.get_unread_count(self.user), 2)
+
+    def test_mark_read_counts_once(self):
+        notification = self.create()
+        self.create(Notification.EXCESSIVE_HOURS)
+
+        self.assertTrue(NotificationService.mark_notification_as_read(notification.id, self.user))
+        self.assertTrue(NotificationService.mark_notification_as_read(notification.id, self.user))
+        self.assertFalse(NotificationService.mark_notification_as_read(notification.id, self.other))
+
+        self.assertEqual(NotificationService.get_unread_count(self.user), 1)
+        self.assertMatchesTable(self.user)
+
+    def test_mark_all_read(self):
+        for notification_type in (Notification.ROOM_ENTRY, Notification.ATTENDANCE, Notification.ATTENDANCE):
+            self.create(notification_type)
+        self.create(user=self.other)
+
+        self.assertEqual(NotificationService.mark_all_as_read(self.user), 3)
+
+        self.assertEqual(NotificationService.get_unread_count(self.user), 0)
+        self.assertEqual(NotificationService.get_unread_count(self.other), 1)
+        self.assertMatchesTable(self.user)
+
+    def test_save_and_delete_adjust_counters(self):
+        notification = self.create()
+        read = self.create(Notification.ATTENDANCE, read=True)
+
+        notification.notification_type = Notification.INCAPACITY
+        notification.read = True
+        notification.save()
+        self.assertMatchesTable(self.user)
+
+        read.delete()
+        Notification.objects.filter(user=self.user).delete()
+        self.assertMatchesTable(self.user)
+        self.assertEqual(NotificationService.get_user_notifications_summary(self.user)['by_type'], [])
+
+    def test_unread_count_endpoint(self):
+        self.create()
+        self.create(read=True)
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=self.user)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        response = client.get('/api/notifications/unread-count/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['unread_count'], 1)
@@ -0,0 +1,95 @@
+"""
+Tests para la verificación periódica de exceso de horas basada en conjuntos
+"""
+
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notifications.models import Notification, OutboxMessage
+from notifications.outbox import process_outbox
+from notifications.services import ExcessiveHoursChecker, NotificationService
+from rooms.models import Room, RoomEntry
+from users.models import User
+
+
+@override_settings(OUTBOX_EAGER=False)
+class ExcessiveHoursCheckTest(TestCase):
+    """Una consulta para las entradas excedidas y un INSERT para las alertas"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@test.com', password='pass12345',
+            identification='ADM-1', role='admin', is_verified=True
+        )
+        self.monitors = [
+            User.objects.create_user(
+                username=f'monitor{i}', email=f'monitor{i}@test.com', password='pass12345',
+                identification=f'MON-{i}', role='monitor', is_verified=True
+            )
+            for i in range(4)
+        ]
+        self.rooms = [Room.objects.create(name=f'Sala {i}', code=f'S{i}', capacity=10) for i in range(4)]
+        now = timezone.now()
+        self.long_entries = [
+            RoomEntry.objects.create(user=self.monitors[i], room=self.rooms[i], entry_time=now - timedelta(hours=9 + i))
+            for i in range(2)
+        ]
+        # Sesión normal y sesión larga ya cerrada: no se notifican
+        RoomEntry.objects.create(user=self.monitors[2], room=self.rooms[2], entry_time=now - timedelta(hours=2))
+        RoomEntry.objects.create(
+            user=self.monitors[3], room=self.rooms[3],
+            entry_time=now - timedelta(hours=12), exit_time=now - timedelta(hours=1), active=False
+        )
+        Notification.objects.all().delete()
+        OutboxMessage.objects.all().delete()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_selects_only_long_open_entries(self):
+        with self.assertNumQueries(1):
+            entries = list(ExcessiveHoursChecker.get_excessive_entries(exclude_recently_notified=True))
+            [entry.user.username for entry in entries]
+
+        self.assertEqual(entries, [self.long_entries[1], self.long_entries[0]])
+
+    def test_notifies_in_bulk_and_debounces(self):
+        with self.assertNumQueries(3):  # entradas, administradores e INSERT en la bandeja
+            sent = NotificationService.check_and_notify_excessive_hours()
+
+        self.assertEqual(sent, 2)
+        self.assertEqual(OutboxMessage.objects.filter(kind=OutboxMessage.NOTIFICATION).count(), 2)
+        self.assertEqual(OutboxMessage.objects.filter(kind=OutboxMessage.EMAIL).count(), 2)
+
+        # Pendiente en la bandeja: no se duplica
+        self.assertEqual(NotificationService.check_and_notify_excessive_hours(), 0)
+
+        # Entregada hace menos de una hora: tampoco
+        process_outbox()
+        self.assertEqual(Notification.objects.filter(notification_type=Notification.EXCESSIVE_HOURS).count(), 2)
+        self.assertEqual(NotificationService.check_and_notify_excessive_hours(), 0)
+
+        # Pasado el intervalo se vuelve a notificar
+        Notification.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(NotificationService.check_and_notify_excessive_hours(), 2)
+
+    def test_monitors_with_excessive_hours(self):
+        monitors = ExcessiveHoursChecker.get_monitors_with_excessive_hours()
+
+        self.assertEqual([m['entry_id'] for m in monitors], [self.long_entries[1].id, self.long_entries[0].id])
+        self.assertAlmostEqual(monitors[0]['total_hours'], 10, delta=0.01)
+        self.assertAlmostEqual(monitors[0]['excess_hours'], 2, delta=0.01)
+        self.assertFalse(monitors[0]['is_critical'])
+
+    def test_command(self):
+        out = StringIO()
+
+        call_command('check_excessive_hours', stdout=out)
+
+        self.assertIn('2 notificaciones enviadas', out.getvalue())
@@ -0,0 +1,97 @@
+"""
+Tests para la creación masiva de notificaciones a administradores y la lista
+en cache de destinatarios
+"""
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from notifications.models import Notification
+from notifications.recipients import AdminRecipientCache
+from notifications.services import NotificationService
+from rooms.models import Room, RoomEntry
+from users.models import User
+
+
+class NotificationFanOutTest(TestCase):
+    """Un solo INSERT por notificación masiva y lista de admins en cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.admins = [
+            User.objects.create_user(
+                username=f'admin{i}', email=f'admin{i}@test.com', password='pass12345',
+                identification=f'ADM-{i}', role='admin', is_verified=True
+            )
+            for i in range(3)
+        ]
+        self.monitor = User.objects.create_user(
+            username='monitor', email='monitor@test.com', password='pass12345',
+            identification='MON-1', role='monitor', is_verified=True,
+            first_name='Ana', last_name='Pérez'
+        )
+        self.room = Room.objects.create(name='Sala A', code='SA', capacity=10)
+        Notification.objects.all().delete()
+
+    def tearDown(self):
+        cache.clear()
+
+    def warm_recipients(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            AdminRecipientCache.get_admins()
+
+    def test_notify_admins_single_insert(self):
+        self.warm_recipients()
+
+        # Un INSERT de notificaciones y los contadores (consulta, alta y UPDATE), en un savepoint
+        with self.assertNumQueries(6):
+            created = NotificationService.notify_admins(Notification.ROOM_ENTRY, 'Título', 'Mensaje', related_object_id=7)
+
+        self.assertEqual(len(created), 3)
+        self.assertEqual(
+            sorted(Notification.objects.values_list('user_id', flat=True)),
+            sorted(admin.id for admin in self.admins)
+        )
+        self.assertTrue(all(n.created_at for n in Notification.objects.all()))
+
+    def test_notify_room_entry_uses_fan_out(self):
+        entry = RoomEntry.objects.create(user=self.monitor, room=self.room, entry_time=timezone.now())
+        Notification.objects.all().delete()
+
+        self.assertTrue(NotificationService.notify_room_entry(entry))
+
+        self.assertEqual(Notification.objects.filter(notification_type=Notification.ROOM_ENTRY).count(), 3)
+
+    def test_recipients_cached_until_admin_set_changes(self):
+        self.warm_recipients()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(AdminRecipientCache.get_admins()), 3)
+
+        # Cambios ajenos a la lista no la invalidan
+        self.monitor.first_name = 'Ana María'
+        self.monitor.save()
+        self.assertIsNotNone(cache.get(AdminRecipientCache.KEY))
+
+        self.admins[0].is_active = False
+        self.admins[0].save()
+        self.assertIsNone(cache.get(AdminRecipientCache.KEY))
+
+        self.warm_recipients()
+        self.monitor.role = 'admin'
+        self.monitor.save()
+        self.assertIsNone(cache.get(AdminRecipientCache.KEY))
+        self.assertEqual(len(AdminRecipientCache.get_admins()), 3)
+
+    def test_change_in_same_transaction_is_not_cached_stale(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            AdminRecipientCache.get_admins()
+            self.admins[1].delete()
+
+        self.assertNotIn(self.admins[1].email, [admin.email for admin in AdminRecipientCache.get_admins()])
+
+    def test_verified_only(self):
+        self.admins[2].is_verified = False
+        self.admins[2].save()
+
+        self.assertEqual(len(AdminRecipientCache.get_admins(verified_only=True)), 2)
@@ -0,0 +1,144 @@
+"""
+Tests para la bandeja de salida de notificaciones y correos
+"""
+
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notifications.models import Notification, OutboxMessage
+from notifications.outbox import (
+    MAX_ATTEMPTS,
+    backoff_seconds,
+    claim_batch,
+    enqueue_email,
+    enqueue_notification,
+    process_outbox,
+)
+from notifications.services import NotificationService
+from rooms.models import Room, RoomEntry
+from users.models import User
+
+
+@override_settings(OUTBOX_EAGER=False)
+class OutboxTest(TestCase):
+    """Encolado sin entrega inmediata y entrega por lotes con reintentos"""
+
+    def setUp(self):
+        cache.clear()
+        self.admins = [
+            User.objects.create_user(
+                username=f'admin{i}', email=f'admin{i}@test.com', password='pass12345',
+                identification=f'ADM-{i}', role='admin', is_verified=True
+            )
+            for i in range(2)
+        ]
+        self.monitor = User.objects.create_user(
+            username='monitor', email='monitor@test.com', password='pass12345',
+            identification='MON-1', role='monitor', is_verified=True
+        )
+        self.room = Room.objects.create(name='Sala A', code='SA', capacity=10)
+        Notification.objects.all().delete()
+        OutboxMessage.objects.all().delete()
+        mail.outbox.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_room_entry_only_enqueues(self):
+        entry = RoomEntry.objects.create(user=self.monitor, room=self.room, entry_time=timezone.now())
+        OutboxMessage.objects.all().delete()
+
+        with self.assertNumQueries(1):
+            NotificationService.notify_room_entry(entry)
+
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(process_outbox(), {'sent': 1, 'retried': 0, 'failed': 0})
+        self.assertEqual(Notification.objects.filter(notification_type=Notification.ROOM_ENTRY).count(), 2)
+        self.assertEqual(OutboxMessage.objects.get().status, OutboxMessage.SENT)
+
+    def test_email_to_admins_resolved_on_delivery(self):
+        enqueue_email('Asunto', 'Texto', '<p>HTML</p>')
+        self.assertEqual(len(mail.outbox), 0)
+
+        process_outbox(workers=2)
+
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['admin0@test.com', 'admin1@test.com'])
+
+    def test_failed_recipients_are_retried_with_backoff(self):
+        message = enqueue_email('Asunto', 'Texto', to=['ok@test.com', 'ko@test.com'])
+
+        def fake_batch(emails):
+            return [RuntimeError('SMTP caído') if email['to'] == 'ko@test.com' else None for email in emails]
+
+        with mock.patch('users.email_utils.send_email_batch', side_effect=fake_batch):
+            self.assertEqual(process_outbox(), {'sent': 0, 'retried': 1, 'failed': 0})
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertEqual(message.payload['to'], ['ko@test.com'])
+        self.assertIn('SMTP caído', message.last_error)
+        self.assertGreater(message.available_at, timezone.now() + timedelta(seconds=backoff_seconds(1) - 5))
+        # No se reintenta antes de tiempo
+        self.assertEqual(claim_batch(), [])
+
+        OutboxMessage.objects.filter(id=message.id).update(available_at=timezone.now())
+        with mock.patch('users.email_utils.send_email_batch', side_effect=fake_batch) as send:
+            process_outbox()
+        self.assertEqual([email['to'] for email in send.call_args.args[0]], ['ko@test.com'])
+
+    def test_gives_up_after_max_attempts(self):
+        message = enqueue_email('Asunto', 'Texto', to='ko@test.com')
+        OutboxMessage.objects.filter(id=message.id).update(attempts=MAX_ATTEMPTS - 1)
+
+        with mock.patch('users.email_utils.send_email_batch', return_value=[RuntimeError('caído')]):
+            self.assertEqual(process_outbox(), {'sent': 0, 'retried': 0, 'failed': 1})
+
+        self.assertEqual(OutboxMessage.objects.get().status, OutboxMessage.FAILED)
+
+    def test_expired_claim_is_picked_up_again(self):
+        enqueue_notification(Notification.ROOM_ENTRY, 'Título', 'Mensaje')
+        self.assertEqual(len(claim_batch()), 1)
+        self.assertEqual(claim_batch(), [])
+
+        OutboxMessage.objects.update(available_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(claim_batch()), 1)
+
+    def test_notification_for_specific_users(self):
+        enqueue_notification(Notification.ATTENDANCE, 'Título', 'Mensaje', user_ids=[self.monitor.id])
+
+        process_outbox()
+
+        self.assertEqual(list(Notification.objects.values_list('user_id', flat=True)), [self.monitor.id])
+
+    def test_process_outbox_command(self):
+        enqueue_notification(Notification.ROOM_ENTRY, 'Título', 'Mensaje')
+        enqueue_email('Asunto', 'Texto', to='persona@test.com')
+        out = StringIO()
+
+        call_command('process_outbox', '--once', stdout=out)
+
+        self.assertIn('Enviados: 2', out.getvalue())
+        self.assertFalse(OutboxMessage.objects.exclude(status=OutboxMessage.SENT).exists())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_registration_enqueues_admin_email(self):
+        User.objects.create_user(
+            username='nuevo', email='nuevo@test.com', password='pass12345',
+            identification='MON-2', role='monitor'
+        )
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxMessage.objects.filter(kind=OutboxMessage.EMAIL).count(), 1)
+
+        process_outbox()
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(Notification.objects.filter(notification_type=Notification.ADMIN_VERIFICATION).count(), 2)
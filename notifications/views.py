@@ -360,7 +360,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
         """
         Obtener solo el contador de notificaciones no leídas
         """
-        unread_count = self.get_queryset().filter(read=False).count()
+        unread_count = NotificationService.get_unread_count(request.user)
         return Response({
             'unread_count': unread_count
         })
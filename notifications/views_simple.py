@@ -197,7 +197,7 @@ def notifications_unread_count(request):
     Obtener solo el contador de notificaciones no leídas
     """
     try:
-        unread_count = Notification.objects.filter(user=request.user, read=False).count()
+        unread_count = NotificationService.get_unread_count(request.user)
         return Response({
             'success': True,
             'unread_count': unread_count
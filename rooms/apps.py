@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class RoomsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'rooms'
+
+    def ready(self):
+        # Registrar señales de la app (resumen diario de uso)
+        import rooms.signals  # noqa: F401
@@ -0,0 +1,165 @@
+"""
+Resumen diario materializado de uso de salas (RoomDailyUsage)
+
+Cada fila agrupa, para un (monitor, sala, día local):
+- worked_seconds / session_count: entradas cerradas que empiezan ese día
+- scheduled_seconds: turnos que empiezan ese día
+- overlap_seconds: tiempo de esas entradas que cae dentro de turnos del
+  mismo monitor en la misma sala (ver rooms.overlap)
+
+Las filas se recalculan siempre desde los datos fuente, por lo que refrescar
+una misma clave varias veces es idempotente. Se refrescan al cerrar o
+editar una entrada, al modificar turnos (rooms.signals) y se reconstruyen por completo
+con `python manage.py rebuild_daily_usage`.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .filters import local_day_start
+from .models import RoomDailyUsage, RoomEntry
+from .overlap import calculate_overlaps
+
+logger = logging.getLogger(__name__)
+
+ENTRY_FIELDS = ('id', 'user_id', 'room_id', 'entry_time', 'exit_time')
+SCHEDULE_FIELDS = ('id', 'user_id', 'room_id', 'start_datetime', 'end_datetime')
+
+
+def _seconds(start, end):
+    return max((end - start).total_seconds(), 0)
+
+
+def _compute_values(entries, day_schedules, overlap_schedules):
+    """Totales de una fila a partir de sus entradas y turnos"""
+    overlap_hours = calculate_overlaps(entries, overlap_schedules)['total_worked_hours'] if entries else 0
+    return {
+        'worked_seconds': round(sum(_seconds(e.entry_time, e.exit_time) for e in entries)),
+        'session_count': len(entries),
+        'scheduled_seconds': round(sum(_seconds(s.start_datetime, s.end_datetime) for s in day_schedules)),
+        'overlap_seconds': round(overlap_hours * 3600),
+    }
+
+
+def refresh_daily_usage(user_id, room_id, day):
+    """
+    Recalcula la fila (user_id, room_id, day) desde RoomEntry y Schedule.
+    Si ya no hay entradas cerradas ni turnos ese día, la fila se elimina.
+    Retorna la fila actualizada o None.
+    """
+    from schedule.models import Schedule
+
+    day_start, day_end = local_day_start(day), local_day_start(day + timedelta(days=1))
+
+    entries = list(RoomEntry.objects.filter(
+        user_id=user_id,
+        room_id=room_id,
+        exit_time__isnull=False,
+        entry_time__gte=day_start,
+        entry_time__lt=day_end
+    ).only(*ENTRY_FIELDS))
+
+    schedules = Schedule.objects.filter(user_id=user_id, room_id=room_id).only(*SCHEDULE_FIELDS)
+    day_schedules = list(schedules.filter(start_datetime__gte=day_start, start_datetime__lt=day_end))
+
+    if not entries and not day_schedules:
+        RoomDailyUsage.objects.filter(user_id=user_id, room_id=room_id, date=day).delete()
+        return None
+
+    overlap_schedules = []
+    if entries:
+        # Turnos que pueden cruzarse con alguna entrada del día (aunque empiecen otro día)
+        overlap_schedules = list(schedules.filter(
+            start_datetime__lt=max(e.exit_time for e in entries),
+            end_datetime__gt=min(e.entry_time for e in entries)
+        ))
+
+    row, _ = RoomDailyUsage.objects.update_or_create(
+        user_id=user_id,
+        room_id=room_id,
+        date=day,
+        defaults=_compute_values(entries, day_schedules, overlap_schedules)
+    )
+    return row
+
+
+def refresh_daily_usage_for_entry(entry):
+    """Refresca la fila del día local en que empezó la entrada"""
+    return refresh_daily_usage(entry.user_id, entry.room_id, timezone.localdate(entry.entry_time))
+
+
+def refresh_daily_usage_safely(entry):
+    """
+    Igual que refresh_daily_usage_for_entry pero sin propagar errores:
+    el resumen es derivado y se puede reconstruir con rebuild_daily_usage.
+    """
+    try:
+        refresh_daily_usage_for_entry(entry)
+    except Exception as e:
+        logger.warning(f"Error actualizando resumen diario de la entrada {entry.id}: {e}")
+
+
+def schedule_days(start_datetime, end_datetime):
+    """Días locales que abarca un turno"""
+    day = timezone.localdate(start_datetime)
+    last_day = timezone.localdate(end_datetime)
+    days = [day]
+    while day < last_day:
+        day += timedelta(days=1)
+        days.append(day)
+    return days
+
+
+def rebuild_daily_usage(start_day=None, end_day=None):
+    """
+    Reconstruye el resumen para los días locales [start_day, end_day]
+    (ambos opcionales e inclusivos) en una sola pasada sobre los datos fuente.
+    Retorna el número de filas generadas.
+    """
+    from schedule.models import Schedule
+
+    entries = RoomEntry.objects.filter(exit_time__isnull=False).only(*ENTRY_FIELDS)
+    schedules = Schedule.objects.only(*SCHEDULE_FIELDS)
+    rows = RoomDailyUsage.objects.all()
+
+    if start_day is not None:
+        lower = local_day_start(start_day)
+        entries = entries.filter(entry_time__gte=lower)
+        schedules = schedules.filter(end_datetime__gt=lower)
+        rows = rows.filter(date__gte=start_day)
+    if end_day is not None:
+        upper = local_day_start(end_day + timedelta(days=1))
+        entries = entries.filter(entry_time__lt=upper)
+        rows = rows.filter(date__lte=end_day)
+
+    entries_by_key = defaultdict(list)
+    for entry in entries.iterator():
+        entries_by_key[(entry.user_id, entry.room_id, timezone.localdate(entry.entry_time))].append(entry)
+
+    # Turnos por (usuario, sala) para las superposiciones y por día para lo asignado
+    schedules_by_pair = defaultdict(list)
+    day_schedules_by_key = defaultdict(list)
+    for schedule in schedules.iterator():
+        schedules_by_pair[(schedule.user_id, schedule.room_id)].append(schedule)
+        day = timezone.localdate(schedule.start_datetime)
+        if (start_day is None or day >= start_day) and (end_day is None or day <= end_day):
+            day_schedules_by_key[(schedule.user_id, schedule.room_id, day)].append(schedule)
+
+    new_rows = []
+    for key in set(entries_by_key) | set(day_schedules_by_key):
+        user_id, room_id, day = key
+        values = _compute_values(
+            entries_by_key.get(key, []),
+            day_schedules_by_key.get(key, []),
+            schedules_by_pair.get((user_id, room_id), [])
+        )
+        new_rows.append(RoomDailyUsage(user_id=user_id, room_id=room_id, date=day, **values))
+
+    with transaction.atomic():
+        rows.delete()
+        RoomDailyUsage.objects.bulk_create(new_rows, batch_size=500)
+
+    return len(new_rows)
@@ -0,0 +1,129 @@
+"""
+Filtro compartido de rango de fechas para reportes y listados de entradas
+
+Convierte los parámetros `from`/`to` (o `from_date`/`to_date`) una sola vez por
+request en límites aware en UTC:
+- inicio: 00:00 del día local indicado en `from`
+- fin: 00:00 del día local siguiente a `to` (exclusivo)
+
+Los predicados generados (`campo__gte` / `campo__lt`) son comparaciones de
+rango directas sobre la columna, por lo que pueden usar índices (a diferencia
+de los lookups `__date`).
+"""
+import logging
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_day(value):
+    """Obtiene la fecha calendario de un valor ISO (fecha o datetime)"""
+    if 'T' in value:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).date()
+    return datetime.fromisoformat(value).date()
+
+
+def _parse_int(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def local_day_start(day):
+    """00:00 del día en la zona horaria local, expresado en UTC"""
+    return timezone.make_aware(datetime.combine(day, time.min)).astimezone(dt_timezone.utc)
+
+
+class DateRangeFilter:
+    """
+    Especificación de filtros (fechas, usuario y sala) parseada una sola vez.
+    """
+
+    def __init__(self, from_date='', to_date='', user_id='', room_id=''):
+        self.from_date = (from_date or '').strip()
+        self.to_date = (to_date or '').strip()
+        self.user_id = (user_id or '').strip()
+        self.room_id = (room_id or '').strip()
+        self.errors = []
+
+        self.start = None
+        self.end = None
+
+        if self.from_date:
+            try:
+                self.start = local_day_start(_parse_day(self.from_date))
+            except ValueError as e:
+                logger.warning(f"Error parsing from_date: {e}")
+                self.errors.append('from_date')
+        if self.to_date:
+            try:
+                self.end = local_day_start(_parse_day(self.to_date) + timedelta(days=1))
+            except ValueError as e:
+                logger.warning(f"Error parsing to_date: {e}")
+                self.errors.append('to_date')
+
+        self.user_id_int = _parse_int(self.user_id)
+        self.room_id_int = _parse_int(self.room_id)
+
+    @classmethod
+    def from_request(cls, request, from_param='from_date', to_param='to_date',
+                     user_param='user_id', room_param='room_id'):
+        """
+        Construye (o reutiliza) el filtro para el request actual.
+        El resultado se guarda en el request para no volver a parsear.
+        """
+        cache = getattr(request, '_date_range_filters', None)
+        if cache is None:
+            cache = {}
+            request._date_range_filters = cache
+
+        key = (from_param, to_param, user_param, room_param)
+        if key not in cache:
+            cache[key] = cls(
+                from_date=request.GET.get(from_param, ''),
+                to_date=request.GET.get(to_param, ''),
+                user_id=request.GET.get(user_param, '') if user_param else '',
+                room_id=request.GET.get(room_param, '') if room_param else '',
+            )
+        return cache[key]
+
+    @property
+    def is_valid(self):
+        return not self.errors
+
+    def range_predicates(self, field):
+        """Predicados de rango sargables sobre `field`"""
+        predicates = {}
+        if self.start is not None:
+            predicates[f'{field}__gte'] = self.start
+        if self.end is not None:
+            predicates[f'{field}__lt'] = self.end
+        return predicates
+
+    def predicates(self, field):
+        """Predicados de rango más filtros por usuario y sala"""
+        predicates = self.range_predicates(field)
+        if self.user_id_int is not None:
+            predicates['user_id'] = self.user_id_int
+        if self.room_id_int is not None:
+            predicates['room_id'] = self.room_id_int
+        return predicates
+
+    def apply_to_entries(self, queryset):
+        """Filtra un queryset de RoomEntry por hora de entrada"""
+        return queryset.filter(**self.predicates('entry_time'))
+
+    def apply_to_schedules(self, queryset):
+        """Filtra un queryset de Schedule por inicio del turno"""
+        return queryset.filter(**self.predicates('start_datetime'))
+
+    def as_dict(self):
+        return {
+            'from_date': self.from_date,
+            'to_date': self.to_date,
+            'user_id': self.user_id,
+            'room_id': self.room_id
+        }
@@ -1,36 +1,97 @@
 # rooms/id_reuse.py
 """
 Módulo para reutilización de IDs eliminados
+
+Los huecos de la secuencia se calculan en la base de datos con un anti-join
+sobre la llave primaria (filas cuyo id + 1 no existe), sin traer todos los IDs
+a memoria. La asignación y la inserción se hacen dentro de una transacción
+con un bloqueo por tabla (advisory lock en PostgreSQL) para que dos procesos
+no tomen el mismo hueco.
+
+Cuando no hay huecos no se fija el ID: lo asigna la secuencia de la base de
+datos, que así nunca queda por detrás de los IDs insertados.
 """
-from django.db import transaction
-from django.core.exceptions import ValidationError
+import zlib
+
 from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Count, Exists, Max, Min, OuterRef, Subquery
+
+
+def _lock_id_allocation(model_class):
+    """
+    Serializa la asignación de IDs reutilizados de un modelo hasta el fin de
+    la transacción actual. En SQLite las escrituras ya son serializadas.
+    """
+    if connection.vendor == 'postgresql':
+        key = zlib.crc32(model_class._meta.db_table.encode())
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [key])
+
+
+def find_id_gaps(model_class, limit=10):
+    """
+    Primeros `limit` huecos de la secuencia de IDs, en orden.
+
+    Returns:
+        list: Tuplas (primer_id, ultimo_id) inclusivas
+    """
+    min_id = model_class.objects.aggregate(min_id=Min('id'))['min_id']
+    if min_id is None:
+        return []
+
+    gaps = []
+    if min_id > 1:
+        gaps.append((1, min_id - 1))
+
+    next_id = model_class.objects.filter(id__gt=OuterRef('id')).order_by('id').values('id')[:1]
+    gap_starts = model_class.objects.filter(
+        ~Exists(model_class.objects.filter(id=OuterRef('id') + 1))
+    ).annotate(
+        next_id=Subquery(next_id)
+    ).filter(
+        next_id__isnull=False
+    ).order_by('id').values_list('id', 'next_id')[:max(limit - len(gaps), 0)]
+
+    gaps.extend((start + 1, end - 1) for start, end in gap_starts)
+    return gaps[:limit]
+
+
+def find_free_ids(model_class, count):
+    """
+    Primeros `count` IDs libres por debajo del ID máximo actual.
+    Puede retornar menos si no hay suficientes huecos.
+    """
+    free_ids = []
+    for first, last in find_id_gaps(model_class, limit=count):
+        free_ids.extend(range(first, min(last, first + count - len(free_ids) - 1) + 1))
+        if len(free_ids) >= count:
+            break
+    return free_ids
+
 
 def get_next_available_id(model_class, start_from=1):
     """
     Obtiene el próximo ID disponible más bajo para un modelo
-    Busca desde el ID 1 hacia arriba hasta encontrar el primer disponible
-    
+
     Args:
         model_class: Clase del modelo (ej: RoomEntry, Schedule, etc.)
         start_from: ID mínimo desde el cual buscar (por defecto 1)
-    
+
     Returns:
         int: Próximo ID disponible
     """
     try:
-        # Obtener todos los IDs existentes como conjunto para búsqueda rápida
-        existing_ids = set(
-            model_class.objects.values_list('id', flat=True)
-        )
-        
-        # Buscar desde el ID 1 hacia arriba hasta encontrar uno disponible
-        next_id = start_from
-        while next_id in existing_ids:
-            next_id += 1
-            
-        return next_id
-        
+        queryset = model_class.objects.filter(id__gte=start_from)
+        if not queryset.filter(id=start_from).exists():
+            return start_from
+
+        # Primer id (>= start_from) cuyo siguiente no existe
+        last_taken = queryset.filter(
+            ~Exists(model_class.objects.filter(id=OuterRef('id') + 1))
+        ).order_by('id').values_list('id', flat=True).first()
+        return last_taken + 1
+
     except Exception as e:
         # Si hay error, usar el comportamiento por defecto
         return None
@@ -38,170 +99,106 @@ def get_next_available_id(model_class, start_from=1):
 def create_with_reused_id(model_class, **kwargs):
     """
     Crea un nuevo registro con el ID más bajo disponible
-    
+
     Args:
         model_class: Clase del modelo
         **kwargs: Campos del modelo
-    
+
     Returns:
         Instancia del modelo creada
     """
-    try:
-        with transaction.atomic():
-            # Obtener el próximo ID disponible
-            next_id = get_next_available_id(model_class)
-            
-            if next_id is None:
-                # Si no se puede obtener ID reutilizable, crear normalmente
-                return model_class.objects.create(**kwargs)
-            
-            # Crear el registro con ID específico
-            instance = model_class(id=next_id, **kwargs)
-            instance.save()
-            return instance
-            
-    except Exception as e:
-        # Si hay error, crear normalmente
-        return model_class.objects.create(**kwargs)
+    with transaction.atomic():
+        _lock_id_allocation(model_class)
+        free_ids = find_free_ids(model_class, 1)
+
+        if not free_ids:
+            # Sin huecos: la secuencia de la base de datos asigna el ID
+            return model_class.objects.create(**kwargs)
+
+        return model_class.objects.create(id=free_ids[0], **kwargs)
 
 def bulk_create_with_reused_ids(model_class, objects_data):
     """
     Crea múltiples registros reutilizando IDs
-    
+
     Args:
         model_class: Clase del modelo
         objects_data: Lista de diccionarios con datos de los objetos
-    
+
     Returns:
         Lista de instancias creadas
     """
-    try:
-        with transaction.atomic():
-            # Obtener IDs disponibles
-            existing_ids = set(
-                model_class.objects.values_list('id', flat=True)
-            )
-            
-            created_objects = []
-            next_id = 1
-            
-            for obj_data in objects_data:
-                # Buscar próximo ID disponible
-                while next_id in existing_ids:
-                    next_id += 1
-                
-                # Crear objeto con ID específico
-                instance = model_class(id=next_id, **obj_data)
-                instance.save()
-                created_objects.append(instance)
-                
-                # Agregar ID usado a la lista
-                existing_ids.add(next_id)
-                next_id += 1
-            
-            return created_objects
-            
-    except Exception as e:
-        # Si hay error, crear normalmente
-        return model_class.objects.bulk_create([
-            model_class(**obj_data) for obj_data in objects_data
-        ])
+    objects_data = list(objects_data)
 
-"""
-Sistema de Reutilización de IDs para optimización de base de datos
-Permite reciclar IDs de registros eliminados para mantener eficiencia
-"""
+    with transaction.atomic():
+        _lock_id_allocation(model_class)
+        free_ids = find_free_ids(model_class, len(objects_data))
 
-from django.db import transaction
-from django.apps import apps
+        instances = [model_class(**obj_data) for obj_data in objects_data]
+        for instance, free_id in zip(instances, free_ids):
+            instance.id = free_id
+
+        # Los objetos sin hueco disponible toman su ID de la secuencia
+        return model_class.objects.bulk_create(instances)
 
 
 class IDReuseManager:
     """Administrador de reutilización de IDs para entradas de salas"""
-    
+
     @classmethod
     def get_next_available_id(cls, model_class=None):
         """
         Obtiene el próximo ID disponible, reutilizando IDs eliminados si es posible
-        
+
         Args:
             model_class: Clase del modelo para buscar IDs disponibles
-            
+
         Returns:
             int: Próximo ID disponible para usar
         """
         if model_class is None:
             model_class = apps.get_model('rooms', 'RoomEntry')
 
-        with transaction.atomic():
-            # Obtener todos los IDs existentes ordenados
-            existing_ids = set(
-                model_class.objects.values_list('id', flat=True).order_by('id')
-            )
-            
-            if not existing_ids:
-                return 1
-            
-            # Buscar el primer hueco en la secuencia
-            expected_id = 1
-            for existing_id in sorted(existing_ids):
-                if expected_id < existing_id:
-                    # Encontramos un hueco, usar este ID
-                    return expected_id
-                expected_id = existing_id + 1
-            
-            # No hay huecos, usar el siguiente ID secuencial
-            return expected_id
-    
+        return get_next_available_id(model_class)
+
     @classmethod
     def find_reusable_ids(cls, model_class=None, limit=100):
         """
         Encuentra IDs que pueden ser reutilizados (huecos en la secuencia)
-        
+
         Args:
             model_class: Clase del modelo a analizar
-            limit: Límite de IDs a revisar
-            
+            limit: Máximo de IDs a retornar
+
         Returns:
             list: Lista de IDs disponibles para reutilizar
         """
         if model_class is None:
             model_class = apps.get_model('rooms', 'RoomEntry')
 
-        existing_ids = set(
-            model_class.objects.values_list('id', flat=True).order_by('id')[:limit]
-        )
-        
-        if not existing_ids:
+        if not model_class.objects.exists():
             return [1]
-        
-        max_id = max(existing_ids)
-        all_possible_ids = set(range(1, max_id + 1))
-        
-        # Encontrar IDs faltantes (disponibles para reutilizar)
-        reusable_ids = sorted(all_possible_ids - existing_ids)
-        
-        return reusable_ids
-    
+
+        return find_free_ids(model_class, limit)
+
     @classmethod
     def get_id_statistics(cls, model_class=None):
         """
         Obtiene estadísticas sobre el uso de IDs
-        
+
         Args:
             model_class: Clase del modelo a analizar
-            
+
         Returns:
             dict: Estadísticas del uso de IDs
         """
         if model_class is None:
             model_class = apps.get_model('rooms', 'RoomEntry')
 
-        existing_ids = list(
-            model_class.objects.values_list('id', flat=True).order_by('id')
-        )
-        
-        if not existing_ids:
+        totals = model_class.objects.aggregate(actual_total=Count('id'), max_id=Max('id'))
+        actual_total, max_id = totals['actual_total'], totals['max_id']
+
+        if not actual_total:
             return {
                 'total_records': 0,
                 'max_id': 0,
@@ -209,32 +206,27 @@ class IDReuseManager:
                 'efficiency': 100.0,
                 'gaps_count': 0
             }
-        
-        max_id = max(existing_ids)
-        expected_total = max_id
-        actual_total = len(existing_ids)
-        gaps_count = expected_total - actual_total
-        efficiency = (actual_total / expected_total) * 100 if expected_total > 0 else 100.0
-        
-        reusable_ids = cls.find_reusable_ids(model_class, limit=50)
-        
+
+        gaps_count = max_id - actual_total
+        efficiency = (actual_total / max_id) * 100
+
         return {
             'total_records': actual_total,
             'max_id': max_id,
-            'reusable_ids': reusable_ids[:10],  # Mostrar solo los primeros 10
+            'reusable_ids': find_free_ids(model_class, 10) if gaps_count else [],  # Solo los primeros 10
             'efficiency': round(efficiency, 2),
             'gaps_count': gaps_count
         }
-    
+
     @classmethod
     def optimize_model_ids(cls, model_class=None, dry_run=True):
         """
         Optimiza los IDs de un modelo compactando la secuencia
-        
+
         Args:
             model_class: Clase del modelo a optimizar
             dry_run: Si True, solo simula la optimización sin aplicar cambios
-            
+
         Returns:
             dict: Resultado de la optimización
         """
@@ -249,7 +241,7 @@ class IDReuseManager:
                 'optimization_needed': stats['gaps_count'] > 0,
                 'potential_savings': stats['gaps_count']
             }
-        
+
         # Implementación real de optimización (requiere cuidado con foreign keys)
         # Por seguridad, solo retornamos simulación por ahora
         return {
@@ -260,30 +252,24 @@ class IDReuseManager:
 
 class RoomEntryIDManager(IDReuseManager):
     """Administrador específico para IDs de RoomEntry"""
-    
+
     @classmethod
     def create_with_reused_id(cls, **kwargs):
         """
         Crea una nueva entrada de sala reutilizando ID disponible
-        
+
         Args:
             **kwargs: Parámetros para crear el RoomEntry
-            
+
         Returns:
             RoomEntry: Nueva instancia creada
         """
         # Resolver modelo dinámicamente para evitar import circular
         model_class = apps.get_model('rooms', 'RoomEntry')
+        return create_with_reused_id(model_class, **kwargs)
 
-        # Obtener ID disponible
-        new_id = cls.get_next_available_id(model_class)
-
-        # Crear la instancia con ID específico
-        kwargs['id'] = new_id
-        return model_class.objects.create(**kwargs)
-    
     @classmethod
     def get_room_entry_stats(cls):
         """Estadísticas específicas para RoomEntry"""
         model_class = apps.get_model('rooms', 'RoomEntry')
-        return cls.get_id_statistics(model_class)
\ No newline at end of file
+        return cls.get_id_statistics(model_class)
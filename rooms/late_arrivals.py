@@ -0,0 +1,122 @@
+"""
+Cálculo de llegadas tarde en lote
+
+Reglas:
+- Se permite ingresar hasta EARLY_ALLOW_MINUTES antes del turno (no cuenta como tarde)
+- Período de gracia: GRACE_MINUTES
+- Se toma el PRIMER registro del día del turno en esa sala
+
+Todas las entradas candidatas se obtienen en una sola consulta ordenada por
+(usuario, sala, hora de entrada) y el primer registro de cada turno se busca
+en memoria con búsqueda binaria.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+
+from .filters import local_day_start
+from .models import RoomEntry
+
+EARLY_ALLOW_MINUTES = 10
+GRACE_MINUTES = 5
+
+
+def _local_day_bounds(day):
+    """Inicio y fin (exclusivo) de un día calendario en la zona horaria local"""
+    return local_day_start(day), local_day_start(day + timedelta(days=1))
+
+
+def find_first_entries(schedules):
+    """
+    Busca el primer registro de cada turno con una única consulta.
+
+    Equivale, para cada turno, a:
+        RoomEntry.objects.filter(user=..., room=..., entry_time__date=start.date(),
+                                 entry_time__gte=start - EARLY_ALLOW_MINUTES).order_by('entry_time').first()
+
+    Retorna {schedule_id: RoomEntry | None}.
+    """
+    schedules = list(schedules)
+    if not schedules:
+        return {}
+
+    early = timedelta(minutes=EARLY_ALLOW_MINUTES)
+    day_bounds = {}
+    for schedule in schedules:
+        day = schedule.start_datetime.date()
+        if day not in day_bounds:
+            day_bounds[day] = _local_day_bounds(day)
+
+    lower = min(min(s.start_datetime - early for s in schedules), min(b[0] for b in day_bounds.values()))
+    upper = max(b[1] for b in day_bounds.values())
+
+    candidates = RoomEntry.objects.filter(
+        user_id__in={s.user_id for s in schedules},
+        room_id__in={s.room_id for s in schedules},
+        entry_time__gte=lower,
+        entry_time__lt=upper
+    ).only('id', 'user_id', 'room_id', 'entry_time').order_by('user_id', 'room_id', 'entry_time')
+
+    entries_by_key = defaultdict(list)
+    for entry in candidates:
+        entries_by_key[(entry.user_id, entry.room_id)].append(entry)
+    times_by_key = {key: [e.entry_time for e in entries] for key, entries in entries_by_key.items()}
+
+    first_entries = {}
+    for schedule in schedules:
+        key = (schedule.user_id, schedule.room_id)
+        entries = entries_by_key.get(key)
+        first_entries[schedule.id] = None
+        if not entries:
+            continue
+
+        day_start, day_end = day_bounds[schedule.start_datetime.date()]
+        window_start = max(schedule.start_datetime - early, day_start)
+
+        index = bisect_left(times_by_key[key], window_start)
+        if index < len(entries) and entries[index].entry_time < day_end:
+            first_entries[schedule.id] = entries[index]
+
+    return first_entries
+
+
+def calculate_late_arrivals(schedules, unique_entries=True):
+    """
+    Calcula las llegadas tarde para los turnos dados.
+
+    Con `unique_entries`, un mismo registro solo se evalúa para el primer turno
+    (en el orden recibido) al que corresponde.
+
+    Retorna una lista de diccionarios {'schedule', 'entry', 'delay_minutes'}
+    con las llegadas tarde, en el orden de los turnos.
+    """
+    schedules = list(schedules)
+    first_entries = find_first_entries(schedules)
+
+    processed_entries = set()
+    late_arrivals = []
+
+    for schedule in schedules:
+        first_entry = first_entries.get(schedule.id)
+        if first_entry is None:
+            continue
+        if unique_entries:
+            if first_entry.id in processed_entries:
+                continue
+            processed_entries.add(first_entry.id)
+
+        # Diferencia en minutos respecto al inicio del turno (puede ser negativa si entró antes)
+        time_diff = (first_entry.entry_time - schedule.start_datetime).total_seconds() / 60
+
+        # Entradas hasta 10 min antes no cuentan como tarde (se normaliza a 0)
+        effective_delay = 0 if -EARLY_ALLOW_MINUTES <= time_diff <= 0 else time_diff
+
+        # Llegada tarde si supera los 5 minutos de gracia
+        if effective_delay > GRACE_MINUTES:
+            late_arrivals.append({
+                'schedule': schedule,
+                'entry': first_entry,
+                'delay_minutes': effective_delay
+            })
+
+    return late_arrivals
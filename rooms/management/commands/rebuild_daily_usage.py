@@ -0,0 +1,23 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from rooms.daily_usage import rebuild_daily_usage
+
+
+class Command(BaseCommand):
+    help = 'Reconstruir el resumen diario de uso de salas (horas por monitor, sala y día)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='from_date', help='Primer día a reconstruir (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='to_date', help='Último día a reconstruir (YYYY-MM-DD)')
+    
+    def handle(self, *args, **options):
+        try:
+            start_day = date.fromisoformat(options['from_date']) if options['from_date'] else None
+            end_day = date.fromisoformat(options['to_date']) if options['to_date'] else None
+        except ValueError as e:
+            raise CommandError(f'Fecha inválida: {e}')
+        
+        self.stdout.write('Reconstruyendo resumen diario de uso...')
+        rows = rebuild_daily_usage(start_day, end_day)
+        self.stdout.write(self.style.SUCCESS(f'Se generaron {rows} filas de resumen diario'))
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('rooms', '0003_roomentry_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomDailyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Día calendario local (TIME_ZONE) del resumen')),
+                ('worked_seconds', models.PositiveIntegerField(default=0, help_text='Segundos de permanencia de las entradas cerradas del día')),
+                ('session_count', models.PositiveIntegerField(default=0, help_text='Número de entradas cerradas del día')),
+                ('scheduled_seconds', models.PositiveIntegerField(default=0, help_text='Segundos asignados en turnos que empiezan ese día')),
+                ('overlap_seconds', models.PositiveIntegerField(default=0, help_text='Segundos de las entradas del día que caen dentro de turnos')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('room', models.ForeignKey(help_text='Sala a la que corresponde el resumen', on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='rooms.room')),
+                ('user', models.ForeignKey(help_text='Monitor al que corresponde el resumen', on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Uso Diario de Sala',
+                'verbose_name_plural': 'Usos Diarios de Sala',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='daily_usage_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='roomdailyusage',
+            constraint=models.UniqueConstraint(fields=('user', 'room', 'date'), name='unique_daily_usage_user_room_date'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:47
+
+from django.db import migrations, models
+
+
+def deactivate_duplicate_open_entries(apps, schema_editor):
+    """
+    Antes de crear las restricciones, dejar como máximo una entrada abierta
+    por sala y por usuario. Se conserva la más reciente; las demás se cierran
+    con salida igual a su entrada (sin sumar horas) y una nota, para que
+    ninguna consulta de `exit_time IS NULL` las siga contando.
+    """
+    RoomEntry = apps.get_model('rooms', 'RoomEntry')
+    open_entries = RoomEntry.objects.filter(active=True, exit_time__isnull=True).order_by('-entry_time', '-id')
+
+    seen_rooms = set()
+    seen_users = set()
+    duplicates = []
+    for entry_id, room_id, user_id in open_entries.values_list('id', 'room_id', 'user_id'):
+        if room_id in seen_rooms or user_id in seen_users:
+            duplicates.append(entry_id)
+            continue
+        seen_rooms.add(room_id)
+        seen_users.add(user_id)
+
+    entries = list(RoomEntry.objects.filter(id__in=duplicates))
+    for entry in entries:
+        entry.exit_time = entry.entry_time
+        entry.active = False
+        note = 'CIERRE AUTOMÁTICO: entrada abierta duplicada'
+        entry.notes = f"{entry.notes}. {note}" if entry.notes else note
+    RoomEntry.objects.bulk_update(entries, ['exit_time', 'active', 'notes'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0004_roomdailyusage'),
+    ]
+
+    operations = [
+        migrations.RunPython(deactivate_duplicate_open_entries, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='roomentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('active', True), ('exit_time__isnull', True)), fields=('room',), name='unique_open_entry_per_room'),
+        ),
+        migrations.AddConstraint(
+            model_name='roomentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('active', True), ('exit_time__isnull', True)), fields=('user',), name='unique_open_entry_per_user'),
+        ),
+    ]
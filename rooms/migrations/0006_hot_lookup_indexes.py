@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0005_unique_open_entry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='roomentry',
+            index=models.Index(condition=models.Q(('exit_time__isnull', True)), fields=['room'], name='roomentry_open_room_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roomentry',
+            index=models.Index(condition=models.Q(('exit_time__isnull', True)), fields=['user'], name='roomentry_open_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roomentry',
+            index=models.Index(fields=['user', 'room', 'entry_time'], name='roomentry_user_room_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roomentry',
+            index=models.Index(fields=['entry_time'], name='roomentry_entry_time_idx'),
+        ),
+    ]
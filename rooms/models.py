@@ -83,6 +83,36 @@ class RoomEntry(models.Model):
         verbose_name = 'Registro de Entrada'
         verbose_name_plural = 'Registros de Entrada'
         ordering = ['-entry_time']
+        constraints = [
+            # Un solo monitor por sala y una sola sala por monitor a la vez
+            models.UniqueConstraint(
+                fields=['room'],
+                condition=models.Q(active=True, exit_time__isnull=True),
+                name='unique_open_entry_per_room'
+            ),
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(active=True, exit_time__isnull=True),
+                name='unique_open_entry_per_user'
+            ),
+        ]
+        indexes = [
+            # Ocupación actual (entradas sin salida) por sala y por usuario
+            models.Index(
+                fields=['room'],
+                condition=models.Q(exit_time__isnull=True),
+                name='roomentry_open_room_idx'
+            ),
+            models.Index(
+                fields=['user'],
+                condition=models.Q(exit_time__isnull=True),
+                name='roomentry_open_user_idx'
+            ),
+            # Registros de un monitor en una sala por fecha (llegadas tarde, resúmenes, comparaciones)
+            models.Index(fields=['user', 'room', 'entry_time'], name='roomentry_user_room_time_idx'),
+            # Rangos de fechas de reportes y listados ordenados por entrada
+            models.Index(fields=['entry_time'], name='roomentry_entry_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.room} - {self.entry_time.strftime('%d/%m/%Y %H:%M')}"
@@ -140,3 +170,67 @@ class RoomEntry(models.Model):
         """
         from .id_reuse import RoomEntryIDManager
         return RoomEntryIDManager.get_room_entry_stats()
+
+
+class RoomDailyUsage(models.Model):
+    """
+    Resumen diario (materializado) de uso de sala por monitor.
+    Una fila por (monitor, sala, día local) con los totales de las entradas
+    cerradas ese día y de los turnos que empiezan ese día.
+    Se mantiene en rooms.daily_usage al cerrar entradas y al modificar turnos.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='daily_usage',
+        help_text='Monitor al que corresponde el resumen'
+    )
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='daily_usage',
+        help_text='Sala a la que corresponde el resumen'
+    )
+    date = models.DateField(
+        help_text='Día calendario local (TIME_ZONE) del resumen'
+    )
+    worked_seconds = models.PositiveIntegerField(
+        default=0,
+        help_text='Segundos de permanencia de las entradas cerradas del día'
+    )
+    session_count = models.PositiveIntegerField(
+        default=0,
+        help_text='Número de entradas cerradas del día'
+    )
+    scheduled_seconds = models.PositiveIntegerField(
+        default=0,
+        help_text='Segundos asignados en turnos que empiezan ese día'
+    )
+    overlap_seconds = models.PositiveIntegerField(
+        default=0,
+        help_text='Segundos de las entradas del día que caen dentro de turnos'
+    )
+
+    # Campos de auditoría
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Uso Diario de Sala'
+        verbose_name_plural = 'Usos Diarios de Sala'
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'room', 'date'],
+                name='unique_daily_usage_user_room_date'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='daily_usage_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.room} - {self.date}"
+
+    @property
+    def worked_hours(self):
+        return round(self.worked_seconds / 3600, 2)
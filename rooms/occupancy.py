@@ -0,0 +1,20 @@
+"""
+Ocupación actual de salas (entradas sin hora de salida)
+
+Se anota el queryset de Room con `active_occupants` para obtener la ocupación
+de todas las salas en la misma consulta del listado, en lugar de un COUNT
+por sala. RoomSerializer.occupants_count usa la anotación cuando existe.
+"""
+from django.db.models import Count, Q
+
+from .models import Room
+
+
+def annotate_occupancy(queryset=None):
+    """Anota cada sala con `active_occupants` (entradas sin salida)"""
+    if queryset is None:
+        queryset = Room.objects.all()
+
+    return queryset.annotate(
+        active_occupants=Count('entries', filter=Q(entries__exit_time__isnull=True))
+    )
@@ -0,0 +1,140 @@
+"""
+Motor de superposición entre registros de sala (RoomEntry) y turnos (Schedule)
+
+Agrupa registros y turnos por usuario, los ordena por hora de inicio y recorre
+ambas listas con un barrido (sweep-line), de modo que cada registro solo se
+compara con los turnos que realmente pueden cruzarse con él.
+Costo: O(n log n + k), donde k es el número de superposiciones encontradas.
+"""
+from collections import defaultdict
+
+from django.utils import timezone
+
+
+def get_time_overlap(entry_start, entry_end, schedule_start, schedule_end):
+    """
+    Calcula la superposición en horas entre dos intervalos de tiempo
+    """
+    overlap_start = max(entry_start, schedule_start)
+    overlap_end = min(entry_end, schedule_end)
+
+    if overlap_start >= overlap_end:
+        return 0.0
+
+    overlap_seconds = (overlap_end - overlap_start).total_seconds()
+    return overlap_seconds / 3600.0
+
+
+def filter_schedules(date_filter=None, queryset=None):
+    """
+    Aplica al lado de los turnos los mismos filtros de fecha, usuario y sala
+    que se usan para los registros (ver rooms.filters.DateRangeFilter).
+    Las fechas filtran por inicio del turno.
+    """
+    if queryset is None:
+        from schedule.models import Schedule
+        queryset = Schedule.objects.select_related('user', 'room').all()
+
+    if date_filter is not None:
+        queryset = date_filter.apply_to_schedules(queryset)
+
+    return queryset
+
+
+def _entry_bounds(entry, now):
+    return entry.entry_time, entry.exit_time if entry.exit_time else now
+
+
+def _sweep_user(user_entries, user_schedules, now):
+    """
+    Barrido para un único usuario.
+    Devuelve {entry_id: [(schedule, horas), ...]} solo con superposiciones > 0.
+    """
+    user_entries = sorted(user_entries, key=lambda e: e.entry_time)
+    user_schedules = sorted(user_schedules, key=lambda s: s.start_datetime)
+
+    matches = {}
+    active = []
+    next_schedule = 0
+
+    for entry in user_entries:
+        entry_start, entry_end = _entry_bounds(entry, now)
+
+        # Incorporar turnos que empiezan antes de que termine el registro
+        while (next_schedule < len(user_schedules)
+               and user_schedules[next_schedule].start_datetime < entry_end):
+            active.append(user_schedules[next_schedule])
+            next_schedule += 1
+
+        # Los registros llegan ordenados por inicio: un turno que ya terminó
+        # antes de este registro no puede cruzarse con ninguno posterior
+        active = [s for s in active if s.end_datetime > entry_start]
+
+        for schedule in active:
+            overlap = get_time_overlap(entry_start, entry_end, schedule.start_datetime, schedule.end_datetime)
+            if overlap > 0:
+                matches.setdefault(entry.id, []).append((schedule, overlap))
+
+    return matches
+
+
+def calculate_overlaps(entries, schedules, now=None):
+    """
+    Calcula las horas trabajadas como superposición entre registros y turnos
+    del mismo usuario.
+
+    Retorna un diccionario con:
+    - total_worked_hours / total_assigned_hours / compliance_percentage
+    - user_hours: horas por user_id
+    - schedule_hours: horas por schedule_id
+    - overlaps: lista de (entry, schedule, horas) en el orden de `entries`
+    """
+    if now is None:
+        now = timezone.now()
+
+    entries = list(entries)
+    schedules = list(schedules)
+
+    entries_by_user = defaultdict(list)
+    for entry in entries:
+        entries_by_user[entry.user_id].append(entry)
+
+    schedules_by_user = defaultdict(list)
+    for schedule in schedules:
+        schedules_by_user[schedule.user_id].append(schedule)
+
+    matches = {}
+    for user_id, user_entries in entries_by_user.items():
+        user_schedules = schedules_by_user.get(user_id)
+        if user_schedules:
+            matches.update(_sweep_user(user_entries, user_schedules, now))
+
+    total_worked_hours = 0.0
+    user_hours = {}
+    schedule_hours = {}
+    overlaps = []
+
+    # Respetar el orden original de los registros para la salida
+    for entry in entries:
+        for schedule, overlap in matches.get(entry.id, ()):
+            total_worked_hours += overlap
+            user_hours[entry.user_id] = user_hours.get(entry.user_id, 0) + overlap
+            schedule_hours[schedule.id] = schedule_hours.get(schedule.id, 0) + overlap
+            overlaps.append((entry, schedule, overlap))
+
+    total_assigned_hours = 0
+    for schedule in schedules:
+        total_assigned_hours += (schedule.end_datetime - schedule.start_datetime).total_seconds() / 3600
+
+    compliance_percentage = 0
+    if total_assigned_hours > 0:
+        compliance_percentage = (total_worked_hours / total_assigned_hours) * 100
+
+    return {
+        'total_worked_hours': total_worked_hours,
+        'total_assigned_hours': total_assigned_hours,
+        'compliance_percentage': compliance_percentage,
+        'user_hours': user_hours,
+        'schedule_hours': schedule_hours,
+        'overlaps': overlaps,
+    }
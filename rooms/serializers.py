@@ -19,6 +19,10 @@ class RoomSerializer(serializers.ModelSerializer):
     
     def get_occupants_count(self, obj):
         """Número actual de ocupantes en la sala"""
+        # Salas anotadas con rooms.occupancy.annotate_occupancy (sin consulta extra)
+        active_occupants = getattr(obj, 'active_occupants', None)
+        if active_occupants is not None:
+            return active_occupants
         return RoomEntry.objects.filter(room=obj, exit_time__isnull=True).count()
 
 
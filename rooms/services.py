@@ -1,8 +1,20 @@
+import logging
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Subquery
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from .models import RoomEntry
+from .daily_usage import refresh_daily_usage_safely
 from notifications.services import NotificationService
 
+logger = logging.getLogger(__name__)
+
+# Intervalo mínimo entre cierres automáticos lanzados desde el flujo de entrada
+AUTO_CLOSE_INTERVAL_SECONDS = 60
+AUTO_CLOSE_CACHE_KEY = 'rooms:auto_close:last_run'
+
 
 class ScheduleValidationService:
     """
@@ -44,7 +56,8 @@ class ScheduleValidationService:
         Validar que no haya múltiples monitores en la misma sala simultáneamente
         PETICIÓN 2: "el sistema no debe permitir que 2 monitores permanezcan en la misma"
         """
-        # Verificar entradas activas en la sala
+        # Verificar entradas activas en la sala (búsqueda por el índice parcial
+        # unique_open_entry_per_room)
         active_entries_query = RoomEntry.objects.filter(
             room=room,
             active=True,
@@ -89,6 +102,7 @@ class RoomEntryBusinessLogic:
         Validar que no se pueda ingresar a otra sala sin antes haber salido.
         HU: "No se permite ingresar a otra sala sin antes haber salido"
         """
+        # Búsqueda por el índice parcial unique_open_entry_per_user
         active_entry = RoomEntry.objects.filter(
             user=user,
             active=True,
@@ -103,6 +117,7 @@ class RoomEntryBusinessLogic:
                 'active_room': active_entry.room.name,
                 'entry_time': active_entry.entry_time
             })
+        
         return True
     
     @staticmethod
@@ -174,6 +189,43 @@ class RoomEntryBusinessLogic:
     
 
     
+    @staticmethod
+    def _room_occupied_response(user, room, closed_sessions=None):
+        """Respuesta de sala ocupada por otro monitor (validación o restricción única)"""
+        # Obtener información del monitor actual en la sala
+        current_occupant = RoomEntry.objects.filter(
+            room=room, 
+            active=True, 
+            exit_time__isnull=True
+        ).select_related('user').first()
+        
+        response = {
+            'success': False,
+            'error': 'Sala ocupada por otro monitor',
+            'message': f'La sala {room.name} ({room.code}) está ocupada. Solo se permite un monitor por sala.',
+            'details': {
+                'reason': 'room_occupied',
+                'current_time': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'room': room.code,
+                'requesting_user': user.username
+            }
+        }
+        
+        if current_occupant:
+            duration = timezone.now() - current_occupant.entry_time
+            response['current_occupant'] = {
+                'username': current_occupant.user.username,
+                'name': current_occupant.user.get_full_name() or current_occupant.user.username,
+                'entry_time': current_occupant.entry_time.strftime('%H:%M:%S'),
+                'duration_minutes': int(duration.total_seconds() / 60)
+            }
+            response['message'] += f' Actualmente ocupada por {current_occupant.user.username}.'
+        
+        if closed_sessions:
+            response['info'] = f'Se cerraron {len(closed_sessions)} sesiones vencidas automáticamente.'
+        
+        return response
+    
     @staticmethod
     def create_room_entry_with_validations(user, room, notes=''):
         """
@@ -182,8 +234,9 @@ class RoomEntryBusinessLogic:
         INTEGRACIÓN TAREA 2: Validar turnos y múltiples monitores
         """
         try:
-            # PASO 0: Cerrar sesiones vencidas automáticamente
-            closed_sessions = auto_close_expired_sessions()
+            # PASO 0: Cerrar sesiones vencidas automáticamente (como máximo una vez por intervalo;
+            # el cierre periódico lo hace el comando close_expired_sessions)
+            closed_sessions = auto_close_expired_sessions_if_due()
             
             # VALIDACIÓN 1: Verificar que el monitor tenga turno asignado (TAREA 2)
             try:
@@ -210,54 +263,59 @@ class RoomEntryBusinessLogic:
             
             # VALIDACIÓN 2: Verificar que no haya múltiples monitores en la sala (PETICIÓN 2)
             try:
-                ScheduleValidationService.validate_no_multiple_monitors_in_room(
-                    room=room, 
-                    exclude_user=user
-                )
+                try:
+                    ScheduleValidationService.validate_no_multiple_monitors_in_room(
+                        room=room, 
+                        exclude_user=user
+                    )
+                except ValidationError:
+                    # El ocupante puede tener el turno vencido: cerrar solo esta sala y reintentar
+                    closed_in_room = auto_close_expired_sessions(room=room)
+                    if not closed_in_room:
+                        raise
+                    closed_sessions += closed_in_room
+                    ScheduleValidationService.validate_no_multiple_monitors_in_room(
+                        room=room, 
+                        exclude_user=user
+                    )
             except ValidationError as multi_monitor_error:
-                # Obtener información del monitor actual en la sala
-                current_occupant = RoomEntry.objects.filter(
-                    room=room, 
-                    active=True, 
-                    exit_time__isnull=True
-                ).select_related('user').first()
-                
-                response = {
-                    'success': False,
-                    'error': 'Sala ocupada por otro monitor',
-                    'message': f'La sala {room.name} ({room.code}) está ocupada. Solo se permite un monitor por sala.',
-                    'details': {
-                        'reason': 'room_occupied',
-                        'current_time': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        'room': room.code,
-                        'requesting_user': user.username
-                    }
-                }
-                
-                if current_occupant:
-                    duration = timezone.now() - current_occupant.entry_time
-                    response['current_occupant'] = {
-                        'username': current_occupant.user.username,
-                        'name': current_occupant.user.get_full_name() or current_occupant.user.username,
-                        'entry_time': current_occupant.entry_time.strftime('%H:%M:%S'),
-                        'duration_minutes': int(duration.total_seconds() / 60)
-                    }
-                    response['message'] += f' Actualmente ocupada por {current_occupant.user.username}.'
-                
-                if closed_sessions:
-                    response['info'] = f'Se cerraron {len(closed_sessions)} sesiones vencidas automáticamente.'
-                
-                return response
+                return RoomEntryBusinessLogic._room_occupied_response(user, room, closed_sessions)
             
             # VALIDACIÓN 3: Validar que no haya entrada simultánea del mismo usuario
-            RoomEntryBusinessLogic.validate_no_simultaneous_entry(user)
+            try:
+                RoomEntryBusinessLogic.validate_no_simultaneous_entry(user)
+            except ValidationError:
+                # La entrada activa puede pertenecer a un turno vencido: cerrarla y reintentar
+                closed_for_user = auto_close_expired_sessions(user=user)
+                if not closed_for_user:
+                    raise
+                closed_sessions += closed_for_user
+                RoomEntryBusinessLogic.validate_no_simultaneous_entry(user)
             
-            # Crear la entrada con información del turno
-            entry = RoomEntry.objects.create(
-                user=user,
-                room=room,
-                notes=f"{notes}. Turno ID: {active_schedule.id}" if notes else f"Turno ID: {active_schedule.id}"
-            )
+            # Crear la entrada con información del turno. Las restricciones únicas
+            # (una entrada abierta por sala y por usuario) cierran la carrera entre
+            # validar e insertar cuando llegan solicitudes concurrentes.
+            try:
+                with transaction.atomic():
+                    entry = RoomEntry.objects.create(
+                        user=user,
+                        room=room,
+                        notes=f"{notes}. Turno ID: {active_schedule.id}" if notes else f"Turno ID: {active_schedule.id}"
+                    )
+            except IntegrityError:
+                # Otra solicitud insertó primero. Ambas restricciones equivalen a
+                # las validaciones 2 y 3: se consulta cuál aplica en lugar de
+                # interpretar el mensaje del motor de base de datos.
+                if RoomEntry.objects.filter(
+                    room=room, active=True, exit_time__isnull=True
+                ).exclude(user=user).exists():
+                    return RoomEntryBusinessLogic._room_occupied_response(user, room, closed_sessions)
+                RoomEntryBusinessLogic.validate_no_simultaneous_entry(user)
+                # La entrada en conflicto ya se cerró: mismo error que la validación 3
+                raise ValidationError({
+                    'simultaneous_entry': 'Ya tienes una entrada activa. '
+                                          'Debes salir primero antes de ingresar a otra sala.'
+                })
             
             # Notificar entrada a administradores (no crítico si falla)
             try:
@@ -361,7 +419,7 @@ class RoomEntryBusinessLogic:
             entry.active = False  # Marcar como inactiva
             if notes:
                 entry.notes = notes
-            entry.save()
+            entry.save()  # rooms.signals actualiza el resumen diario de uso
             
             # Notificar salida a administradores (no crítico si falla)
             try:
@@ -491,44 +549,74 @@ class RoomEntryBusinessLogic:
         }
 
 
-def auto_close_expired_sessions():
+def auto_close_expired_sessions(room=None, user=None):
     """
     Cerrar automáticamente sesiones de monitores cuyos turnos han terminado
     SOLUCIÓN MINIMALISTA: Evita bloqueos de sala por sesiones vencidas
+    
+    Las entradas vencidas (activas y con un turno ACTIVO ya terminado del mismo
+    usuario en la misma sala) se obtienen con una sola consulta y se cierran
+    con un único UPDATE en lote. Se puede restringir a una sala o usuario.
     """
     from schedule.models import Schedule
     
     current_time = timezone.now()
     closed_sessions = []
     
-    # Buscar entradas activas cuyo turno ya terminó
-    active_entries = RoomEntry.objects.filter(
+    # Turno vencido del usuario en esa sala (el primero, como referencia para la nota)
+    expired_schedules = Schedule.objects.filter(
+        user=OuterRef('user'),
+        room=OuterRef('room'),
+        status=Schedule.ACTIVE,
+        end_datetime__lt=current_time  # Turno ya terminó
+    ).order_by('start_datetime')
+    
+    expired_entries = RoomEntry.objects.filter(
         active=True,
         exit_time__isnull=True
-    ).select_related('user', 'room')
+    ).annotate(
+        expired_schedule_end=Subquery(expired_schedules.values('end_datetime')[:1])
+    ).filter(expired_schedule_end__isnull=False).select_related('user', 'room')
     
-    for entry in active_entries:
-        # Buscar si el usuario tiene turno vencido en esa sala
-        expired_schedule = Schedule.objects.filter(
-            user=entry.user,
-            room=entry.room,
-            status=Schedule.ACTIVE,
-            end_datetime__lt=current_time  # Turno ya terminó
-        ).first()
+    if room is not None:
+        expired_entries = expired_entries.filter(room=room)
+    if user is not None:
+        expired_entries = expired_entries.filter(user=user)
+    
+    with transaction.atomic():
+        entries = list(expired_entries.select_for_update(of=('self',)))
         
-        if expired_schedule:
+        for entry in entries:
             # Cerrar la sesión automáticamente
             entry.exit_time = current_time
             entry.active = False
-            entry.notes = f"{entry.notes}. CIERRE AUTOMÁTICO: Turno terminado a las {expired_schedule.end_datetime.strftime('%H:%M')}"
-            entry.save()
-            
-            closed_sessions.append({
-                'user': entry.user.username,
-                'room': entry.room.code,
-                'entry_id': entry.id,
-                'schedule_end': expired_schedule.end_datetime,
-                'auto_closed_at': current_time
-            })
+            entry.notes = f"{entry.notes}. CIERRE AUTOMÁTICO: Turno terminado a las {entry.expired_schedule_end.strftime('%H:%M')}"
+            entry.updated_at = current_time
+        
+        RoomEntry.objects.bulk_update(entries, ['exit_time', 'active', 'notes', 'updated_at'], batch_size=500)
     
-    return closed_sessions
\ No newline at end of file
+    for entry in entries:
+        # bulk_update no emite señales: actualizar el resumen diario
+        refresh_daily_usage_safely(entry)
+        
+        closed_sessions.append({
+            'user': entry.user.username,
+            'room': entry.room.code,
+            'entry_id': entry.id,
+            'schedule_end': entry.expired_schedule_end,
+            'auto_closed_at': current_time
+        })
+    
+    return closed_sessions
+
+
+def auto_close_expired_sessions_if_due(interval=AUTO_CLOSE_INTERVAL_SECONDS):
+    """
+    Verificación perezosa acotada en el tiempo: ejecuta auto_close_expired_sessions
+    como máximo una vez cada `interval` segundos (entre todos los procesos que
+    compartan la cache). El cierre periódico corre con el comando
+    `close_expired_sessions`.
+    """
+    if not cache.add(AUTO_CLOSE_CACHE_KEY, timezone.now(), interval):
+        return []
+    return auto_close_expired_sessions()
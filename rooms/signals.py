@@ -0,0 +1,97 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from schedule.models import Schedule
+from .models import RoomEntry
+from .daily_usage import refresh_daily_usage, schedule_days
+
+logger = logging.getLogger(__name__)
+
+
+def _refresh_on_commit(keys):
+    """
+    Refresca las filas del resumen diario al confirmar la transacción, de modo
+    que los borrados en cascada (usuario, sala) ya estén aplicados.
+    """
+    def job():
+        for user_id, room_id, day in keys:
+            try:
+                refresh_daily_usage(user_id, room_id, day)
+            except Exception as e:
+                logger.warning(f"Error actualizando resumen diario ({user_id}, {room_id}, {day}): {e}")
+
+    if keys:
+        transaction.on_commit(job)
+
+
+def _schedule_keys(user_id, room_id, start_datetime, end_datetime):
+    return {(user_id, room_id, day) for day in schedule_days(start_datetime, end_datetime)}
+
+
+@receiver(pre_save, sender=Schedule)
+def remember_previous_schedule(sender, instance, **kwargs):
+    """Guarda usuario, sala y horario anteriores para refrescar también esos días"""
+    instance._daily_usage_previous = None
+    if instance.pk:
+        instance._daily_usage_previous = Schedule.objects.filter(pk=instance.pk).values_list(
+            'user_id', 'room_id', 'start_datetime', 'end_datetime'
+        ).first()
+
+
+@receiver(post_save, sender=Schedule)
+def refresh_daily_usage_on_schedule_save(sender, instance, **kwargs):
+    keys = _schedule_keys(instance.user_id, instance.room_id, instance.start_datetime, instance.end_datetime)
+    previous = getattr(instance, '_daily_usage_previous', None)
+    if previous:
+        keys |= _schedule_keys(*previous)
+    _refresh_on_commit(keys)
+
+
+@receiver(post_delete, sender=Schedule)
+def refresh_daily_usage_on_schedule_delete(sender, instance, **kwargs):
+    _refresh_on_commit(_schedule_keys(instance.user_id, instance.room_id, instance.start_datetime, instance.end_datetime))
+
+
+def _entry_key(user_id, room_id, entry_time, exit_time):
+    """Clave del resumen diario de una entrada cerrada (None si sigue abierta)"""
+    if exit_time is None:
+        return None
+    return (user_id, room_id, timezone.localdate(entry_time))
+
+
+@receiver(pre_save, sender=RoomEntry)
+def remember_previous_entry(sender, instance, raw=False, **kwargs):
+    """Guarda usuario, sala y horario anteriores para refrescar también ese día"""
+    instance._daily_usage_previous = None
+    if instance.pk and not instance._state.adding and not raw:
+        instance._daily_usage_previous = RoomEntry.objects.filter(pk=instance.pk).values_list(
+            'user_id', 'room_id', 'entry_time', 'exit_time'
+        ).first()
+
+
+@receiver(post_save, sender=RoomEntry)
+def refresh_daily_usage_on_entry_save(sender, instance, raw=False, **kwargs):
+    """
+    Salida o edición de una entrada ya guardada (hora, sala, usuario): refrescar
+    el día anterior y el nuevo. Se hace en la misma transacción, de modo que
+    el resumen ya está al día al responder la salida.
+    """
+    previous = getattr(instance, '_daily_usage_previous', None)
+    current = (instance.user_id, instance.room_id, instance.entry_time, instance.exit_time)
+    if raw or previous is None or previous == current:
+        return
+    for key in {_entry_key(*previous), _entry_key(*current)} - {None}:
+        try:
+            refresh_daily_usage(*key)
+        except Exception as e:
+            logger.warning(f"Error actualizando resumen diario ({key}): {e}")
+
+
+@receiver(post_delete, sender=RoomEntry)
+def refresh_daily_usage_on_entry_delete(sender, instance, **kwargs):
+    if instance.exit_time is not None:
+        _refresh_on_commit({(instance.user_id, instance.room_id, timezone.localdate(instance.entry_time))})
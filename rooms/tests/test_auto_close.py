@@ -0,0 +1,175 @@
+"""
+Tests para el cierre automático de sesiones vencidas en lote y la creación
+de entradas con restricciones de entrada abierta
+"""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+from rooms.models import RoomEntry
+from rooms.services import (
+    AUTO_CLOSE_CACHE_KEY,
+    RoomEntryBusinessLogic,
+    auto_close_expired_sessions,
+    auto_close_expired_sessions_if_due,
+)
+from schedule.models import Schedule
+from rooms.tests.test_reports import ReportsBaseTestCase
+
+
+class AutoCloseExpiredSessionsTest(ReportsBaseTestCase):
+    """Cierre con una consulta de candidatas y un UPDATE en lote"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_closes_only_entries_with_expired_schedule(self):
+        self.create_schedule(self.monitor, self.room, 0, 2)
+        expired = self.create_entry(self.monitor, self.room, 10)
+        # Sin turno vencido en esa sala: no se cierra
+        still_open = self.create_entry(self.other_monitor, self.other_room, 10)
+
+        closed = auto_close_expired_sessions()
+
+        self.assertEqual([session['entry_id'] for session in closed], [expired.id])
+        self.assertEqual(closed[0]['user'], self.monitor.username)
+        self.assertEqual(closed[0]['room'], self.room.code)
+        expired.refresh_from_db()
+        self.assertFalse(expired.active)
+        self.assertIsNotNone(expired.exit_time)
+        self.assertIn('CIERRE AUTOMÁTICO: Turno terminado a las', expired.notes)
+        still_open.refresh_from_db()
+        self.assertIsNone(still_open.exit_time)
+
+    def test_restrict_to_room(self):
+        self.create_schedule(self.monitor, self.room, 0, 1)
+        self.create_schedule(self.other_monitor, self.other_room, 0, 1)
+        self.create_entry(self.monitor, self.room, 10)
+        self.create_entry(self.other_monitor, self.other_room, 10)
+
+        closed = auto_close_expired_sessions(room=self.other_room)
+
+        self.assertEqual([session['room'] for session in closed], [self.other_room.code])
+        self.assertEqual(RoomEntry.objects.filter(exit_time__isnull=True).count(), 1)
+
+    def test_lazy_check_runs_once_per_interval(self):
+        self.create_schedule(self.monitor, self.room, 0, 1)
+        self.create_entry(self.monitor, self.room, 10)
+
+        self.assertEqual(len(auto_close_expired_sessions_if_due()), 1)
+
+        self.create_schedule(self.other_monitor, self.other_room, 0, 1)
+        self.create_entry(self.other_monitor, self.other_room, 10)
+        self.assertEqual(auto_close_expired_sessions_if_due(), [])
+
+        cache.delete(AUTO_CLOSE_CACHE_KEY)
+        self.assertEqual(len(auto_close_expired_sessions_if_due()), 1)
+
+    def test_entry_closes_expired_occupant_of_room(self):
+        # El cierre perezoso ya corrió en este intervalo
+        cache.add(AUTO_CLOSE_CACHE_KEY, timezone.now(), 60)
+        self.create_schedule(self.other_monitor, self.room, 0, 1)
+        stale = self.create_entry(self.other_monitor, self.room, 10)
+        now = timezone.now()
+        Schedule.objects.create(
+            user=self.monitor,
+            room=self.room,
+            start_datetime=now - timedelta(minutes=30),
+            end_datetime=now + timedelta(hours=1),
+            status=Schedule.ACTIVE,
+            created_by=self.admin
+        )
+
+        result = RoomEntryBusinessLogic.create_room_entry_with_validations(self.monitor, self.room)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['closed_sessions'], 1)
+        stale.refresh_from_db()
+        self.assertIsNotNone(stale.exit_time)
+
+
+class OpenEntryConstraintTest(ReportsBaseTestCase):
+    """Restricciones únicas de entrada abierta por sala y por usuario"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        cache.add(AUTO_CLOSE_CACHE_KEY, timezone.now(), 60)
+        now = timezone.now()
+        Schedule.objects.create(
+            user=self.monitor,
+            room=self.room,
+            start_datetime=now - timedelta(minutes=30),
+            end_datetime=now + timedelta(hours=1),
+            status=Schedule.ACTIVE,
+            created_by=self.admin
+        )
+
+    def test_concurrent_room_entry_maps_to_room_occupied(self):
+        # Otro proceso insertó una entrada en la sala sin pasar por esta cache
+        RoomEntry.objects.bulk_create([RoomEntry(user=self.other_monitor, room=self.room)])
+
+        result = RoomEntryBusinessLogic.create_room_entry_with_validations(self.monitor, self.room)
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['details']['reason'], 'room_occupied')
+        self.assertEqual(result['current_occupant']['username'], self.other_monitor.username)
+        self.assertEqual(RoomEntry.objects.filter(room=self.room, exit_time__isnull=True).count(), 1)
+
+    def test_concurrent_user_entry_maps_to_simultaneous_entry(self):
+        RoomEntry.objects.bulk_create([RoomEntry(user=self.monitor, room=self.other_room)])
+
+        result = RoomEntryBusinessLogic.create_room_entry_with_validations(self.monitor, self.room)
+
+        self.assertFalse(result['success'])
+        self.assertIn('simultaneous_entry', result['details'])
+        self.assertEqual(RoomEntry.objects.filter(user=self.monitor, exit_time__isnull=True).count(), 1)
+
+    def test_room_constraint_race_maps_to_room_occupied(self):
+        # La otra entrada llega entre la validación y el INSERT
+        RoomEntry.objects.bulk_create([RoomEntry(user=self.other_monitor, room=self.room)])
+
+        with mock.patch(
+            'rooms.services.ScheduleValidationService.validate_no_multiple_monitors_in_room', return_value=True
+        ):
+            result = RoomEntryBusinessLogic.create_room_entry_with_validations(self.monitor, self.room)
+
+        self.assertEqual(result['details']['reason'], 'room_occupied')
+        self.assertEqual(RoomEntry.objects.filter(room=self.room, exit_time__isnull=True).count(), 1)
+
+    def test_user_constraint_race_maps_to_simultaneous_entry(self):
+        RoomEntry.objects.bulk_create([RoomEntry(user=self.monitor, room=self.other_room)])
+        validate = RoomEntryBusinessLogic.validate_no_simultaneous_entry
+        calls = []
+
+        def validate_after_insert(user):
+            # La primera validación no ve la entrada; la posterior al IntegrityError sí
+            calls.append(user)
+            return True if len(calls) == 1 else validate(user)
+
+        with mock.patch(
+            'rooms.services.RoomEntryBusinessLogic.validate_no_simultaneous_entry', side_effect=validate_after_insert
+        ):
+            result = RoomEntryBusinessLogic.create_room_entry_with_validations(self.monitor, self.room)
+
+        self.assertEqual(result['error'], 'Validación fallida')
+        self.assertIn(self.other_room.code, result['details']['simultaneous_entry'][0])
+        self.assertEqual(RoomEntry.objects.filter(user=self.monitor, exit_time__isnull=True).count(), 1)
+
+    def test_user_constraint_race_returns_400(self):
+        RoomEntry.objects.bulk_create([RoomEntry(user=self.monitor, room=self.other_room)])
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.monitor_token.key}')
+
+        with mock.patch(
+            'rooms.services.RoomEntryBusinessLogic.validate_no_simultaneous_entry', return_value=True
+        ):
+            response = self.client.post(reverse('room_entry_create'), {'room': self.room.id}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Validación fallida')
+        self.assertIn('simultaneous_entry', response.data['details'])
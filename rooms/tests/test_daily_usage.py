@@ -0,0 +1,165 @@
+"""
+Tests para el resumen diario materializado de uso de salas (RoomDailyUsage)
+"""
+
+from io import StringIO
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from rooms.models import RoomEntry, RoomDailyUsage
+from rooms.daily_usage import rebuild_daily_usage, refresh_daily_usage
+from rooms.services import RoomEntryBusinessLogic, auto_close_expired_sessions
+from export.serializers import MonitorExportSerializer
+from rooms.tests.test_reports import ReportsBaseTestCase
+
+
+class DailyUsageTest(ReportsBaseTestCase):
+    """Mantenimiento y reconstrucción del resumen diario"""
+
+    def setUp(self):
+        super().setUp()
+        self.day = timezone.localdate(self.base)
+
+    def get_row(self, user=None, room=None):
+        return RoomDailyUsage.objects.get(user=user or self.monitor, room=room or self.room, date=self.day)
+
+    def test_refresh_computes_row_from_sources(self):
+        self.create_schedule(self.monitor, self.room, 0, 2)
+        self.create_entry(self.monitor, self.room, 30, 120)
+        self.create_entry(self.monitor, self.room, 200, 10)
+        self.create_entry(self.monitor, self.room, 300)  # Sin salida: no cuenta
+
+        refresh_daily_usage(self.monitor.id, self.room.id, self.day)
+        refresh_daily_usage(self.monitor.id, self.room.id, self.day)
+
+        row = self.get_row()
+        self.assertEqual(RoomDailyUsage.objects.count(), 1)
+        self.assertEqual(row.session_count, 2)
+        self.assertEqual(row.worked_seconds, 130 * 60)
+        self.assertEqual(row.scheduled_seconds, 2 * 3600)
+        self.assertEqual(row.overlap_seconds, 90 * 60)
+
+    def test_refresh_removes_empty_row(self):
+        entry = self.create_entry(self.monitor, self.room, 30, 60)
+        refresh_daily_usage(self.monitor.id, self.room.id, self.day)
+        self.assertEqual(RoomDailyUsage.objects.count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.delete()
+
+        self.assertFalse(RoomDailyUsage.objects.exists())
+
+    def test_exit_updates_daily_usage(self):
+        entry = RoomEntry.objects.create(
+            user=self.monitor,
+            room=self.room,
+            entry_time=timezone.now() - timedelta(minutes=45)
+        )
+
+        result = RoomEntryBusinessLogic.exit_room_entry_with_validations(self.monitor, entry.id)
+
+        self.assertTrue(result['success'])
+        row = RoomDailyUsage.objects.get(user=self.monitor, room=self.room, date=timezone.localdate(entry.entry_time))
+        self.assertEqual(row.session_count, 1)
+        self.assertAlmostEqual(row.worked_seconds, 45 * 60, delta=5)
+
+    def test_editing_closed_entry_refreshes_old_and_new_day(self):
+        entry = self.create_entry(self.monitor, self.room, 30, 60)
+        refresh_daily_usage(self.monitor.id, self.room.id, self.day)
+
+        entry.exit_time = entry.entry_time + timedelta(minutes=90)
+        entry.save()
+        self.assertEqual(self.get_row().worked_seconds, 90 * 60)
+
+        entry.room = self.other_room
+        entry.entry_time -= timedelta(days=1)
+        entry.exit_time -= timedelta(days=1)
+        entry.save()
+
+        self.assertFalse(RoomDailyUsage.objects.filter(room=self.room).exists())
+        row = RoomDailyUsage.objects.get(user=self.monitor, room=self.other_room, date=self.day - timedelta(days=1))
+        self.assertEqual(row.worked_seconds, 90 * 60)
+
+    def test_auto_close_updates_daily_usage(self):
+        self.create_schedule(self.monitor, self.room, 0, 2)
+        self.create_entry(self.monitor, self.room, 10)
+
+        closed = auto_close_expired_sessions()
+
+        self.assertEqual(len(closed), 1)
+        row = self.get_row()
+        self.assertEqual(row.session_count, 1)
+        self.assertEqual(row.overlap_seconds, 110 * 60)
+
+    def test_schedule_changes_refresh_rows(self):
+        self.create_entry(self.monitor, self.room, 30, 60)
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule = self.create_schedule(self.monitor, self.room, 0, 1)
+
+        self.assertEqual(self.get_row().overlap_seconds, 30 * 60)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule.end_datetime = self.base + timedelta(hours=2)
+            schedule.save()
+
+        row = self.get_row()
+        self.assertEqual(row.overlap_seconds, 60 * 60)
+        self.assertEqual(row.scheduled_seconds, 2 * 3600)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule.delete()
+
+        row = self.get_row()
+        self.assertEqual(row.overlap_seconds, 0)
+        self.assertEqual(row.scheduled_seconds, 0)
+
+    def test_rebuild_matches_incremental_refresh(self):
+        self.create_schedule(self.monitor, self.room, 0, 2)
+        self.create_schedule(self.other_monitor, self.other_room, 3, 2)
+        self.create_entry(self.monitor, self.room, -20, 100)
+        self.create_entry(self.other_monitor, self.other_room, 200, 90)
+        self.create_entry(self.monitor, self.other_room, 300, 30)
+
+        keys = [
+            (self.monitor.id, self.room.id, self.day),
+            (self.other_monitor.id, self.other_room.id, self.day),
+            (self.monitor.id, self.other_room.id, self.day),
+        ]
+        for key in keys:
+            refresh_daily_usage(*key)
+        incremental = sorted(RoomDailyUsage.objects.values_list(
+            'user_id', 'room_id', 'date', 'worked_seconds', 'session_count', 'scheduled_seconds', 'overlap_seconds'
+        ))
+
+        RoomDailyUsage.objects.all().delete()
+        self.assertEqual(rebuild_daily_usage(), 3)
+        rebuilt = sorted(RoomDailyUsage.objects.values_list(
+            'user_id', 'room_id', 'date', 'worked_seconds', 'session_count', 'scheduled_seconds', 'overlap_seconds'
+        ))
+
+        self.assertEqual(rebuilt, incremental)
+
+    def test_rebuild_command_limits_range(self):
+        self.create_entry(self.monitor, self.room, 30, 60)
+        self.create_entry(self.monitor, self.room, 30 - 24 * 60, 60)
+        previous_day = self.day - timedelta(days=1)
+        RoomDailyUsage.objects.create(user=self.monitor, room=self.room, date=previous_day, worked_seconds=1)
+
+        out = StringIO()
+        call_command('rebuild_daily_usage', '--from', self.day.isoformat(), '--to', self.day.isoformat(), stdout=out)
+
+        self.assertIn('1 filas', out.getvalue())
+        self.assertEqual(self.get_row().worked_seconds, 3600)
+        # Los días fuera del rango no se tocan
+        self.assertEqual(RoomDailyUsage.objects.get(date=previous_day).worked_seconds, 1)
+
+    def test_export_total_hours_reads_daily_usage(self):
+        self.create_entry(self.monitor, self.room, 30, 90)
+        self.create_entry(self.monitor, self.other_room, 300, 30)
+        rebuild_daily_usage()
+
+        data = MonitorExportSerializer(self.monitor).data
+
+        self.assertEqual(data['total_hours_worked'], 2.0)
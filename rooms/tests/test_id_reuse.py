@@ -0,0 +1,82 @@
+"""
+Tests para la asignación de IDs reutilizados calculada en la base de datos
+"""
+
+from rooms.id_reuse import (
+    IDReuseManager,
+    RoomEntryIDManager,
+    bulk_create_with_reused_ids,
+    find_id_gaps,
+    get_next_available_id,
+)
+from rooms.models import RoomEntry
+from rooms.tests.test_reports import ReportsBaseTestCase
+
+
+class IDReuseTest(ReportsBaseTestCase):
+    """Huecos, asignación y estadísticas sin cargar todos los IDs"""
+
+    def create_entries_with_ids(self, ids):
+        for entry_id in ids:
+            RoomEntry.objects.create(
+                id=entry_id, user=self.monitor, room=self.room,
+                entry_time=self.base, exit_time=self.base, active=False
+            )
+
+    def closed_entry_data(self):
+        return {'user': self.monitor, 'room': self.room, 'entry_time': self.base, 'exit_time': self.base, 'active': False}
+
+    def test_find_gaps(self):
+        self.create_entries_with_ids([3, 4, 7, 8, 12])
+
+        self.assertEqual(find_id_gaps(RoomEntry), [(1, 2), (5, 6), (9, 11)])
+        self.assertEqual(find_id_gaps(RoomEntry, limit=2), [(1, 2), (5, 6)])
+        self.assertEqual(IDReuseManager.find_reusable_ids(RoomEntry, limit=5), [1, 2, 5, 6, 9])
+
+    def test_next_available_id(self):
+        self.assertEqual(get_next_available_id(RoomEntry), 1)
+        self.create_entries_with_ids([1, 2, 4])
+        self.assertEqual(get_next_available_id(RoomEntry), 3)
+        self.assertEqual(get_next_available_id(RoomEntry, start_from=4), 5)
+        self.assertEqual(IDReuseManager.get_next_available_id(), 3)
+
+    def test_create_fills_first_gap_in_constant_queries(self):
+        self.create_entries_with_ids([1, 2, 4])
+
+        with self.assertNumQueries(5):  # savepoint, mínimo, huecos, insert y release
+            entry = RoomEntryIDManager.create_with_reused_id(**self.closed_entry_data())
+
+        self.assertEqual(entry.id, 3)
+
+    def test_create_without_gaps_uses_sequence(self):
+        self.create_entries_with_ids([1, 2])
+
+        entry = RoomEntryIDManager.create_with_reused_id(**self.closed_entry_data())
+
+        self.assertEqual(entry.id, 3)
+
+    def test_bulk_create_fills_gaps_then_sequence(self):
+        self.create_entries_with_ids([2, 5])
+
+        created = bulk_create_with_reused_ids(RoomEntry, [self.closed_entry_data() for _ in range(4)])
+
+        self.assertEqual(len(created), 4)
+        self.assertEqual(sorted(RoomEntry.objects.values_list('id', flat=True)), [1, 2, 3, 4, 5, 6])
+
+    def test_statistics_use_aggregates(self):
+        self.create_entries_with_ids([2, 3, 6])
+
+        with self.assertNumQueries(3):
+            stats = RoomEntryIDManager.get_room_entry_stats()
+
+        self.assertEqual(stats['total_records'], 3)
+        self.assertEqual(stats['max_id'], 6)
+        self.assertEqual(stats['gaps_count'], 3)
+        self.assertEqual(stats['reusable_ids'], [1, 4, 5])
+        self.assertEqual(stats['efficiency'], 50.0)
+
+    def test_statistics_empty_table(self):
+        stats = IDReuseManager.get_id_statistics(RoomEntry)
+
+        self.assertEqual(stats['reusable_ids'], [1])
+        self.assertEqual(stats['gaps_count'], 0)
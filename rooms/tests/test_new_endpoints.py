@@ -305,7 +305,8 @@ class NewModelsMethodsTest(TestCase):
         entry1 = RoomEntry.objects.create(
             user=self.user,
             room=self.room,
-            entry_time=timezone.now()
+            entry_time=timezone.now(),
+            exit_time=timezone.now()
         )
         
         entry2 = RoomEntry.objects.create(
@@ -0,0 +1,108 @@
+"""
+Tests de planes de consulta: las consultas calientes de salas y turnos usan
+los índices compuestos/parciales de RoomEntry y Schedule.
+
+En SQLite se revisa EXPLAIN QUERY PLAN; en PostgreSQL se desactiva el
+seq scan dentro de la transacción del test para que el plan muestre el
+índice elegido aun con tablas pequeñas.
+"""
+
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from rooms.filters import local_day_start
+from rooms.models import RoomEntry
+from schedule.models import Schedule
+
+
+class HotQueryPlansTest(TestCase):
+    """Cada forma de consulta caliente debe resolverse con su índice"""
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        elif connection.vendor != 'sqlite':
+            self.skipTest(f'Planes de consulta no verificados para {connection.vendor}')
+
+        self.now = timezone.now()
+        self.day_start = local_day_start(timezone.localdate())
+        self.day_end = self.day_start + timedelta(days=1)
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f'Plan sin {index_name}:\n{plan}')
+
+    def test_room_occupancy_lookup(self):
+        # ScheduleValidationService.validate_no_multiple_monitors_in_room
+        self.assertUsesIndex(
+            RoomEntry.objects.filter(room_id=1, active=True, exit_time__isnull=True),
+            'unique_open_entry_per_room'
+        )
+        # RoomSerializer.get_occupants_count / room_current_occupants_view
+        self.assertUsesIndex(
+            RoomEntry.objects.filter(room_id=1, exit_time__isnull=True),
+            'roomentry_open_room_idx'
+        )
+
+    def test_user_active_entry_lookup(self):
+        # RoomEntryBusinessLogic.validate_no_simultaneous_entry / get_user_active_session
+        self.assertUsesIndex(
+            RoomEntry.objects.filter(user_id=1, active=True, exit_time__isnull=True),
+            'unique_open_entry_per_user'
+        )
+        # DashboardService.get_monitor_dashboard_data
+        self.assertUsesIndex(
+            RoomEntry.objects.filter(user_id=1, exit_time__isnull=True),
+            'roomentry_open_user_idx'
+        )
+
+    def test_user_room_day_entries(self):
+        # rooms.late_arrivals.find_first_entries / rooms.daily_usage.refresh_daily_usage
+        self.assertUsesIndex(
+            RoomEntry.objects.filter(
+                user_id=1, room_id=1, entry_time__gte=self.day_start, entry_time__lt=self.day_end
+            ),
+            'roomentry_user_room_time_idx'
+        )
+
+    def test_report_entry_range(self):
+        # rooms.filters.DateRangeFilter.apply_to_entries (reportes y listados admin)
+        self.assertUsesIndex(
+            RoomEntry.objects.filter(entry_time__gte=self.day_start, entry_time__lt=self.day_end),
+            'roomentry_entry_time_idx'
+        )
+
+    def test_schedule_room_access(self):
+        # schedule.services.ScheduleValidationService.validate_room_access_permission
+        self.assertUsesIndex(
+            Schedule.objects.filter(
+                user_id=1,
+                room_id=1,
+                status=Schedule.ACTIVE,
+                start_datetime__gte=self.now - timedelta(days=1),
+                start_datetime__lt=self.now + timedelta(days=1)
+            ),
+            'schedule_user_room_status_idx'
+        )
+
+    def test_schedule_overdue_scan(self):
+        # schedule.services: turnos activos vencidos de las últimas 24 horas
+        self.assertUsesIndex(
+            Schedule.objects.filter(
+                status=Schedule.ACTIVE,
+                start_datetime__lt=self.now - timedelta(minutes=5),
+                start_datetime__gte=self.now - timedelta(hours=24)
+            ),
+            'schedule_status_start_idx'
+        )
+
+    def test_report_schedule_range(self):
+        # rooms.overlap.filter_schedules (reportes)
+        self.assertUsesIndex(
+            Schedule.objects.filter(start_datetime__gte=self.day_start, start_datetime__lt=self.day_end),
+            'schedule_start_idx'
+        )
@@ -0,0 +1,346 @@
+"""
+Tests para los cálculos de reportes (superposición turnos vs registros)
+"""
+
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from datetime import datetime, timedelta
+
+from rooms.models import Room, RoomEntry
+from rooms.overlap import calculate_overlaps, get_time_overlap
+from rooms.filters import DateRangeFilter
+from rooms.utils import BOGOTA_TZ, generar_comparacion_turnos_registros
+from rooms.late_arrivals import EARLY_ALLOW_MINUTES, calculate_late_arrivals, find_first_entries
+from schedule.models import Schedule
+
+User = get_user_model()
+
+
+class ReportsBaseTestCase(TestCase):
+    """Datos comunes: un admin, dos monitores y dos salas"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin_reports',
+            identification='900000001',
+            email='admin_reports@test.com',
+            password='admin123',
+            role='admin',
+            is_verified=True,
+            is_staff=True
+        )
+        self.monitor = User.objects.create_user(
+            username='monitor_reports',
+            identification='900000002',
+            email='monitor_reports@test.com',
+            password='test123',
+            role='monitor',
+            is_verified=True
+        )
+        self.other_monitor = User.objects.create_user(
+            username='monitor_reports_2',
+            identification='900000003',
+            email='monitor_reports_2@test.com',
+            password='test123',
+            role='monitor',
+            is_verified=True
+        )
+        self.room = Room.objects.create(name='Sala Reportes', code='SR001', capacity=20)
+        self.other_room = Room.objects.create(name='Sala Reportes 2', code='SR002', capacity=20)
+
+        self.admin_token = Token.objects.create(user=self.admin)
+        self.monitor_token = Token.objects.create(user=self.monitor)
+        self.client = APIClient()
+
+        self.base = (timezone.now() - timedelta(days=2)).replace(hour=8, minute=0, second=0, microsecond=0)
+
+    def create_schedule(self, user, room, start_offset_hours, duration_hours):
+        start = self.base + timedelta(hours=start_offset_hours)
+        return Schedule.objects.create(
+            user=user,
+            room=room,
+            start_datetime=start,
+            end_datetime=start + timedelta(hours=duration_hours),
+            status=Schedule.ACTIVE,
+            created_by=self.admin
+        )
+
+    def create_entry(self, user, room, start_offset_minutes, duration_minutes=None):
+        entry_time = self.base + timedelta(minutes=start_offset_minutes)
+        exit_time = entry_time + timedelta(minutes=duration_minutes) if duration_minutes is not None else None
+        return RoomEntry.objects.create(
+            user=user,
+            room=room,
+            entry_time=entry_time,
+            exit_time=exit_time,
+            active=exit_time is None
+        )
+
+
+class OverlapEngineTest(ReportsBaseTestCase):
+    """Pruebas del motor de superposición por barrido"""
+
+    def brute_force_total(self, entries, schedules):
+        total = 0.0
+        for entry in entries:
+            for schedule in schedules:
+                if schedule.user_id == entry.user_id:
+                    total += get_time_overlap(entry.entry_time, entry.exit_time,
+                                              schedule.start_datetime, schedule.end_datetime)
+        return total
+
+    def test_matches_pairwise_calculation(self):
+        schedules = [
+            self.create_schedule(self.monitor, self.room, 0, 4),
+            self.create_schedule(self.monitor, self.other_room, 5, 2),
+            self.create_schedule(self.monitor, self.room, 24, 3),
+            self.create_schedule(self.other_monitor, self.room, 1, 6),
+        ]
+        entries = [
+            self.create_entry(self.monitor, self.room, -20, 200),
+            self.create_entry(self.monitor, self.other_room, 290, 600),
+            self.create_entry(self.monitor, self.room, 24 * 60 + 30, 60),
+            self.create_entry(self.other_monitor, self.room, 30, 120),
+            self.create_entry(self.other_monitor, self.room, 600, 30),
+        ]
+
+        result = calculate_overlaps(entries, schedules)
+
+        self.assertAlmostEqual(result['total_worked_hours'], self.brute_force_total(entries, schedules))
+        self.assertAlmostEqual(result['total_assigned_hours'], 15.0)
+        self.assertAlmostEqual(result['user_hours'][self.other_monitor.id], 1.5)
+        self.assertEqual(len(result['overlaps']), 4)
+
+    def test_overlaps_keep_entry_order(self):
+        schedule = self.create_schedule(self.monitor, self.room, 0, 8)
+        late = self.create_entry(self.monitor, self.room, 300, 30)
+        early = self.create_entry(self.monitor, self.room, 10, 30)
+
+        result = calculate_overlaps([late, early], [schedule])
+
+        self.assertEqual([entry.id for entry, _, _ in result['overlaps']], [late.id, early.id])
+        self.assertAlmostEqual(result['schedule_hours'][schedule.id], 1.0)
+
+    def test_no_schedules_gives_zero_compliance(self):
+        entry = self.create_entry(self.monitor, self.room, 0, 60)
+
+        result = calculate_overlaps([entry], [])
+
+        self.assertEqual(result['total_worked_hours'], 0.0)
+        self.assertEqual(result['compliance_percentage'], 0)
+        self.assertEqual(result['overlaps'], [])
+
+
+class WorkedHoursEndpointTest(ReportsBaseTestCase):
+    """Pruebas del endpoint de horas trabajadas"""
+
+    def test_worked_hours_filters_schedules_by_user(self):
+        self.create_schedule(self.monitor, self.room, 0, 4)
+        self.create_schedule(self.other_monitor, self.room, 0, 4)
+        self.create_entry(self.monitor, self.room, 0, 120)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        response = self.client.get(reverse('calculate_worked_hours'), {'user_id': self.monitor.id})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['schedules_processed'], 1)
+        self.assertEqual(response.data['total_worked_hours'], 2.0)
+        self.assertEqual(response.data['total_assigned_hours'], 4.0)
+        self.assertEqual(response.data['compliance_percentage'], 50.0)
+        self.assertIn(f"{self.monitor.username} (ID: {self.monitor.id})", response.data['user_hours'])
+
+    def test_report_stats_uses_overlap_engine(self):
+        self.create_schedule(self.monitor, self.room, 0, 2)
+        self.create_entry(self.monitor, self.room, 30, 120)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        response = self.client.get(reverse('calculate_report_stats'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_worked_hours'], 1.5)
+        self.assertEqual(response.data['remaining_hours'], 0.5)
+        self.assertEqual(response.data['compliance_percentage'], 75.0)
+
+    def test_report_stats_match_overlap_engine(self):
+        # Registro en otra sala que el turno y turno de otro monitor filtrado
+        self.create_schedule(self.monitor, self.room, 0, 2)
+        self.create_schedule(self.other_monitor, self.room, 0, 3)
+        self.create_entry(self.monitor, self.other_room, 30, 120)
+        self.create_entry(self.monitor, self.room, 200, 30)
+        self.create_entry(self.other_monitor, self.room, 0, 60)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        response = self.client.get(reverse('calculate_report_stats'), {'user_id': self.monitor.id})
+
+        entries = list(RoomEntry.objects.filter(user=self.monitor, exit_time__isnull=False))
+        expected = calculate_overlaps(entries, list(Schedule.objects.filter(user=self.monitor)))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_worked_hours'], round(expected['total_worked_hours'], 4))
+        self.assertEqual(response.data['total_assigned_hours'], round(expected['total_assigned_hours'], 4))
+        self.assertEqual(response.data['compliance_percentage'], round(expected['compliance_percentage'], 2))
+        self.assertEqual(response.data['total_worked_hours'], 1.5)
+        self.assertEqual(response.data['entries_processed'], 2)
+        self.assertEqual(response.data['schedules_processed'], 1)
+
+
+class LateArrivalsTest(ReportsBaseTestCase):
+    """Pruebas del cálculo de llegadas tarde en lote"""
+
+    def reference_first_entry(self, schedule):
+        return RoomEntry.objects.filter(
+            user=schedule.user,
+            room=schedule.room,
+            entry_time__date=schedule.start_datetime.date(),
+            entry_time__gte=schedule.start_datetime - timedelta(minutes=EARLY_ALLOW_MINUTES)
+        ).order_by('entry_time').first()
+
+    def test_first_entries_match_per_schedule_queries(self):
+        self.create_schedule(self.monitor, self.room, 0, 2)
+        self.create_schedule(self.monitor, self.room, 3, 2)
+        self.create_schedule(self.monitor, self.other_room, 24, 2)
+        self.create_schedule(self.other_monitor, self.room, 0, 2)
+        self.create_entry(self.monitor, self.room, -30, 10)
+        self.create_entry(self.monitor, self.room, -5, 60)
+        self.create_entry(self.monitor, self.room, 200, 60)
+        self.create_entry(self.monitor, self.other_room, 24 * 60 + 20, 60)
+        self.create_entry(self.other_monitor, self.other_room, 0, 60)
+
+        schedules = list(Schedule.objects.select_related('user', 'room'))
+        with self.assertNumQueries(1):
+            first_entries = find_first_entries(schedules)
+
+        for schedule in schedules:
+            self.assertEqual(first_entries[schedule.id], self.reference_first_entry(schedule))
+
+    def test_late_arrival_rules(self):
+        on_time = self.create_schedule(self.monitor, self.room, 0, 2)
+        late = self.create_schedule(self.monitor, self.room, 3, 2)
+        self.create_entry(self.monitor, self.room, -8, 60)
+        entry = self.create_entry(self.monitor, self.room, 3 * 60 + 12, 60)
+
+        result = calculate_late_arrivals(Schedule.objects.all())
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]['schedule'].id, late.id)
+        self.assertEqual(result[0]['entry'].id, entry.id)
+        self.assertAlmostEqual(result[0]['delay_minutes'], 12)
+        self.assertNotIn(on_time.id, [r['schedule'].id for r in result])
+
+    def test_unique_entries_evaluated_once(self):
+        self.create_schedule(self.monitor, self.room, 0, 1)
+        self.create_schedule(self.monitor, self.room, 1, 1)
+        self.create_entry(self.monitor, self.room, 90, 20)
+
+        self.assertEqual(len(calculate_late_arrivals(Schedule.objects.all())), 1)
+        self.assertEqual(len(calculate_late_arrivals(Schedule.objects.all(), unique_entries=False)), 2)
+
+    def test_admin_and_monitor_endpoints(self):
+        self.create_schedule(self.monitor, self.room, 0, 2)
+        self.create_entry(self.monitor, self.room, 20, 60)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        admin_response = self.client.get(reverse('calculate_late_arrivals'))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.monitor_token.key}')
+        monitor_response = self.client.get(reverse('monitor_late_arrivals'))
+
+        self.assertEqual(admin_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(admin_response.data['late_arrivals_count'], 1)
+        self.assertEqual(admin_response.data['late_details'][0]['user'], self.monitor.username)
+        self.assertEqual(admin_response.data['late_details'][0]['delay_minutes'], 20.0)
+        self.assertEqual(monitor_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(monitor_response.data['late_arrivals_count'], 1)
+        self.assertNotIn('user', monitor_response.data['late_details'][0])
+
+
+class TurnComparisonTest(ReportsBaseTestCase):
+    """Pruebas de la comparación turnos vs registros indexada"""
+
+    def setUp(self):
+        super().setUp()
+        day = (timezone.now() - timedelta(days=3)).astimezone(BOGOTA_TZ).date()
+        self.day = day
+        self.evening = BOGOTA_TZ.localize(datetime(day.year, day.month, day.day, 18, 0))
+
+    def test_first_entry_in_local_day_is_used(self):
+        Schedule.objects.create(
+            user=self.monitor, room=self.room,
+            start_datetime=self.evening, end_datetime=self.evening + timedelta(hours=3),
+            status=Schedule.ACTIVE, created_by=self.admin
+        )
+        # 19:07 en Bogotá ya es el día siguiente en UTC
+        RoomEntry.objects.create(user=self.monitor, room=self.room,
+                                 entry_time=self.evening + timedelta(minutes=67),
+                                 exit_time=self.evening + timedelta(minutes=120), active=False)
+        RoomEntry.objects.create(user=self.monitor, room=self.room,
+                                 entry_time=self.evening + timedelta(minutes=90),
+                                 exit_time=self.evening + timedelta(minutes=150), active=False)
+        RoomEntry.objects.create(user=self.monitor, room=self.room,
+                                 entry_time=self.evening - timedelta(minutes=30),
+                                 exit_time=self.evening - timedelta(minutes=20), active=False)
+
+        with self.assertNumQueries(2):
+            comparaciones = generar_comparacion_turnos_registros(self.day.isoformat(), self.day.isoformat())
+
+        self.assertEqual(len(comparaciones), 1)
+        self.assertEqual(comparaciones[0]['turno'], '18:00')
+        self.assertEqual(comparaciones[0]['registro'], '19:07')
+        self.assertEqual(comparaciones[0]['estado'], 'TARDE')
+        self.assertEqual(comparaciones[0]['fecha'], self.day.isoformat())
+
+    def test_schedule_without_entry(self):
+        Schedule.objects.create(
+            user=self.monitor, room=self.room,
+            start_datetime=self.evening, end_datetime=self.evening + timedelta(hours=2),
+            status=Schedule.ACTIVE, created_by=self.admin
+        )
+        RoomEntry.objects.create(user=self.monitor, room=self.other_room,
+                                 entry_time=self.evening, exit_time=self.evening + timedelta(hours=1),
+                                 active=False)
+
+        comparaciones = generar_comparacion_turnos_registros(self.day.isoformat(), self.day.isoformat())
+
+        self.assertEqual(comparaciones[0]['estado'], 'SIN_REGISTRO')
+        self.assertEqual(comparaciones[0]['registro'], '-')
+
+
+class DateRangeFilterTest(ReportsBaseTestCase):
+    """Pruebas del filtro compartido de rango de fechas"""
+
+    def test_bounds_cover_local_days(self):
+        date_filter = DateRangeFilter('2025-03-10', '2025-03-11T15:30:00Z', user_id='7', room_id='x')
+
+        self.assertEqual(date_filter.start, BOGOTA_TZ.localize(datetime(2025, 3, 10)))
+        self.assertEqual(date_filter.end, BOGOTA_TZ.localize(datetime(2025, 3, 12)))
+        self.assertEqual(date_filter.start.utcoffset(), timedelta(0))
+        self.assertEqual(date_filter.user_id_int, 7)
+        self.assertIsNone(date_filter.room_id_int)
+        self.assertEqual(date_filter.predicates('start_datetime'), {
+            'start_datetime__gte': date_filter.start,
+            'start_datetime__lt': date_filter.end,
+            'user_id': 7
+        })
+
+    def test_invalid_date_is_ignored(self):
+        date_filter = DateRangeFilter('no-es-fecha', '')
+
+        self.assertFalse(date_filter.is_valid)
+        self.assertEqual(date_filter.range_predicates('entry_time'), {})
+
+    def test_admin_entries_filtered_by_local_day(self):
+        day = (timezone.now() - timedelta(days=4)).astimezone(BOGOTA_TZ).date()
+        late_evening = BOGOTA_TZ.localize(datetime(day.year, day.month, day.day, 22, 30))
+        RoomEntry.objects.create(user=self.monitor, room=self.room, entry_time=late_evening,
+                                 exit_time=late_evening + timedelta(minutes=20), active=False)
+        RoomEntry.objects.create(user=self.monitor, room=self.room, entry_time=late_evening + timedelta(hours=2),
+                                 exit_time=late_evening + timedelta(hours=3), active=False)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        response = self.client.get(reverse('admin_entries_list'), {'from': day.isoformat(), 'to': day.isoformat()})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
@@ -271,7 +271,8 @@ class RoomEntryAPITest(APITestCase):
         entry1 = RoomEntry.objects.create(
             user=self.monitor,
             room=self.room1,
-            notes='Primera entrada'
+            notes='Primera entrada',
+            exit_time=timezone.now()
         )
         entry2 = RoomEntry.objects.create(
             user=self.monitor,
@@ -329,18 +330,20 @@ class RoomEntryAPITest(APITestCase):
         """Test: Obtener ocupantes actuales de una sala"""
         self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.monitor_token.key)
         
-        # Crear entradas activas en la sala
+        # Crear entrada activa en la sala (solo se permite una a la vez)
         entry1 = RoomEntry.objects.create(
             user=self.monitor,
             room=self.room1
         )
+        # Entrada ya finalizada en la sala (no debe aparecer)
         entry2 = RoomEntry.objects.create(
             user=self.admin,
-            room=self.room1
+            room=self.room1,
+            exit_time=timezone.now()
         )
         # Crear entrada en otra sala (no debe aparecer)
         RoomEntry.objects.create(
-            user=self.monitor,
+            user=self.admin,
             room=self.room2
         )
         
@@ -348,10 +351,10 @@ class RoomEntryAPITest(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['current_occupants'], 2)
+        self.assertEqual(response.data['current_occupants'], 1)
         self.assertIn('room', response.data)
         self.assertEqual(response.data['room']['id'], self.room1.id)
-        self.assertEqual(len(response.data['entries']), 2)
+        self.assertEqual(len(response.data['entries']), 1)
 
     def test_room_occupants_invalid_room(self):
         """Test: Obtener ocupantes de sala inexistente falla"""
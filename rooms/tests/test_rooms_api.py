@@ -1,5 +1,12 @@
+from datetime import timedelta
+
 from django.test import TestCase
-from rooms.models import Room
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rooms.models import Room, RoomEntry
+
+User = get_user_model()
 
 
 class RoomsApiTests(TestCase):
@@ -19,3 +26,45 @@ class RoomsApiTests(TestCase):
         response = self.client.get("/api/rooms/999999/")
         self.assertEqual(response.status_code, 404)
 
+
+
+class RoomOccupancyTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name="Sala 1", code="R001", capacity=10)
+        self.empty_room = Room.objects.create(name="Sala 2", code="R002", capacity=10)
+        self.monitor = User.objects.create_user(
+            username="monitor_occupancy", identification="920000001", email="monitor_occupancy@test.com",
+            password="test123", role="monitor", is_verified=True
+        )
+        other = User.objects.create_user(
+            username="monitor_occupancy_2", identification="920000002", email="monitor_occupancy_2@test.com",
+            password="test123", role="monitor", is_verified=True
+        )
+        RoomEntry.objects.create(user=self.monitor, room=self.room)
+        RoomEntry.objects.create(
+            user=other, room=self.room,
+            entry_time=timezone.now() - timedelta(hours=4), exit_time=timezone.now() - timedelta(hours=3)
+        )
+        RoomEntry.objects.create(
+            user=other, room=self.empty_room,
+            entry_time=timezone.now() - timedelta(hours=2), exit_time=timezone.now() - timedelta(hours=1)
+        )
+
+    def test_list_rooms_counts_occupants_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/rooms/")
+        counts = {room["code"]: room["occupants_count"] for room in response.json()}
+        self.assertEqual(counts, {"R001": 1, "R002": 0})
+
+    def test_detail_and_occupants_views(self):
+        response = self.client.get(f"/api/rooms/{self.room.id}/")
+        self.assertEqual(response.json()["occupants_count"], 1)
+
+        token = Token.objects.create(user=self.monitor)
+        response = self.client.get(
+            f"/api/rooms/{self.room.id}/occupants/", HTTP_AUTHORIZATION=f"Token {token.key}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["current_occupants"], 1)
+        self.assertEqual(response.json()["room"]["occupants_count"], 1)
+        self.assertEqual(len(response.json()["entries"]), 1)
@@ -1,6 +1,9 @@
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import timedelta
+from bisect import bisect_left
+from collections import defaultdict
 import pytz
+from .filters import DateRangeFilter
 
 BOGOTA_TZ = pytz.timezone('America/Bogota')
 
@@ -64,30 +67,50 @@ def formatear_diferencia(diferencia_minutos):
     else:
         return str(diferencia_minutos)  # Con símbolo negativo
 
+def _fecha_local(valor):
+    """Fecha calendario en zona horaria de Bogotá"""
+    if valor.tzinfo is None:
+        return valor.date()
+    return valor.astimezone(BOGOTA_TZ).date()
+
+def _indexar_registros(registros):
+    """
+    Agrupa los registros por (user_id, room_id, fecha local) manteniendo el
+    orden por hora de entrada, junto con la lista de horas para búsqueda binaria
+    """
+    buckets = defaultdict(list)
+    for registro in registros:
+        buckets[(registro.user_id, registro.room_id, _fecha_local(registro.entry_time))].append(registro)
+    
+    return {
+        clave: (lista, [r.entry_time for r in lista])
+        for clave, lista in buckets.items()
+    }
+
 def generar_comparacion_turnos_registros(date_from, date_to, user_id=None, room_id=None):
     """
     Genera comparación entre turnos asignados y registros reales
+    
+    Los registros se indexan por (usuario, sala, fecha local) y el primer
+    registro de cada turno se obtiene con búsqueda binaria sobre las horas de
+    entrada ordenadas.
     """
     from .models import RoomEntry
     from schedule.models import Schedule
     
-    # Convertir fechas - manejar tanto formatos de fecha como datetime
+    # Límites del rango como instantes aware (evita los casts __date sobre la columna)
     try:
-        # Si es solo fecha (YYYY-MM-DD), agregar tiempo por defecto
-        if 'T' not in date_from:
-            date_from += 'T00:00:00'
-        if 'T' not in date_to:
-            date_to += 'T23:59:59'
-            
-        from_date = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
-        to_date = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
-    except (ValueError, AttributeError):
+        filtro = DateRangeFilter(date_from, date_to)
+    except AttributeError:
         return []
+    if not filtro.is_valid or filtro.start is None or filtro.end is None:
+        return []
+    rango_desde, rango_hasta = filtro.start, filtro.end
     
     # Obtener turnos en el rango de fechas
     turnos_queryset = Schedule.objects.filter(
-        start_datetime__date__gte=from_date.date(),
-        start_datetime__date__lte=to_date.date()
+        start_datetime__gte=rango_desde,
+        start_datetime__lt=rango_hasta
     ).select_related('user', 'room')
     
     if user_id:
@@ -97,44 +120,33 @@ def generar_comparacion_turnos_registros(date_from, date_to, user_id=None, room_
     
     turnos = list(turnos_queryset)
     
-    # Obtener todos los registros en el rango de fechas
+    # Obtener todos los registros en el rango de fechas, ya ordenados por hora de entrada
     registros_queryset = RoomEntry.objects.filter(
-        entry_time__date__gte=from_date.date(),
-        entry_time__date__lte=to_date.date()
-    ).select_related('user', 'room')
+        entry_time__gte=rango_desde,
+        entry_time__lt=rango_hasta
+    ).only('id', 'user_id', 'room_id', 'entry_time', 'notes').order_by('entry_time')
     
     if user_id:
         registros_queryset = registros_queryset.filter(user_id=user_id)
     if room_id:
         registros_queryset = registros_queryset.filter(room_id=room_id)
     
-    registros = list(registros_queryset)
+    indice = _indexar_registros(registros_queryset)
     
     comparaciones = []
     
     for turno in turnos:
         # Buscar PRIMER registro correspondiente (el más temprano)
         # Incluir registros desde 10 minutos antes del turno hasta el final del día
-        turno_start = turno.start_datetime
-        turno_end = turno.start_datetime.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        # Rango de búsqueda: 10 minutos antes del turno hasta el final del día
-        rango_inicio = turno_start - timedelta(minutes=10)
+        rango_inicio = turno.start_datetime - timedelta(minutes=10)
         
-        registros_del_dia = []
-        for r in registros:
-            if (r.user == turno.user and 
-                r.room == turno.room and 
-                r.entry_time.date() == turno.start_datetime.date() and
-                rango_inicio <= r.entry_time <= turno_end):
-                registros_del_dia.append(r)
-        
-        # Ordenar por hora de entrada (más temprano primero) y tomar el primero
-        if registros_del_dia:
-            registros_del_dia.sort(key=lambda x: x.entry_time)
-            registro = registros_del_dia[0]  # PRIMER registro (más temprano)
-        else:
-            registro = None
+        registro = None
+        bucket = indice.get((turno.user_id, turno.room_id, _fecha_local(turno.start_datetime)))
+        if bucket:
+            registros_del_dia, horas = bucket
+            posicion = bisect_left(horas, rango_inicio)
+            if posicion < len(registros_del_dia):
+                registro = registros_del_dia[posicion]
         
         # Calcular diferencia y estado (mostrando horas en zona Bogotá)
         if registro:
@@ -11,6 +11,7 @@ from .serializers import (
     RoomEntrySerializer
 )
 from .services import RoomEntryBusinessLogic, auto_close_expired_sessions
+from .occupancy import annotate_occupancy
 from users.permissions import IsVerifiedUser
 
 
@@ -22,7 +23,7 @@ def room_list_view(request):
     """
     Vista para listar todas las salas activas
     """
-    rooms = Room.objects.filter(is_active=True).order_by('code')
+    rooms = annotate_occupancy(Room.objects.filter(is_active=True)).order_by('code')
     serializer = RoomSerializer(rooms, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -34,7 +35,7 @@ def room_detail_view(request, room_id):
     Vista para obtener detalles de una sala específica
     """
     try:
-        room = Room.objects.get(id=room_id, is_active=True)
+        room = annotate_occupancy().get(id=room_id, is_active=True)
         serializer = RoomSerializer(room)
         return Response(serializer.data, status=status.HTTP_200_OK)
     except Room.DoesNotExist:
@@ -308,16 +309,16 @@ def room_current_occupants_view(request, room_id):
     """
     Lista de usuarios actualmente en una sala específica
     """
-    room = get_object_or_404(Room, id=room_id, is_active=True)
+    room = get_object_or_404(annotate_occupancy(), id=room_id, is_active=True)
     active_entries = RoomEntry.objects.filter(
         room=room,
         exit_time__isnull=True
-    ).select_related('user')
+    ).select_related('user', 'room')
     
     serializer = RoomEntrySerializer(active_entries, many=True)
     return Response({
         'room': RoomSerializer(room).data,
-        'current_occupants': active_entries.count(),
+        'current_occupants': room.active_occupants,
         'entries': serializer.data
     }, status=status.HTTP_200_OK)
 
@@ -7,6 +7,8 @@ from django.core.paginator import Paginator
 from users.permissions import IsAdminUser
 from .models import Room, RoomEntry
 from .serializers import RoomEntrySerializer
+from .filters import DateRangeFilter
+from .occupancy import annotate_occupancy
 from django.shortcuts import get_object_or_404
 import logging
 
@@ -26,7 +28,7 @@ def admin_rooms_list(request):
     search = request.GET.get('search', '').strip()
     include_inactive = request.GET.get('include_inactive', 'false').lower() == 'true'
 
-    queryset = Room.objects.all().order_by('code')
+    queryset = annotate_occupancy(Room.objects.all()).order_by('code')
     if not include_inactive:
         queryset = queryset.filter(is_active=True)
 
@@ -35,7 +37,7 @@ def admin_rooms_list(request):
 
     rooms_data = []
     for room in queryset:
-        occupants_count = RoomEntry.objects.filter(room=room, exit_time__isnull=True).count()
+        occupants_count = room.active_occupants
         rooms_data.append({
             'id': room.id,
             'name': room.name,
@@ -208,86 +210,11 @@ def admin_entries_list(request):
             except ValueError:
                 pass
         
-        # FILTROS DE FECHA COMPLETOS (CORREGIDOS)
-        if from_date and to_date:
-            # Caso 1: Ambas fechas presentes - filtrar por rango completo
-            try:
-                from datetime import datetime, timezone
-                # Manejar diferentes formatos de fecha
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                # Asegurar que las fechas estén en UTC
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                # Usar filtro por rango de datetime naive para evitar problemas de zona horaria
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                
-                # Convertir a naive datetime para evitar problemas de zona horaria
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                
-                queryset = queryset.filter(
-                    entry_time__gte=start_datetime,
-                    entry_time__lte=end_datetime
-                )
-            except ValueError as e:
-                logger.warning(f"Error parsing date range: {e}")
-                pass
-        elif from_date:
-            # Caso 2: Solo fecha inicio - mostrar desde esa fecha en adelante
-            try:
-                from datetime import datetime, timezone
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                
-                # Usar filtro por datetime naive en lugar de date
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                queryset = queryset.filter(entry_time__gte=start_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing from_date: {e}")
-                pass
-        elif to_date:
-            # Caso 3: Solo fecha fin - mostrar hasta esa fecha
-            try:
-                from datetime import datetime, timezone
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                # Usar filtro por datetime naive en lugar de date
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                queryset = queryset.filter(entry_time__lte=end_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing to_date: {e}")
-                pass
-        # Caso 4: Sin fechas - no aplicar filtros de fecha (mostrar todo)
+        # FILTROS DE FECHA: límites aware en UTC sobre el día local (sin fechas no se filtra)
+        date_filter = DateRangeFilter.from_request(
+            request, from_param='from', to_param='to', user_param=None, room_param=None
+        )
+        queryset = queryset.filter(**date_filter.range_predicates('entry_time'))
         
         # FILTRO POR ESTADO ACTIVO
         if active_status == 'true':
@@ -367,86 +294,11 @@ def admin_entries_unpaginated(request):
             except ValueError:
                 pass
         
-        # FILTROS DE FECHA COMPLETOS (CORREGIDOS)
-        if from_date and to_date:
-            # Caso 1: Ambas fechas presentes - filtrar por rango completo
-            try:
-                from datetime import datetime, timezone
-                # Manejar diferentes formatos de fecha
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                # Asegurar que las fechas estén en UTC
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                # Usar filtro por rango de datetime naive para evitar problemas de zona horaria
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                
-                # Convertir a naive datetime para evitar problemas de zona horaria
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                
-                queryset = queryset.filter(
-                    entry_time__gte=start_datetime,
-                    entry_time__lte=end_datetime
-                )
-            except ValueError as e:
-                logger.warning(f"Error parsing date range: {e}")
-                pass
-        elif from_date:
-            # Caso 2: Solo fecha inicio - mostrar desde esa fecha en adelante
-            try:
-                from datetime import datetime, timezone
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                
-                # Usar filtro por datetime naive en lugar de date
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                queryset = queryset.filter(entry_time__gte=start_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing from_date: {e}")
-                pass
-        elif to_date:
-            # Caso 3: Solo fecha fin - mostrar hasta esa fecha
-            try:
-                from datetime import datetime, timezone
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                # Usar filtro por datetime naive en lugar de date
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                queryset = queryset.filter(entry_time__lte=end_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing to_date: {e}")
-                pass
-        # Caso 4: Sin fechas - no aplicar filtros de fecha (mostrar todo)
+        # FILTROS DE FECHA: límites aware en UTC sobre el día local (sin fechas no se filtra)
+        date_filter = DateRangeFilter.from_request(
+            request, from_param='from', to_param='to', user_param=None, room_param=None
+        )
+        queryset = queryset.filter(**date_filter.range_predicates('entry_time'))
         
         # FILTRO POR ESTADO ACTIVO
         if active_status == 'true':
@@ -545,6 +397,8 @@ from django.core.paginator import Paginator
 from users.permissions import IsAdminUser
 from .models import Room, RoomEntry
 from .serializers import RoomEntrySerializer
+from .filters import DateRangeFilter
+from .occupancy import annotate_occupancy
 from django.shortcuts import get_object_or_404
 import logging
 
@@ -564,7 +418,7 @@ def admin_rooms_list(request):
     search = request.GET.get('search', '').strip()
     include_inactive = request.GET.get('include_inactive', 'false').lower() == 'true'
 
-    queryset = Room.objects.all().order_by('code')
+    queryset = annotate_occupancy(Room.objects.all()).order_by('code')
     if not include_inactive:
         queryset = queryset.filter(is_active=True)
 
@@ -573,7 +427,7 @@ def admin_rooms_list(request):
 
     rooms_data = []
     for room in queryset:
-        occupants_count = RoomEntry.objects.filter(room=room, exit_time__isnull=True).count()
+        occupants_count = room.active_occupants
         rooms_data.append({
             'id': room.id,
             'name': room.name,
@@ -741,86 +595,11 @@ def admin_entries_list(request):
             except ValueError:
                 pass
         
-        # FILTROS DE FECHA COMPLETOS (CORREGIDOS)
-        if from_date and to_date:
-            # Caso 1: Ambas fechas presentes - filtrar por rango completo
-            try:
-                from datetime import datetime, timezone
-                # Manejar diferentes formatos de fecha
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                # Asegurar que las fechas estén en UTC
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                # Usar filtro por rango de datetime naive para evitar problemas de zona horaria
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                
-                # Convertir a naive datetime para evitar problemas de zona horaria
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                
-                queryset = queryset.filter(
-                    entry_time__gte=start_datetime,
-                    entry_time__lte=end_datetime
-                )
-            except ValueError as e:
-                logger.warning(f"Error parsing date range: {e}")
-                pass
-        elif from_date:
-            # Caso 2: Solo fecha inicio - mostrar desde esa fecha en adelante
-            try:
-                from datetime import datetime, timezone
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                
-                # Usar filtro por datetime naive en lugar de date
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                queryset = queryset.filter(entry_time__gte=start_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing from_date: {e}")
-                pass
-        elif to_date:
-            # Caso 3: Solo fecha fin - mostrar hasta esa fecha
-            try:
-                from datetime import datetime, timezone
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                # Usar filtro por datetime naive en lugar de date
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                queryset = queryset.filter(entry_time__lte=end_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing to_date: {e}")
-                pass
-        # Caso 4: Sin fechas - no aplicar filtros de fecha (mostrar todo)
+        # FILTROS DE FECHA: límites aware en UTC sobre el día local (sin fechas no se filtra)
+        date_filter = DateRangeFilter.from_request(
+            request, from_param='from', to_param='to', user_param=None, room_param=None
+        )
+        queryset = queryset.filter(**date_filter.range_predicates('entry_time'))
         
         # FILTRO POR ESTADO ACTIVO
         if active_status == 'true':
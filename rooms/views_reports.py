@@ -7,27 +7,18 @@ from users.permissions import IsAdminUser
 from .models import RoomEntry
 from schedule.models import Schedule
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 from .serializers import RoomEntrySerializer, TurnComparisonSerializer, EntryValidationSerializer
 from .utils import generar_comparacion_turnos_registros, validar_acceso_anticipado
+from .overlap import get_time_overlap, calculate_overlaps, filter_schedules  # noqa: F401
+from .late_arrivals import calculate_late_arrivals as compute_late_arrivals
+from .filters import DateRangeFilter
 from users.permissions import IsMonitorUser
 
 
 logger = logging.getLogger(__name__)
 
-def get_time_overlap(entry_start, entry_end, schedule_start, schedule_end):
-    """
-    Calcula la superposición en horas entre dos intervalos de tiempo
-    """
-    overlap_start = max(entry_start, schedule_start)
-    overlap_end = min(entry_end, schedule_end)
-    
-    if overlap_start >= overlap_end:
-        return 0.0
-    
-    overlap_seconds = (overlap_end - overlap_start).total_seconds()
-    return overlap_seconds / 3600.0
 
 @api_view(['GET'])
 @authentication_classes([TokenAuthentication])
@@ -37,166 +28,44 @@ def calculate_worked_hours(request):
     Endpoint para calcular horas trabajadas con superposición temporal
     """
     try:
-        # Obtener parámetros de filtro
-        from_date = request.GET.get('from_date', '').strip()
-        to_date = request.GET.get('to_date', '').strip()
-        user_id = request.GET.get('user_id', '').strip()
-        room_id = request.GET.get('room_id', '').strip()
+        # Parsear filtros una sola vez (límites aware en UTC)
+        filters = DateRangeFilter.from_request(request)
         
         # Obtener todas las entradas (excluir sin salida para evitar inconsistencias)
-        entries_queryset = RoomEntry.objects.select_related('user', 'room').filter(exit_time__isnull=False)
-        
-        # Aplicar filtros de fecha
-        if from_date and to_date:
-            try:
-                from datetime import datetime, timezone
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                
-                entries_queryset = entries_queryset.filter(
-                    entry_time__gte=start_datetime,
-                    entry_time__lte=end_datetime
-                )
-            except ValueError as e:
-                logger.warning(f"Error parsing date range: {e}")
-                pass
-        elif from_date:
-            try:
-                from datetime import datetime, timezone
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                entries_queryset = entries_queryset.filter(entry_time__gte=start_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing from_date: {e}")
-                pass
-        elif to_date:
-            try:
-                from datetime import datetime, timezone
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                entries_queryset = entries_queryset.filter(entry_time__lte=end_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing to_date: {e}")
-                pass
-        
-        # Aplicar filtros adicionales
-        if user_id:
-            try:
-                user_id_int = int(user_id)
-                entries_queryset = entries_queryset.filter(user_id=user_id_int)
-            except ValueError:
-                pass
-        
-        if room_id:
-            try:
-                room_id_int = int(room_id)
-                entries_queryset = entries_queryset.filter(room_id=room_id_int)
-            except ValueError:
-                pass
+        entries_queryset = filters.apply_to_entries(
+            RoomEntry.objects.select_related('user', 'room').filter(exit_time__isnull=False)
+        )
         
         # Obtener todas las entradas filtradas
         entries = list(entries_queryset)
         
-        # Obtener todos los turnos
-        schedules = list(Schedule.objects.select_related('user', 'room').all())
+        # Obtener turnos con los mismos filtros de fecha, usuario y sala
+        schedules = list(filter_schedules(filters))
         
-        # Calcular horas trabajadas con superposición
-        total_worked_hours = 0.0
+        # Calcular horas trabajadas con superposición (barrido por usuario)
+        result = calculate_overlaps(entries, schedules)
+        total_worked_hours = result['total_worked_hours']
+        total_assigned_hours = result['total_assigned_hours']
+        compliance_percentage = result['compliance_percentage']
+        
+        users_by_id = {entry.user_id: entry.user for entry in entries}
         user_hours = {}
-        schedule_hours = {}
-        overlaps_found = []
+        for entry_user_id, hours in result['user_hours'].items():
+            entry_user = users_by_id[entry_user_id]
+            user_hours[f"{entry_user.username} (ID: {entry_user.id})"] = hours
+        schedule_hours = result['schedule_hours']
         
-        for entry in entries:
-            entry_start = entry.entry_time
+        overlaps_found = []
+        for entry, schedule, overlap in result['overlaps']:
             entry_end = entry.exit_time if entry.exit_time else timezone.now()
-            entry_user = entry.user
-            
-            # Buscar turnos del mismo usuario
-            user_schedules = [s for s in schedules if s.user == entry_user]
-            
-            entry_total_hours = 0
-            
-            for schedule in user_schedules:
-                schedule_start = schedule.start_datetime
-                schedule_end = schedule.end_datetime
-                
-                # Calcular superposición
-                overlap = get_time_overlap(entry_start, entry_end, schedule_start, schedule_end)
-                
-                if overlap > 0:
-                    entry_total_hours += overlap
-                    total_worked_hours += overlap
-                    
-                    # Agrupar por usuario
-                    user_key = f"{entry_user.username} (ID: {entry_user.id})"
-                    if user_key not in user_hours:
-                        user_hours[user_key] = 0
-                    user_hours[user_key] += overlap
-                    
-                    # Agrupar por turno
-                    if schedule.id not in schedule_hours:
-                        schedule_hours[schedule.id] = 0
-                    schedule_hours[schedule.id] += overlap
-                    
-                    overlaps_found.append({
-                        'entry_id': entry.id,
-                        'schedule_id': schedule.id,
-                        'user': entry_user.username,
-                        'overlap_hours': round(overlap, 4),
-                        'entry_period': f"{entry_start.strftime('%H:%M')} - {entry_end.strftime('%H:%M')}",
-                        'schedule_period': f"{schedule_start.strftime('%H:%M')} - {schedule_end.strftime('%H:%M')}"
-                    })
-        
-        # Calcular horas asignadas totales
-        total_assigned_hours = 0
-        for schedule in schedules:
-            start = schedule.start_datetime
-            end = schedule.end_datetime
-            duration = (end - start).total_seconds() / 3600
-            total_assigned_hours += duration
-        
-        # Calcular porcentaje de cumplimiento
-        compliance_percentage = 0
-        if total_assigned_hours > 0:
-            compliance_percentage = (total_worked_hours / total_assigned_hours) * 100
+            overlaps_found.append({
+                'entry_id': entry.id,
+                'schedule_id': schedule.id,
+                'user': entry.user.username,
+                'overlap_hours': round(overlap, 4),
+                'entry_period': f"{entry.entry_time.strftime('%H:%M')} - {entry_end.strftime('%H:%M')}",
+                'schedule_period': f"{schedule.start_datetime.strftime('%H:%M')} - {schedule.end_datetime.strftime('%H:%M')}"
+            })
         
         return Response({
             'total_worked_hours': round(total_worked_hours, 4),
@@ -207,12 +76,7 @@ def calculate_worked_hours(request):
             'user_hours': user_hours,
             'schedule_hours': schedule_hours,
             'overlaps_found': overlaps_found,
-            'filters_applied': {
-                'from_date': from_date,
-                'to_date': to_date,
-                'user_id': user_id,
-                'room_id': room_id
-            }
+            'filters_applied': filters.as_dict()
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -230,165 +94,35 @@ def calculate_late_arrivals(request):
     Endpoint para calcular llegadas tarde
     """
     try:
-        # Obtener parámetros de filtro
-        from_date = request.GET.get('from_date', '').strip()
-        to_date = request.GET.get('to_date', '').strip()
-        user_id = request.GET.get('user_id', '').strip()
-        room_id = request.GET.get('room_id', '').strip()
-        
-        # Obtener todos los turnos
-        schedules_queryset = Schedule.objects.select_related('user', 'room').all()
-        
-        # Aplicar filtros de fecha a turnos
-        if from_date and to_date:
-            try:
-                from datetime import datetime, timezone
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                
-                schedules_queryset = schedules_queryset.filter(
-                    start_datetime__gte=start_datetime,
-                    start_datetime__lte=end_datetime
-                )
-            except ValueError as e:
-                logger.warning(f"Error parsing date range: {e}")
-                pass
-        elif from_date:
-            try:
-                from datetime import datetime, timezone
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                schedules_queryset = schedules_queryset.filter(start_datetime__gte=start_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing from_date: {e}")
-                pass
-        elif to_date:
-            try:
-                from datetime import datetime, timezone
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                schedules_queryset = schedules_queryset.filter(start_datetime__lte=end_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing to_date: {e}")
-                pass
-        
-        # Aplicar filtros adicionales
-        if user_id:
-            try:
-                user_id_int = int(user_id)
-                schedules_queryset = schedules_queryset.filter(user_id=user_id_int)
-            except ValueError:
-                pass
-        
-        if room_id:
-            try:
-                room_id_int = int(room_id)
-                schedules_queryset = schedules_queryset.filter(room_id=room_id_int)
-            except ValueError:
-                pass
+        # Obtener turnos con los filtros aplicados
+        filters = DateRangeFilter.from_request(request)
+        schedules_queryset = filter_schedules(filters)
         
         schedules = list(schedules_queryset)
         
-        # Calcular llegadas tarde (ajuste: se permite entrar hasta 10 minutos antes y gracia de 5 minutos)
-        late_count = 0
-        processed_entries = set()
+        # Calcular llegadas tarde (se permite entrar hasta 10 minutos antes y gracia de 5 minutos)
+        late_arrivals = compute_late_arrivals(schedules)
+        late_count = len(late_arrivals)
         late_details = []
-
-        EARLY_ALLOW_MINUTES = 10
-        GRACE_MINUTES = 5
-
-        for schedule in schedules:
-            schedule_start = schedule.start_datetime
-
-            # Considerar entradas desde 10 minutos antes del inicio del turno, mismo día y sala
-            window_start = schedule_start - timedelta(minutes=EARLY_ALLOW_MINUTES)
-
-            schedule_entries = RoomEntry.objects.filter(
-                user=schedule.user,
-                room=schedule.room,
-                entry_time__date=schedule_start.date(),
-                entry_time__gte=window_start
-            ).order_by('entry_time')
-
-            if schedule_entries.exists():
-                first_entry = schedule_entries.first()
-                entry_time = first_entry.entry_time
-
-                if first_entry.id not in processed_entries:
-                    # Diferencia en minutos respecto al inicio del turno (puede ser negativa si entró antes)
-                    time_diff = (entry_time - schedule_start).total_seconds() / 60
-
-                    # Entradas hasta 10 min antes no cuentan como tarde (se normaliza a 0)
-                    effective_delay = 0 if -EARLY_ALLOW_MINUTES <= time_diff <= 0 else time_diff
-
-                    # Llegada tarde si supera los 5 minutos de gracia
-                    is_late = effective_delay > GRACE_MINUTES
-
-                    if is_late:
-                        late_count += 1
-                        processed_entries.add(first_entry.id)
-
-                        late_details.append({
-                            'schedule_id': schedule.id,
-                            'entry_id': first_entry.id,
-                            'user': schedule.user.username,
-                            'room': schedule.room.name,
-                            'schedule_start': schedule_start.isoformat(),
-                            'entry_time': entry_time.isoformat(),
-                            'delay_minutes': round(effective_delay, 2)
-                        })
-                    else:
-                        # Registrar como procesada aunque no sea tarde
-                        processed_entries.add(first_entry.id)
+        
+        for late in late_arrivals:
+            schedule = late['schedule']
+            first_entry = late['entry']
+            late_details.append({
+                'schedule_id': schedule.id,
+                'entry_id': first_entry.id,
+                'user': schedule.user.username,
+                'room': schedule.room.name,
+                'schedule_start': schedule.start_datetime.isoformat(),
+                'entry_time': first_entry.entry_time.isoformat(),
+                'delay_minutes': round(late['delay_minutes'], 2)
+            })
         
         return Response({
             'late_arrivals_count': late_count,
             'total_schedules': len(schedules),
             'late_details': late_details,
-            'filters_applied': {
-                'from_date': from_date,
-                'to_date': to_date,
-                'user_id': user_id,
-                'room_id': room_id
-            }
+            'filters_applied': filters.as_dict()
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -411,94 +145,37 @@ def monitor_late_arrivals(request):
     - Se toma el PRIMER registro del día/turno en esa sala
     """
     try:
-        from_date = request.GET.get('from_date', '').strip()
-        to_date = request.GET.get('to_date', '').strip()
-
-        schedules_queryset = Schedule.objects.select_related('user', 'room').filter(user=request.user)
+        filters = DateRangeFilter.from_request(request, user_param=None, room_param=None)
 
-        # Filtro por fechas
-        if from_date and to_date:
-            try:
-                from datetime import datetime, timezone
-                from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00')) if 'T' in from_date else datetime.fromisoformat(from_date)
-                to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00')) if 'T' in to_date else datetime.fromisoformat(to_date)
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                schedules_queryset = schedules_queryset.filter(start_datetime__gte=start_datetime, start_datetime__lte=end_datetime)
-            except ValueError:
-                pass
-        elif from_date:
-            try:
-                from datetime import datetime, timezone
-                from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00')) if 'T' in from_date else datetime.fromisoformat(from_date)
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                schedules_queryset = schedules_queryset.filter(start_datetime__gte=start_datetime)
-            except ValueError:
-                pass
-        elif to_date:
-            try:
-                from datetime import datetime, timezone
-                to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00')) if 'T' in to_date else datetime.fromisoformat(to_date)
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                schedules_queryset = schedules_queryset.filter(start_datetime__lte=end_datetime)
-            except ValueError:
-                pass
+        schedules_queryset = filter_schedules(
+            filters,
+            Schedule.objects.select_related('user', 'room').filter(user=request.user)
+        )
 
         schedules = list(schedules_queryset)
 
-        EARLY_ALLOW_MINUTES = 10
-        GRACE_MINUTES = 5
-
-        late_count = 0
+        late_arrivals = compute_late_arrivals(schedules, unique_entries=False)
+        late_count = len(late_arrivals)
         late_details = []
 
-        for schedule in schedules:
-            schedule_start = schedule.start_datetime
-            window_start = schedule_start - timedelta(minutes=EARLY_ALLOW_MINUTES)
-
-            first_entry = RoomEntry.objects.filter(
-                user=request.user,
-                room=schedule.room,
-                entry_time__date=schedule_start.date(),
-                entry_time__gte=window_start
-            ).order_by('entry_time').first()
-
-            if first_entry:
-                time_diff = (first_entry.entry_time - schedule_start).total_seconds() / 60
-                effective_delay = 0 if -EARLY_ALLOW_MINUTES <= time_diff <= 0 else time_diff
-                if effective_delay > GRACE_MINUTES:
-                    late_count += 1
-                    late_details.append({
-                        'schedule_id': schedule.id,
-                        'entry_id': first_entry.id,
-                        'room': schedule.room.name,
-                        'schedule_start': schedule_start.isoformat(),
-                        'entry_time': first_entry.entry_time.isoformat(),
-                        'delay_minutes': round(effective_delay, 2)
-                    })
+        for late in late_arrivals:
+            schedule = late['schedule']
+            first_entry = late['entry']
+            late_details.append({
+                'schedule_id': schedule.id,
+                'entry_id': first_entry.id,
+                'room': schedule.room.name,
+                'schedule_start': schedule.start_datetime.isoformat(),
+                'entry_time': first_entry.entry_time.isoformat(),
+                'delay_minutes': round(late['delay_minutes'], 2)
+            })
 
         return Response({
             'late_arrivals_count': late_count,
             'late_details': late_details,
             'filters_applied': {
-                'from_date': from_date,
-                'to_date': to_date
+                'from_date': filters.from_date,
+                'to_date': filters.to_date
             }
         }, status=status.HTTP_200_OK)
 
@@ -517,255 +194,28 @@ def calculate_report_stats(request):
     Endpoint completo para calcular todas las estadísticas de reportes
     """
     try:
-        # Obtener parámetros de filtro
-        from_date = request.GET.get('from_date', '').strip()
-        to_date = request.GET.get('to_date', '').strip()
-        user_id = request.GET.get('user_id', '').strip()
-        room_id = request.GET.get('room_id', '').strip()
-        
-        # Calcular horas trabajadas directamente (excluir sin salida para evitar errores)
-        entries_queryset = RoomEntry.objects.select_related('user', 'room').filter(exit_time__isnull=False)
-        
-        # Aplicar filtros de fecha a entradas
-        if from_date and to_date:
-            try:
-                from datetime import datetime, timezone
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                
-                entries_queryset = entries_queryset.filter(
-                    entry_time__gte=start_datetime,
-                    entry_time__lte=end_datetime
-                )
-            except ValueError as e:
-                logger.warning(f"Error parsing date range: {e}")
-                pass
-        elif from_date:
-            try:
-                from datetime import datetime, timezone
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                entries_queryset = entries_queryset.filter(entry_time__gte=start_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing from_date: {e}")
-                pass
-        elif to_date:
-            try:
-                from datetime import datetime, timezone
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                entries_queryset = entries_queryset.filter(entry_time__lte=end_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing to_date: {e}")
-                pass
-        
-        # Aplicar filtros adicionales
-        if user_id:
-            try:
-                user_id_int = int(user_id)
-                entries_queryset = entries_queryset.filter(user_id=user_id_int)
-            except ValueError:
-                pass
-        
-        if room_id:
-            try:
-                room_id_int = int(room_id)
-                entries_queryset = entries_queryset.filter(room_id=room_id_int)
-            except ValueError:
-                pass
+        # Parsear filtros una sola vez; se reutilizan para entradas y turnos
+        filters = DateRangeFilter.from_request(request)
         
-        entries = list(entries_queryset)
+        # Calcular horas trabajadas directamente (excluir sin salida para evitar errores).
+        # No se lee de RoomDailyUsage: la superposición debe hacerse contra los
+        # turnos filtrados y por usuario (en cualquier sala), como en calculate_overlaps.
+        entries = list(filters.apply_to_entries(
+            RoomEntry.objects.select_related('user', 'room').filter(exit_time__isnull=False)
+        ))
         
-        # Obtener turnos con filtros aplicados
-        schedules_queryset = Schedule.objects.select_related('user', 'room').all()
-        
-        # Aplicar filtros de fecha a turnos
-        if from_date and to_date:
-            try:
-                from datetime import datetime, timezone
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                
-                schedules_queryset = schedules_queryset.filter(
-                    start_datetime__gte=start_datetime,
-                    start_datetime__lte=end_datetime
-                )
-            except ValueError as e:
-                logger.warning(f"Error parsing date range: {e}")
-                pass
-        elif from_date:
-            try:
-                from datetime import datetime, timezone
-                if 'T' in from_date:
-                    from_date_obj = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                else:
-                    from_date_obj = datetime.fromisoformat(from_date)
-                
-                if from_date_obj.tzinfo is None:
-                    from_date_obj = from_date_obj.replace(tzinfo=timezone.utc)
-                
-                start_datetime = from_date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                if start_datetime.tzinfo is not None:
-                    start_datetime = start_datetime.replace(tzinfo=None)
-                schedules_queryset = schedules_queryset.filter(start_datetime__gte=start_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing from_date: {e}")
-                pass
-        elif to_date:
-            try:
-                from datetime import datetime, timezone
-                if 'T' in to_date:
-                    to_date_obj = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                else:
-                    to_date_obj = datetime.fromisoformat(to_date)
-                
-                if to_date_obj.tzinfo is None:
-                    to_date_obj = to_date_obj.replace(tzinfo=timezone.utc)
-                
-                end_datetime = to_date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-                if end_datetime.tzinfo is not None:
-                    end_datetime = end_datetime.replace(tzinfo=None)
-                schedules_queryset = schedules_queryset.filter(start_datetime__lte=end_datetime)
-            except ValueError as e:
-                logger.warning(f"Error parsing to_date: {e}")
-                pass
-        
-        # Aplicar filtros adicionales a turnos
-        if user_id:
-            try:
-                user_id_int = int(user_id)
-                schedules_queryset = schedules_queryset.filter(user_id=user_id_int)
-            except ValueError:
-                pass
-        
-        if room_id:
-            try:
-                room_id_int = int(room_id)
-                schedules_queryset = schedules_queryset.filter(room_id=room_id_int)
-            except ValueError:
-                pass
+        # Obtener turnos con los mismos filtros aplicados
+        schedules_queryset = filter_schedules(filters)
         
         schedules = list(schedules_queryset)
         
-        # Calcular horas trabajadas con superposición
-        total_worked_hours = 0.0
-        for entry in entries:
-            entry_start = entry.entry_time
-            entry_end = entry.exit_time if entry.exit_time else timezone.now()
-            entry_user = entry.user
-            
-            user_schedules = [s for s in schedules if s.user == entry_user]
-            
-            for schedule in user_schedules:
-                schedule_start = schedule.start_datetime
-                schedule_end = schedule.end_datetime
-                
-                overlap = get_time_overlap(entry_start, entry_end, schedule_start, schedule_end)
-                if overlap > 0:
-                    total_worked_hours += overlap
-        
-        # Calcular llegadas tarde (lógica actualizada: 10 min antes permitidos, 5 min de gracia)
-        late_count = 0
-        processed_entries = set()
-        
-        EARLY_ALLOW_MINUTES = 10
-        GRACE_MINUTES = 5
-        
-        for schedule in schedules:
-            schedule_start = schedule.start_datetime
-            
-            # Considerar entradas desde 10 minutos antes del inicio del turno, mismo día y sala
-            window_start = schedule_start - timedelta(minutes=EARLY_ALLOW_MINUTES)
-            
-            schedule_entries = RoomEntry.objects.filter(
-                user=schedule.user,
-                room=schedule.room,
-                entry_time__date=schedule_start.date(),
-                entry_time__gte=window_start
-            ).order_by('entry_time')
-            
-            if schedule_entries.exists():
-                first_entry = schedule_entries.first()
-                entry_time = first_entry.entry_time
-                
-                if first_entry.id not in processed_entries:
-                    # Diferencia en minutos respecto al inicio del turno (puede ser negativa si entró antes)
-                    time_diff = (entry_time - schedule_start).total_seconds() / 60
-                    
-                    # Entradas hasta 10 min antes no cuentan como tarde (se normaliza a 0)
-                    effective_delay = 0 if -EARLY_ALLOW_MINUTES <= time_diff <= 0 else time_diff
-                    
-                    # Llegada tarde si supera los 5 minutos de gracia
-                    if effective_delay > GRACE_MINUTES:
-                        late_count += 1
-                    
-                    processed_entries.add(first_entry.id)
-        
-        # Calcular horas asignadas
-        total_assigned_hours = 0
-        for schedule in schedules:
-            start = schedule.start_datetime
-            end = schedule.end_datetime
-            duration = (end - start).total_seconds() / 3600
-            total_assigned_hours += duration
+        # Calcular horas trabajadas y asignadas con superposición (barrido por usuario)
+        overlap_result = calculate_overlaps(entries, schedules)
+        total_worked_hours = overlap_result['total_worked_hours']
+        total_assigned_hours = overlap_result['total_assigned_hours']
+        
+        # Calcular llegadas tarde (10 min antes permitidos, 5 min de gracia)
+        late_count = len(compute_late_arrivals(schedules))
         
         # Calcular horas restantes
         remaining_hours = total_assigned_hours - total_worked_hours
@@ -775,15 +225,10 @@ def calculate_report_stats(request):
             'total_assigned_hours': round(total_assigned_hours, 4),
             'total_worked_hours': round(total_worked_hours, 4),
             'remaining_hours': round(remaining_hours, 4),
-            'compliance_percentage': round((total_worked_hours / total_assigned_hours * 100) if total_assigned_hours > 0 else 0, 2),
+            'compliance_percentage': round(overlap_result['compliance_percentage'], 2),
             'entries_processed': len(entries),
             'schedules_processed': len(schedules),
-            'filters_applied': {
-                'from_date': from_date,
-                'to_date': to_date,
-                'user_id': user_id,
-                'room_id': room_id
-            }
+            'filters_applied': filters.as_dict()
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0002_schedule_status_alter_schedule_created_by_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['user', 'room', 'status', 'start_datetime', 'end_datetime'], name='schedule_user_room_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['status', 'start_datetime'], name='schedule_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['start_datetime'], name='schedule_start_idx'),
+        ),
+    ]
@@ -85,6 +85,17 @@ class Schedule(models.Model):
                 name='schedule_end_after_start'
             )
         ]
+        indexes = [
+            # Turno activo de un monitor en una sala en un momento dado (acceso a salas)
+            models.Index(
+                fields=['user', 'room', 'status', 'start_datetime', 'end_datetime'],
+                name='schedule_user_room_status_idx'
+            ),
+            # Turnos activos por inicio (turnos vencidos, cumplimiento)
+            models.Index(fields=['status', 'start_datetime'], name='schedule_status_start_idx'),
+            # Rangos de fechas de reportes y listados ordenados por inicio
+            models.Index(fields=['start_datetime'], name='schedule_start_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.room} - {self.start_datetime.strftime('%d/%m/%Y %H:%M')}"
@@ -173,13 +173,13 @@ class ScheduleValidationService:
         """
         Generar notificación al administrador cuando un turno no se cumple
         """
-        from notifications.models import Notification
-        from users.models import User
+        from notifications.recipients import AdminRecipientCache
+        from notifications.services import NotificationService
         
         # Obtener administradores
-        admins = User.objects.filter(role='admin', is_active=True)
+        admins = AdminRecipientCache.get_admins()
         
-        if not admins.exists():
+        if not admins:
             return False
         
         # Crear mensaje de notificación
@@ -195,20 +195,14 @@ Hora actual de verificación: {compliance_check_result['current_time'].strftime(
 
 Se requiere seguimiento administrativo."""
         
-        # Crear notificaciones para todos los administradores
-        notifications_created = []
-        for admin in admins:
-            notification = Notification.objects.create(
-                user=admin,
-                title=f"Incumplimiento de Turno - {schedule.room.code}",
-                message=message,
-                notification_type='SCHEDULE_NON_COMPLIANCE',  # Usar tipo específico
-                read=False,
-                related_object_id=schedule.id
-            )
-            notifications_created.append(notification)
-        
-        return notifications_created
+        # Crear notificaciones para todos los administradores en un solo INSERT
+        return NotificationService.notify_users(
+            admins,
+            notification_type='SCHEDULE_NON_COMPLIANCE',  # Usar tipo específico
+            title=f"Incumplimiento de Turno - {schedule.room.code}",
+            message=message,
+            related_object_id=schedule.id
+        )
 
 
 class ScheduleComplianceMonitor:
@@ -141,17 +141,21 @@ class NewFeaturesIntegrationTest(TestCase):
         # Obtener estadísticas iniciales
         stats_inicial = RoomEntryIDManager.get_room_entry_stats()
         
-        # Crear algunas entradas
+        # Crear algunas entradas (cerradas: solo puede haber una abierta por usuario)
         entrada1 = RoomEntry.objects.create(
             user=self.user,
             room=self.room,
-            entry_time=timezone.now()
+            entry_time=timezone.now() - timedelta(hours=2),
+            exit_time=timezone.now() - timedelta(hours=1),
+            active=False
         )
         
         entrada2 = RoomEntry.objects.create(
             user=self.user,
             room=self.room,
-            entry_time=timezone.now()
+            entry_time=timezone.now() - timedelta(minutes=50),
+            exit_time=timezone.now() - timedelta(minutes=10),
+            active=False
         )
         
         # Eliminar una entrada para crear hueco
@@ -1,8 +1,53 @@
+import logging
 import os
+import threading
+
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 
 BREVO_API_URL = "https://api.brevo.com/v3/smtp/email"
+BREVO_TIMEOUT = 20
+# Máximo de versiones (destinatarios) por petición según la API de Brevo
+BREVO_MAX_VERSIONS = 1000
+
+# Usar sender autorizado en Brevo
+BREVO_SENDER = {
+    "name": "Soporte DS2",
+    "email": "sado56hdgm@gmail.com"
+}
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def get_brevo_api_url():
+    return getattr(settings, 'BREVO_API_URL', BREVO_API_URL)
+
+
+def get_brevo_session():
+    """
+    Sesión HTTP reutilizable (keep-alive) por hilo, para no abrir una
+    conexión TLS nueva en cada envío.
+    """
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _local.session = session
+    return session
+
+
+def _brevo_headers(api_key):
+    return {
+        "accept": "application/json",
+        "api-key": api_key,
+        "content-type": "application/json"
+    }
+
 
 def send_email_via_brevo(to, subject, html_content, text_content=None):
     """
@@ -19,21 +64,10 @@ def send_email_via_brevo(to, subject, html_content, text_content=None):
         print(f"[BREVO_DEBUG] Subject: {subject}")
         return {"messageId": "test-message-id", "status": "sent"}
 
-    headers = {
-        "accept": "application/json",
-        "api-key": brevo_api_key,
-        "content-type": "application/json"
-    }
-
-    # Usar sender autorizado en Brevo
-    from_email_clean = "sado56hdgm@gmail.com"  # Sender autorizado en Brevo
-    from_name = "Soporte DS2"
+    headers = _brevo_headers(brevo_api_key)
 
     payload = {
-        "sender": {
-            "name": from_name,
-            "email": from_email_clean
-        },
+        "sender": BREVO_SENDER,
         "to": [
             {
                 "email": to,
@@ -49,11 +83,10 @@ def send_email_via_brevo(to, subject, html_content, text_content=None):
 
     try:
         print(f"[BREVO_DEBUG] Enviando request a Brevo API...")
-        print(f"[BREVO_DEBUG] URL: {BREVO_API_URL}")
-        print(f"[BREVO_DEBUG] Headers: {headers}")
+        print(f"[BREVO_DEBUG] URL: {get_brevo_api_url()}")
         print(f"[BREVO_DEBUG] Payload: {payload}")
 
-        response = requests.post(BREVO_API_URL, json=payload, headers=headers)
+        response = get_brevo_session().post(get_brevo_api_url(), json=payload, headers=headers, timeout=BREVO_TIMEOUT)
 
         print(f"[BREVO_DEBUG] Status Code: {response.status_code}")
         print(f"[BREVO_DEBUG] Response Headers: {dict(response.headers)}")
@@ -69,3 +102,58 @@ def send_email_via_brevo(to, subject, html_content, text_content=None):
     except requests.exceptions.RequestException as e:
         print(f"[BREVO_ERROR] Request exception: {e}")
         raise Exception(f"Error enviando email via Brevo: {e}")
+
+
+def send_emails_via_brevo_batch(emails):
+    """
+    Envía varios correos con Brevo agrupando los de igual contenido en una
+    sola petición (un `messageVersions` por destinatario, que no se ven entre sí).
+
+    Args:
+        emails: lista de dicts {'to', 'subject', 'text_content', 'html_content'}
+            con un destinatario cada uno
+
+    Returns:
+        list: error (Exception) o None por cada correo, en el mismo orden
+    """
+    brevo_api_key = getattr(settings, 'BREVO_API_KEY', None)
+    if not brevo_api_key:
+        raise ValueError("BREVO_API_KEY no está configurado en las settings.")
+
+    errors = [None] * len(emails)
+
+    groups = {}
+    for index, email in enumerate(emails):
+        key = (email['subject'], email.get('text_content'), email.get('html_content'))
+        groups.setdefault(key, []).append(index)
+
+    session = get_brevo_session()
+    headers = _brevo_headers(brevo_api_key)
+
+    for (subject, text_content, html_content), indexes in groups.items():
+        for start in range(0, len(indexes), BREVO_MAX_VERSIONS):
+            chunk = indexes[start:start + BREVO_MAX_VERSIONS]
+            payload = {
+                "sender": BREVO_SENDER,
+                "subject": subject,
+                "messageVersions": [
+                    {"to": [{"email": emails[i]['to'], "name": emails[i]['to'].split('@')[0]}]}
+                    for i in chunk
+                ]
+            }
+            if html_content:
+                payload["htmlContent"] = html_content
+            if text_content:
+                payload["textContent"] = text_content
+
+            try:
+                response = session.post(get_brevo_api_url(), json=payload, headers=headers, timeout=BREVO_TIMEOUT)
+                if response.status_code != 201:
+                    raise Exception(f"Brevo API error: {response.status_code} - {response.text}")
+                logger.info(f"Lote enviado via Brevo: {len(chunk)} destinatarios")
+            except Exception as e:
+                logger.error(f"Error enviando lote via Brevo: {e}")
+                for i in chunk:
+                    errors[i] = e
+
+    return errors
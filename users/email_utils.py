@@ -2,8 +2,8 @@
 Utilidades para envío de emails con Brevo API
 """
 from django.conf import settings
-from django.core.mail import send_mail
-from .brevo_service import send_email_via_brevo
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
+from .brevo_service import send_email_via_brevo, send_emails_via_brevo_batch
 
 
 def send_email_unified(to, subject, text_content, html_content=None):
@@ -54,3 +54,61 @@ def send_email_unified(to, subject, text_content, html_content=None):
     )
     print(f"[EMAIL_SUCCESS] Correo enviado via Brevo API")
     return result
+
+
+def _send_smtp_batch(emails):
+    """
+    Envía los correos por el EMAIL_BACKEND de Django reutilizando una sola
+    conexión (SMTP: un único login/handshake para todo el lote).
+    """
+    errors = [None] * len(emails)
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for index, email in enumerate(emails):
+            message = EmailMultiAlternatives(
+                subject=email['subject'],
+                body=email['text_content'],
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[email['to']],
+                connection=connection,
+            )
+            if email.get('html_content'):
+                message.attach_alternative(email['html_content'], 'text/html')
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                errors[index] = e
+    except Exception as e:
+        # No se pudo abrir la conexión: falla todo el lote
+        errors = [error or e for error in errors]
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return errors
+
+
+def send_email_batch(emails):
+    """
+    Envío en lote con la misma selección de transporte que send_email_unified:
+    - Testing (locmem) y desarrollo local (SMTP): una sola conexión para todo el lote
+    - Producción (Brevo): una petición por contenido distinto, con un
+      destinatario por versión del mensaje
+
+    Args:
+        emails: lista de dicts {'to', 'subject', 'text_content', 'html_content'}
+            con un destinatario cada uno
+
+    Returns:
+        list: error (Exception) o None por cada correo, en el mismo orden
+    """
+    if not emails:
+        return []
+
+    brevo_api_key = getattr(settings, 'BREVO_API_KEY', None)
+    if not brevo_api_key or brevo_api_key == 'test-key':
+        return _send_smtp_batch(emails)
+
+    return send_emails_via_brevo_batch(emails)
@@ -1,80 +1,83 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
-from django.core.mail import send_mail
 from django.urls import reverse
-from django.db import transaction
 
 from urllib.parse import quote
-import threading
 import secrets
 import hashlib
-import sys
 
 from .models import User, ApprovalLink
 from notifications.models import Notification
-from .brevo_service import send_email_via_brevo
-from .email_utils import send_email_unified
+from notifications.recipients import AdminRecipientCache
+from notifications.outbox import enqueue_email, enqueue_notification
+
+
+@receiver(post_save, sender=User)
+def refresh_admin_recipients_on_save(sender, instance, **kwargs):
+    """Mantiene al día la lista en cache de administradores destinatarios"""
+    AdminRecipientCache.user_saved(instance)
+
+
+@receiver(post_delete, sender=User)
+def refresh_admin_recipients_on_delete(sender, instance, **kwargs):
+    AdminRecipientCache.user_deleted(instance.pk)
 
 
 @receiver(post_save, sender=User)
 def notify_admin_new_user_registration(sender, instance, created, **kwargs):
     """
     Notifica a administradores cuando un monitor se registra.
-    Optimizado para no bloquear la respuesta HTTP:
-    - En producción usa transaction.on_commit + hilo para el email
-    - En tests (email backend en memoria) ejecuta sincrónicamente
+    Para no bloquear la respuesta HTTP solo se insertan filas (enlaces de
+    aprobación y bandeja de salida) en la misma transacción del registro;
+    la notificación y el email los entrega `process_outbox`.
     """
     if not (created and instance.role == 'monitor'):
         return
 
-    is_test_backend = settings.EMAIL_BACKEND == 'django.core.mail.backends.locmem.EmailBackend'
-
-    def job():
-        # Obtener todos los administradores activos y verificados
-        admin_users = User.objects.filter(role='admin', is_active=True, is_verified=True)
-
-        # Crear notificación para cada admin
-        for admin in admin_users:
-            Notification.objects.create(
-                user=admin,
-                notification_type='admin_verification',
-                title=f'Nuevo monitor registrado: {instance.get_full_name()}',
-                message=(
-                    f'El monitor {instance.get_full_name()} ({instance.username}) '
-                    f'se ha registrado y requiere verificación.'
-                ),
-                related_object_id=instance.id,
-            )
-
-        admin_emails = list(admin_users.values_list('email', flat=True))
-        if not admin_emails:
-            return
-
-        # Generar tokens y hashes
-        approve_token = secrets.token_urlsafe(32)
-        reject_token = secrets.token_urlsafe(32)
-        approve_hash = hashlib.sha256(approve_token.encode()).hexdigest()
-        reject_hash = hashlib.sha256(reject_token.encode()).hexdigest()
-
-        # Guardar enlaces de aprobación/rechazo
-        ApprovalLink.objects.create(user=instance, action=ApprovalLink.APPROVE, token_hash=approve_hash)
-        ApprovalLink.objects.create(user=instance, action=ApprovalLink.REJECT, token_hash=reject_hash)
-
-        # Construir URLs absolutas
-        base = getattr(settings, 'PUBLIC_BASE_URL', 'http://localhost:8000')
-        approve_url = f"{base}{reverse('admin_user_activate')}?token={quote(approve_token, safe='')}"
-        reject_url = f"{base}{reverse('admin_user_delete')}?token={quote(reject_token, safe='')}"
+    # Obtener todos los administradores activos y verificados
+    admin_users = AdminRecipientCache.get_admins(verified_only=True)
+
+    # Encolar la notificación para todos los admins verificados
+    enqueue_notification(
+        verified_only=True,
+        notification_type=Notification.ADMIN_VERIFICATION,
+        title=f'Nuevo monitor registrado: {instance.get_full_name()}',
+        message=(
+            f'El monitor {instance.get_full_name()} ({instance.username}) '
+            f'se ha registrado y requiere verificación.'
+        ),
+        related_object_id=instance.id,
+    )
+
+    admin_emails = [admin.email for admin in admin_users]
+    if not admin_emails:
+        return
 
-        subject = '[DS2] Nuevo monitor pendiente de verificación'
-        texto = (
-            f"Nuevo monitor:\n"
-            f"Nombre: {instance.get_full_name()} (@{instance.username})\n"
-            f"Identificación: {instance.identification}\n\n"
-            f"Aprobar: {approve_url}\n"
-            f"Rechazar: {reject_url}\n"
-        )
-        html = f"""
+    # Generar tokens y hashes
+    approve_token = secrets.token_urlsafe(32)
+    reject_token = secrets.token_urlsafe(32)
+    approve_hash = hashlib.sha256(approve_token.encode()).hexdigest()
+    reject_hash = hashlib.sha256(reject_token.encode()).hexdigest()
+
+    # Guardar enlaces de aprobación/rechazo
+    ApprovalLink.objects.create(user=instance, action=ApprovalLink.APPROVE, token_hash=approve_hash)
+    ApprovalLink.objects.create(user=instance, action=ApprovalLink.REJECT, token_hash=reject_hash)
+
+    # Construir URLs absolutas
+    base = getattr(settings, 'PUBLIC_BASE_URL', 'http://localhost:8000')
+    approve_url = f"{base}{reverse('admin_user_activate')}?token={quote(approve_token, safe='')}"
+    reject_url = f"{base}{reverse('admin_user_delete')}?token={quote(reject_token, safe='')}"
+
+    subject = '[DS2] Nuevo monitor pendiente de verificación'
+    texto = (
+        f"Nuevo monitor:\n"
+        f"Nombre: {instance.get_full_name()} (@{instance.username})\n"
+        f"Identificación: {instance.identification}\n\n"
+        f"Aprobar: {approve_url}\n"
+        f"Rechazar: {reject_url}\n"
+    )
+    html = f"""
 <!doctype html>
 <html>
   <body style=\"font-family:Segoe UI,Arial,sans-serif;background:#f6f7f9;padding:24px;\">
@@ -98,83 +101,16 @@ def notify_admin_new_user_registration(sender, instance, created, **kwargs):
 </html>
 """
 
-        def _send():
-            try:
-                print(f"[EMAIL_DEBUG] ========== INICIANDO ENVÍO DE EMAIL ==========")
-                print(f"[EMAIL_DEBUG] Timestamp: {__import__('datetime').datetime.now()}")
-                print(f"[EMAIL_DEBUG] Admin emails: {admin_emails}")
-                print(f"[EMAIL_DEBUG] From email: {settings.DEFAULT_FROM_EMAIL}")
-                print(f"[EMAIL_DEBUG] Subject: {subject}")
-                print(f"[EMAIL_DEBUG] Text content length: {len(texto)}")
-                print(f"[EMAIL_DEBUG] HTML content length: {len(html)}")
-                
-                # Verificar configuración de Brevo
-                print(f"[EMAIL_DEBUG] ========== CONFIGURACIÓN DE BREVO ==========")
-                print(f"[EMAIL_DEBUG] BREVO_API_KEY: {'***' if getattr(settings, 'BREVO_API_KEY', None) else 'No configurado'}")
-                print(f"[EMAIL_DEBUG] DEFAULT_FROM_EMAIL: {getattr(settings, 'DEFAULT_FROM_EMAIL', 'No configurado')}")
-                
-                # Usar función unificada para envío de emails
-                print(f"[EMAIL_DEBUG] ========== ENVIANDO EMAIL ==========")
-                print(f"[EMAIL_DEBUG] Enviando a {admin_emails[0]}")
-                
-                result = send_email_unified(
-                    to=admin_emails[0],
-                    subject=subject,
-                    text_content=texto,
-                    html_content=html
-                )
-                
-                print(f"[EMAIL_DEBUG] ========== RESULTADO ==========")
-                print(f"[EMAIL_DEBUG] Resultado: {result}")
-                print(f"[EMAIL_SUCCESS] Correo enviado a {len(admin_emails)} admins")
-                print(f"[EMAIL_DEBUG] ========== EMAIL ENVIADO EXITOSAMENTE ==========")
-                
-            except Exception as e:
-                # Log explícito para depurar problemas de email
-                print(f"[EMAIL_ERROR] ========== ERROR EN ENVÍO DE EMAIL ==========")
-                print(f"[EMAIL_ERROR] Timestamp: {__import__('datetime').datetime.now()}")
-                print(f"[EMAIL_ERROR] Error enviando correo a admins: {e}")
-                print(f"[EMAIL_ERROR] Tipo de error: {type(e).__name__}")
-                print(f"[EMAIL_ERROR] Módulo del error: {type(e).__module__}")
-                print(f"[EMAIL_ERROR] Args del error: {e.args}")
-                
-                import traceback
-                print(f"[EMAIL_ERROR] ========== TRACEBACK COMPLETO ==========")
-                print(f"[EMAIL_ERROR] {traceback.format_exc()}")
-                print(f"[EMAIL_ERROR] ========== FIN DEL ERROR ==========")
-                
-                # Intentar información adicional del error
-                try:
-                    if hasattr(e, 'errno'):
-                        print(f"[EMAIL_ERROR] Error number: {e.errno}")
-                    if hasattr(e, 'strerror'):
-                        print(f"[EMAIL_ERROR] Error string: {e.strerror}")
-                    if hasattr(e, 'filename'):
-                        print(f"[EMAIL_ERROR] Error filename: {e.filename}")
-                except Exception as debug_error:
-                    print(f"[EMAIL_ERROR] Error obteniendo info adicional: {debug_error}")
-
-        # En tests, ejecutar sincrónicamente para que mail.outbox funcione
-        # En producción, usar hilo asíncrono para no bloquear
-        is_testing = getattr(settings, 'TESTING', False) or 'test' in sys.argv
-        
-        if is_testing or is_test_backend:
-            _send()
-        else:
-            threading.Thread(target=_send, daemon=True).start()
-
-        if settings.EMAIL_BACKEND == 'django.core.mail.backends.console.EmailBackend':
-            print(f"\n{'='*60}")
-            print(f"ENLACES DE ACTIVACIÓN PARA: {instance.get_full_name()}")
-            print(f"{'='*60}")
-            print(f"APROBAR: {approve_url}")
-            print(f"RECHAZAR: {reject_url}")
-            print(f"{'='*60}\n")
+    # El envío lo hace el worker de la bandeja de salida (process_outbox)
+    enqueue_email(subject, texto, html, to=admin_emails)
 
-    if is_test_backend:
-        job()
-    else:
-        transaction.on_commit(job)
+    if settings.EMAIL_BACKEND == 'django.core.mail.backends.console.EmailBackend':
+        print(f"\n{'='*60}")
+        print(f"ENLACES DE ACTIVACIÓN PARA: {instance.get_full_name()}")
+        print(f"{'='*60}")
+        print(f"APROBAR: {approve_url}")
+        print(f"RECHAZAR: {reject_url}")
+        print(f"{'='*60}\n")
 
 
 @receiver(post_save, sender=User)
@@ -200,7 +136,7 @@ def notify_user_verification_status(sender, instance, **kwargs):
                 related_object_id=instance.id,
             )
             try:
-                send_email_unified(
+                enqueue_email(
                     to=instance.email,
                     subject='[DS2] Tu cuenta ha sido verificada',
                     text_content=(
@@ -211,7 +147,7 @@ def notify_user_verification_status(sender, instance, **kwargs):
                     )
                 )
             except Exception as e:
-                print(f"[EMAIL_ERROR] Error enviando email de verificación: {e}")
+                print(f"[EMAIL_ERROR] Error encolando email de verificación: {e}")
         else:
             Notification.objects.create(
                 user=instance,
@@ -221,7 +157,7 @@ def notify_user_verification_status(sender, instance, **kwargs):
                 related_object_id=instance.id,
             )
             try:
-                send_email_unified(
+                enqueue_email(
                     to=instance.email,
                     subject='[DS2] Actualización de verificación de cuenta',
                     text_content=(
@@ -232,7 +168,7 @@ def notify_user_verification_status(sender, instance, **kwargs):
                     )
                 )
             except Exception as e:
-                print(f"[EMAIL_ERROR] Error enviando email de actualización: {e}")
+                print(f"[EMAIL_ERROR] Error encolando email de actualización: {e}")
 
         delattr(instance, '_verification_changed')
 
@@ -245,7 +181,7 @@ def notify_user_on_delete(sender, instance, **kwargs):
     """
     if instance.email:
         try:
-            send_email_unified(
+            enqueue_email(
                 to=instance.email,
                 subject='[DS2] Tu cuenta ha sido eliminada',
                 text_content=(
@@ -256,5 +192,5 @@ def notify_user_on_delete(sender, instance, **kwargs):
                 )
             )
         except Exception as e:
-            print(f"[EMAIL_ERROR] Error enviando email de eliminación: {e}")
+            print(f"[EMAIL_ERROR] Error encolando email de eliminación: {e}")
 
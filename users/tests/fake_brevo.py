@@ -0,0 +1,86 @@
+"""
+Servidor HTTP local que imita POST /v3/smtp/email de Brevo para los tests
+
+Registra cada petición (cabeceras, JSON y puerto del cliente para contar
+conexiones) y responde 201 con un messageId por versión, o el estado
+configurado en `status_code`.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _BrevoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        server = self.server
+        server.requests.append({
+            'path': self.path,
+            'headers': dict(self.headers),
+            'json': payload,
+            'client_port': self.client_address[1],
+        })
+
+        if server.status_code == 201:
+            versions = payload.get('messageVersions') or [payload]
+            body = {'messageIds': [f'<fake-{len(server.requests)}-{i}@brevo>' for i in range(len(versions))]}
+        else:
+            body = {'code': 'error', 'message': 'Error simulado'}
+
+        data = json.dumps(body).encode()
+        self.send_response(server.status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeBrevoServer:
+    """
+    Uso:
+        with FakeBrevoServer() as brevo, override_settings(BREVO_API_URL=brevo.url, ...):
+            ...
+            brevo.requests
+    """
+
+    def __init__(self, status_code=201):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _BrevoHandler)
+        self._server.daemon_threads = True
+        self._server.requests = []
+        self._server.status_code = status_code
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/v3/smtp/email'
+
+    @property
+    def requests(self):
+        return self._server.requests
+
+    @property
+    def status_code(self):
+        return self._server.status_code
+
+    @status_code.setter
+    def status_code(self, value):
+        self._server.status_code = value
+
+    def connections(self):
+        """Número de conexiones TCP distintas usadas por las peticiones"""
+        return len({request['client_port'] for request in self.requests})
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
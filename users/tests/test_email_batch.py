@@ -0,0 +1,95 @@
+"""
+Tests para el envío de correos en lote (users.email_utils.send_email_batch)
+"""
+from unittest import mock
+
+from django.core import mail
+from django.test import SimpleTestCase, override_settings
+
+from users import brevo_service
+from users.email_utils import send_email_batch
+from users.tests.fake_brevo import FakeBrevoServer
+
+
+def build_emails(recipients, subject='Asunto', html='<p>Hola</p>'):
+    return [
+        {'to': recipient, 'subject': subject, 'text_content': 'Hola', 'html_content': html}
+        for recipient in recipients
+    ]
+
+
+class SmtpBatchTest(SimpleTestCase):
+    """Transporte por EMAIL_BACKEND (locmem en tests, SMTP en desarrollo)"""
+
+    def setUp(self):
+        mail.outbox.clear()
+
+    def test_single_connection_for_batch(self):
+        emails = build_emails([f'admin{i}@test.com' for i in range(5)])
+
+        with mock.patch('users.email_utils.get_connection', wraps=mail.get_connection) as get_connection:
+            errors = send_email_batch(emails)
+
+        self.assertEqual(errors, [None] * 5)
+        get_connection.assert_called_once()
+        self.assertEqual([message.to for message in mail.outbox], [[email['to']] for email in emails])
+        self.assertEqual(mail.outbox[0].alternatives, [('<p>Hola</p>', 'text/html')])
+
+    def test_failure_is_reported_per_message(self):
+        connection = mock.MagicMock()
+        connection.send_messages.side_effect = [1, OSError('rechazado'), 1]
+
+        with mock.patch('users.email_utils.get_connection', return_value=connection):
+            errors = send_email_batch(build_emails(['a@test.com', 'b@test.com', 'c@test.com']))
+
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], OSError)
+        self.assertIsNone(errors[2])
+        connection.close.assert_called_once()
+
+
+class BrevoBatchTest(SimpleTestCase):
+    """Transporte Brevo contra un servidor local falso"""
+
+    def setUp(self):
+        # Cada test empieza sin sesión HTTP para contar conexiones
+        brevo_service._local.__dict__.clear()
+
+    def test_fan_out_is_one_request_with_message_versions(self):
+        recipients = [f'admin{i}@test.com' for i in range(20)]
+
+        with FakeBrevoServer() as brevo, override_settings(BREVO_API_KEY='fake-key', BREVO_API_URL=brevo.url):
+            errors = send_email_batch(build_emails(recipients))
+
+        self.assertEqual(errors, [None] * 20)
+        self.assertEqual(len(brevo.requests), 1)
+        payload = brevo.requests[0]['json']
+        self.assertEqual(brevo.requests[0]['headers']['api-key'], 'fake-key')
+        self.assertEqual(payload['subject'], 'Asunto')
+        self.assertEqual(payload['htmlContent'], '<p>Hola</p>')
+        self.assertEqual([version['to'][0]['email'] for version in payload['messageVersions']], recipients)
+
+    def test_distinct_contents_share_connection(self):
+        emails = build_emails(['a@test.com', 'b@test.com'], subject='Uno') + build_emails(['c@test.com'], subject='Dos')
+
+        with FakeBrevoServer() as brevo, override_settings(BREVO_API_KEY='fake-key', BREVO_API_URL=brevo.url):
+            send_email_batch(emails)
+            send_email_batch(build_emails(['d@test.com'], subject='Tres'))
+
+        self.assertEqual([request['json']['subject'] for request in brevo.requests], ['Uno', 'Dos', 'Tres'])
+        self.assertEqual(brevo.connections(), 1)
+
+    def test_single_send_reuses_session(self):
+        with FakeBrevoServer() as brevo, override_settings(BREVO_API_KEY='fake-key', BREVO_API_URL=brevo.url):
+            brevo_service.send_email_via_brevo('a@test.com', 'Uno', '<p>1</p>')
+            brevo_service.send_email_via_brevo('b@test.com', 'Dos', '<p>2</p>')
+
+        self.assertEqual(len(brevo.requests), 2)
+        self.assertEqual(brevo.connections(), 1)
+
+    def test_api_error_marks_group_failed(self):
+        with FakeBrevoServer(status_code=400) as brevo, override_settings(BREVO_API_KEY='fake-key', BREVO_API_URL=brevo.url):
+            errors = send_email_batch(build_emails(['a@test.com', 'b@test.com']))
+
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(all('400' in str(error) for error in errors))